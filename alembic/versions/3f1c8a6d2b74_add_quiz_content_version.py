@@ -0,0 +1,26 @@
+"""add quiz content version
+
+Revision ID: 3f1c8a6d2b74
+Revises: a6cc393badf5
+Create Date: 2026-10-18 21:04:12.518337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c8a6d2b74'
+down_revision: Union[str, None] = 'a6cc393badf5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('quizzes', sa.Column('quiz_content_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('quizzes', 'quiz_content_version')
@@ -0,0 +1,50 @@
+"""add keyset pagination indexes
+
+Revision ID: 5b8e2f0c9d13
+Revises: 937c358cc4d1
+Create Date: 2026-10-18 13:26:52.108347
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f0c9d13'
+down_revision: Union[str, None] = '937c358cc4d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_created_at_id', 'users', ['user_created_at', 'user_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_companies_visible_created_at_id', 'companies',
+                        ['company_is_visible', 'company_created_at', 'company_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_quizzes_company_created_at_id', 'quizzes', ['company_id', 'quiz_created_at', 'quiz_id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_questions_company_created_at_id', 'questions',
+                        ['question_company_id', 'question_created_at', 'question_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_company_invitations_sender_created_at_id', 'company_invitations',
+                        ['sender_id', 'invitation_created_at', 'invitation_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_company_invitations_recipient_created_at_id', 'company_invitations',
+                        ['recipient_id', 'invitation_created_at', 'invitation_id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_company_invitations_recipient_created_at_id', table_name='company_invitations',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_company_invitations_sender_created_at_id', table_name='company_invitations',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_questions_company_created_at_id', table_name='questions', postgresql_concurrently=True)
+        op.drop_index('ix_quizzes_company_created_at_id', table_name='quizzes', postgresql_concurrently=True)
+        op.drop_index('ix_companies_visible_created_at_id', table_name='companies', postgresql_concurrently=True)
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,47 @@
+"""add result access path indexes
+
+Revision ID: 937c358cc4d1
+Revises: afa0b4b7821c
+Create Date: 2026-10-18 11:04:27.561930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '937c358cc4d1'
+down_revision: Union[str, None] = 'afa0b4b7821c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # results is append-heavy, build the indexes without blocking quiz_pass writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_results_company_user_quiz', 'results',
+                        ['result_company_id', 'result_user_id', 'result_quiz_id'], unique=False,
+                        postgresql_include=['result_created_at', 'result_right_count', 'result_total_count'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_results_user_created_at', 'results', ['result_user_id', 'result_created_at'],
+                        unique=False,
+                        postgresql_include=['result_company_id', 'result_quiz_id', 'result_right_count',
+                                            'result_total_count'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_results_quiz_user', 'results', ['result_quiz_id', 'result_user_id'], unique=False,
+                        postgresql_include=['result_company_id'], postgresql_concurrently=True)
+        op.create_index('ix_result_rollups_user_quiz', 'result_rollups', ['user_id', 'quiz_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_result_rollups_quiz_user', 'result_rollups', ['quiz_id', 'user_id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_result_rollups_quiz_user', table_name='result_rollups', postgresql_concurrently=True)
+        op.drop_index('ix_result_rollups_user_quiz', table_name='result_rollups', postgresql_concurrently=True)
+        op.drop_index('ix_results_quiz_user', table_name='results', postgresql_concurrently=True)
+        op.drop_index('ix_results_user_created_at', table_name='results', postgresql_concurrently=True)
+        op.drop_index('ix_results_company_user_quiz', table_name='results', postgresql_concurrently=True)
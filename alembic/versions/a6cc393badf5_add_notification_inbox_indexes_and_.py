@@ -0,0 +1,52 @@
+"""add notification inbox indexes and counters
+
+Revision ID: a6cc393badf5
+Revises: c41a7d9e2b60
+Create Date: 2026-10-18 16:21:35.080002
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6cc393badf5'
+down_revision: Union[str, None] = 'c41a7d9e2b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notification_counters',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute("""
+        INSERT INTO notification_counters (user_id, unread_count)
+        SELECT user_id, count(*)
+        FROM company_notifications
+        WHERE notification_status IS NULL
+        GROUP BY user_id
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_company_notifications_user_created_at_id', 'company_notifications',
+                        ['user_id', 'notification_created_at', 'notification_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_company_notifications_user_status_created_at_id', 'company_notifications',
+                        ['user_id', 'notification_status', 'notification_created_at', 'notification_id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_company_notifications_user_status_created_at_id', table_name='company_notifications',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_company_notifications_user_created_at_id', table_name='company_notifications',
+                      postgresql_concurrently=True)
+
+    op.drop_table('notification_counters')
@@ -0,0 +1,54 @@
+"""add result rollup table
+
+Revision ID: afa0b4b7821c
+Revises: dc6e69353519
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'afa0b4b7821c'
+down_revision: Union[str, None] = 'dc6e69353519'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('result_rollups',
+    sa.Column('company_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('quiz_id', sa.UUID(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('right_count_sum', sa.Integer(), nullable=False),
+    sa.Column('total_count_sum', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('best_score', sa.Float(), nullable=False),
+    sa.Column('last_attempt_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.company_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.quiz_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id', 'user_id', 'quiz_id')
+    )
+    op.execute("""
+        INSERT INTO result_rollups (company_id, user_id, quiz_id, attempt_count, right_count_sum, total_count_sum,
+                                    score_sum, best_score, last_attempt_at)
+        SELECT result_company_id, result_user_id, result_quiz_id, count(*),
+               sum(coalesce(result_right_count, 0)), sum(coalesce(result_total_count, 0)),
+               sum(CASE WHEN coalesce(result_total_count, 0) > 0
+                        THEN coalesce(result_right_count, 0)::float / result_total_count ELSE 0 END),
+               max(CASE WHEN coalesce(result_total_count, 0) > 0
+                        THEN coalesce(result_right_count, 0)::float / result_total_count ELSE 0 END),
+               max(result_created_at)
+        FROM results
+        WHERE result_company_id IS NOT NULL AND result_user_id IS NOT NULL AND result_quiz_id IS NOT NULL
+        GROUP BY result_company_id, result_user_id, result_quiz_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('result_rollups')
@@ -0,0 +1,29 @@
+"""add question text index
+
+Revision ID: c41a7d9e2b60
+Revises: 5b8e2f0c9d13
+Create Date: 2026-10-18 14:02:11.734520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a7d9e2b60'
+down_revision: Union[str, None] = '5b8e2f0c9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_questions_question_text'), 'questions', ['question_text'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_questions_question_text'), table_name='questions', postgresql_concurrently=True)
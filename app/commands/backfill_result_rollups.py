@@ -0,0 +1,15 @@
+import asyncio
+from app.db.db import async_session, close_db
+from app.services.rollups import backfill_result_rollups
+
+
+async def main():
+    async with async_session() as session:
+        rollup_count = await backfill_result_rollups(session)
+
+    await close_db()
+    print(f"Backfilled {rollup_count} result rollups")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
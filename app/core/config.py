@@ -21,15 +21,53 @@ class Settings:
     DB_URL = (
         f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_DB}"
     )
+    DB_ECHO = os.getenv("POSTGRES_ECHO_LOG", "False").lower() == "true"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FILE = os.getenv("LOG_FILE", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 100))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+    QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+    QUERY_STATS_HEADER_ENABLED = os.getenv("DEBUG", "False").lower() == "true"
+    DB_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("POSTGRES_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = int(os.getenv("POSTGRES_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("POSTGRES_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("POSTGRES_POOL_PRE_PING", "True").lower() == "true"
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", 100))
     TEST_DB = os.getenv("POSTGRES_TEST_DB")
     TEST_DB_URL = (
         f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{TEST_DB}"
     )
     REDIS_PORT = os.getenv("REDIS_PORT")
     REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}"
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 5))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+    REDIS_MGET_CHUNK_SIZE = int(os.getenv("REDIS_MGET_CHUNK_SIZE", 500))
+    RESULT_EXPORT_BATCH_SIZE = int(os.getenv("RESULT_EXPORT_BATCH_SIZE", 500))
+    ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", 300))
+    QUESTION_IMPORT_MAX_ITEMS = int(os.getenv("QUESTION_IMPORT_MAX_ITEMS", 1000))
+    QUIZ_ATTEMPT_BATCH_MAX_ITEMS = int(os.getenv("QUIZ_ATTEMPT_BATCH_MAX_ITEMS", 500))
+    ANSWER_KEY_CACHE_SIZE = int(os.getenv("ANSWER_KEY_CACHE_SIZE", 1024))
+    ANSWER_KEY_CACHE_TTL = int(os.getenv("ANSWER_KEY_CACHE_TTL", 3600))
+    QUIZ_CONTENT_CACHE_SIZE = int(os.getenv("QUIZ_CONTENT_CACHE_SIZE", 256))
+    QUIZ_CONTENT_CACHE_TTL = int(os.getenv("QUIZ_CONTENT_CACHE_TTL", 3600))
+    NOTIFICATION_FANOUT_CHUNK_SIZE = int(os.getenv("NOTIFICATION_FANOUT_CHUNK_SIZE", 1000))
+    NOTIFICATION_BULK_MAX_IDS = int(os.getenv("NOTIFICATION_BULK_MAX_IDS", 1000))
+    NOTIFICATION_STREAM_KEEPALIVE = float(os.getenv("NOTIFICATION_STREAM_KEEPALIVE", 15))
+    NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", 100))
+    NOTIFICATION_STREAM_POLL_INTERVAL = float(os.getenv("NOTIFICATION_STREAM_POLL_INTERVAL", 1))
     ACCESS_TOKEN_EXPIRY_TIME = int(os.getenv("ACCESS_TOKEN_EXPIRY_TIME"))
     REFRESH_TOKEN_EXPIRY_TIME = int(os.getenv("ACCESS_TOKEN_EXPIRY_TIME"))
     ALGORITHM = os.getenv("ALGORITHM")
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 1024))
+    PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
     ALGORITHM_AUTH0 = os.getenv("ALGORITHM_AUTH0")
     TOKEN = os.getenv("TOKEN")
     AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
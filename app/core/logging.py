@@ -0,0 +1,117 @@
+import json
+import logging
+import queue
+from collections import Counter
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from app.core.config import Settings
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# attributes every LogRecord has, anything else on a record came in through extra=
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+
+log_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES})
+
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = every
+        self.counts: Counter = Counter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every <= 1 or not getattr(record, "sampled", False):
+            return True
+
+        key = (record.name, record.msg)
+        count = self.counts[key]
+        self.counts[key] = count + 1
+        return count % self.every == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the listener thread runs in this process, so the record goes over as is and is formatted there
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_log_levels(log_levels: str) -> Dict[str, str]:
+    levels = {}
+
+    for entry in filter(None, (entry.strip() for entry in log_levels.split(","))):
+        name, _, level = entry.partition("=")
+        levels[name.strip()] = level.strip().upper()
+
+    return levels
+
+
+def create_log_handler() -> logging.Handler:
+    handler = logging.FileHandler(Settings.LOG_FILE) if Settings.LOG_FILE else logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if Settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def init_logging() -> QueueListener:
+    global log_listener
+
+    if log_listener is not None:
+        return log_listener
+
+    log_queue = queue.Queue(Settings.LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(Settings.LOG_SAMPLE_EVERY))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(Settings.LOG_LEVEL)
+
+    # SQL statements are only logged when asked for, whatever the root level is
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if Settings.DB_ECHO else logging.WARNING)
+
+    for name, level in parse_log_levels(Settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    log_listener = QueueListener(log_queue, create_log_handler(), respect_handler_level=True)
+    log_listener.start()
+    return log_listener
+
+
+def close_logging():
+    global log_listener
+
+    if log_listener is not None:
+        log_listener.stop()
+
+        for handler in log_listener.handlers:
+            handler.close()
+
+        log_listener = None
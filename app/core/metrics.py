@@ -0,0 +1,240 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import Settings
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SERVER_TIMING_DEPENDENCIES = ("auth", "db", "redis", "hash")
+UNMATCHED_ROUTE = "unmatched"
+
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labelnames: Sequence[str], labels: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(labelnames, labels)]
+
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(buckets)
+        self.values: Dict[Tuple, List] = {}
+
+    def observe(self, *labels, value: float):
+        counts = self.values.get(labels)
+
+        if counts is None:
+            # one slot per bucket, the +Inf bucket, then the sum
+            counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, counts in self.values.items():
+            cumulative = 0
+
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket_labels = format_labels(self.labelnames, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {counts[-1]}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics.values() for line in metric.render()) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+http_requests_total = metrics_registry.register(Counter(
+    "http_requests_total", "HTTP requests handled, by route and status code.", ("method", "route", "status")))
+http_request_errors_total = metrics_registry.register(Counter(
+    "http_request_errors_total", "HTTP requests that failed with a 5xx status or an unhandled exception.",
+    ("method", "route")))
+http_request_duration_seconds = metrics_registry.register(Histogram(
+    "http_request_duration_seconds", "Time until the response is fully sent, by route.", ("method", "route")))
+http_requests_in_flight = metrics_registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("method",)))
+dependency_duration_seconds = metrics_registry.register(Histogram(
+    "dependency_duration_seconds", "Time spent waiting on auth, the database, Redis and password hashing.",
+    ("dependency",)))
+dependency_errors_total = metrics_registry.register(Counter(
+    "dependency_errors_total", "Auth, database, Redis and password hashing calls that raised.", ("dependency",)))
+db_queries_per_request = metrics_registry.register(Histogram(
+    "db_queries_per_request", "SQL statements run per request, by route.", ("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200)))
+db_repeated_statements_total = metrics_registry.register(Counter(
+    "db_repeated_statements_total", "Statements repeated above QUERY_REPEAT_THRESHOLD within one request.",
+    ("route",)))
+db_pool_connections = metrics_registry.register(Gauge(
+    "db_pool_connections", "PostgreSQL pool connections by state, sampled at scrape time.", ("state",)))
+redis_pool_connections = metrics_registry.register(Gauge(
+    "redis_pool_connections", "Redis pool connections by state, sampled at scrape time.", ("state",)))
+
+
+def observe_dependency(dependency: str, duration: float):
+    dependency_duration_seconds.observe(dependency, value=duration)
+    timings = request_timings.get()
+
+    if timings is not None:
+        timings[dependency] = timings.get(dependency, 0) + duration
+
+
+@contextmanager
+def track_dependency(dependency: str) -> Iterator[None]:
+    started_at = time.perf_counter()
+
+    try:
+        yield
+
+    except Exception:
+        dependency_errors_total.inc(dependency)
+        raise
+
+    finally:
+        observe_dependency(dependency, time.perf_counter() - started_at)
+
+
+def timed(dependency: str):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_dependency(dependency):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={timings[name] * 1000:.1f}" for name in SERVER_TIMING_DEPENDENCIES if name in timings]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    # the route template rather than the raw path, so ids do not turn into one series each
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, server_timing_enabled: bool = Settings.SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing_enabled = server_timing_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started_at = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = request_timings.set(timings)
+        # stays 500 when the app raises before starting a response, ServerErrorMiddleware sends that one
+        status_code = 500
+
+        async def send_with_metrics(message: Message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+                if self.server_timing_enabled:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing",
+                                    server_timing(timings, time.perf_counter() - started_at).encode("latin-1")))
+                    message = {**message, "headers": headers}
+
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+
+        failed = False
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+
+        except Exception:
+            failed = True
+            raise
+
+        finally:
+            route = route_name(scope)
+            http_requests_in_flight.dec(method)
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration_seconds.observe(method, route, value=time.perf_counter() - started_at)
+
+            if failed or status_code >= 500:
+                http_request_errors_total.inc(method, route)
+
+            request_timings.reset(token)
@@ -1,19 +1,92 @@
-from redis import asyncio
-from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import create_async_engine
+from typing import AsyncIterator, Dict, Optional
+from redis.asyncio import Redis, ConnectionPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio.engine import AsyncEngine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import declarative_base
 from app.core.config import Settings
+from app.db.instrumentation import InstrumentedRedis, instrument_engine
 
 
-async def get_redis() -> Redis:
-    return await asyncio.from_url(Settings.REDIS_URL)
+def create_engine(db_url: str = Settings.DB_URL) -> AsyncEngine:
+    return create_async_engine(
+        db_url,
+        pool_size=Settings.DB_POOL_SIZE,
+        max_overflow=Settings.DB_MAX_OVERFLOW,
+        pool_timeout=Settings.DB_POOL_TIMEOUT,
+        pool_recycle=Settings.DB_POOL_RECYCLE,
+        pool_pre_ping=Settings.DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": Settings.DB_STATEMENT_CACHE_SIZE},
+    )
 
 
-engine = create_async_engine(Settings.DB_URL, echo=True, future=True)
+engine = instrument_engine(create_engine()) if Settings.METRICS_ENABLED else create_engine()
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 
-async def get_db() -> AsyncSession:
-    async with AsyncSession(engine) as session:
-        return session
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with async_session() as session:
+        yield session
+
+
+def get_pool_status() -> Dict[str, int]:
+    pool = engine.pool
+    return {
+        "pool_size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": Settings.DB_MAX_OVERFLOW,
+    }
+
+
+async def close_db():
+    await engine.dispose()
+
+
+redis_pool: Optional[ConnectionPool] = None
+redis_client: Optional[Redis] = None
+
+
+def init_redis() -> Redis:
+    global redis_pool, redis_client
+
+    if redis_client is None:
+        redis_pool = ConnectionPool.from_url(
+            Settings.REDIS_URL,
+            max_connections=Settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=Settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=Settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            health_check_interval=Settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        redis_class = InstrumentedRedis if Settings.METRICS_ENABLED else Redis
+        redis_client = redis_class(connection_pool=redis_pool)
+
+    return redis_client
+
+
+async def get_redis() -> Redis:
+    return init_redis()
+
+
+def get_redis_pool_status() -> Dict[str, int]:
+    if redis_pool is None:
+        return {"max_connections": Settings.REDIS_MAX_CONNECTIONS, "live": 0, "idle": 0, "in_use": 0}
+
+    return {
+        "max_connections": redis_pool.max_connections,
+        "live": redis_pool._created_connections,
+        "idle": len(redis_pool._available_connections),
+        "in_use": len(redis_pool._in_use_connections),
+    }
+
+
+async def close_redis():
+    global redis_pool, redis_client
+
+    if redis_client is not None:
+        await redis_client.close()
+        await redis_pool.disconnect()
+        redis_pool = None
+        redis_client = None
@@ -0,0 +1,151 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio.engine import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import Settings
+from app.core.metrics import dependency_errors_total, observe_dependency, track_dependency, route_name, \
+    db_queries_per_request, db_repeated_statements_total
+
+QUERY_STARTED_AT = "query_started_at"
+QUERY_STATS_HEADER = b"x-db-queries"
+
+# runs of bind parameters, so an IN list of any length still counts as the same statement
+BIND_PARAMETERS = re.compile(r"\$\d+(?:::[\w\[\]]+)?(?:\s*,\s*\$\d+(?:::[\w\[\]]+)?)*")
+
+
+def statement_shape(statement: str) -> str:
+    return BIND_PARAMETERS.sub("?", " ".join(statement.split()))
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def merge(self, other: "QueryStats"):
+        self.count += other.count
+        self.duration += other.duration
+        self.shapes.update(other.shapes)
+
+    def repeated(self, threshold: int = Settings.QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def header(self) -> str:
+        return f"count={self.count}; duration={self.duration * 1000:.1f}; repeated={len(self.repeated())}"
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    parent = query_stats.get()
+    stats = QueryStats()
+    token = query_stats.set(stats)
+
+    try:
+        yield stats
+
+    finally:
+        query_stats.reset(token)
+
+        # nested tracking, e.g. a test budget around a request, still sees the inner statements
+        if parent is not None:
+            parent.merge(stats)
+
+
+def finish_query(conn, statement: str) -> float:
+    duration = time.perf_counter() - conn.info[QUERY_STARTED_AT].pop()
+    observe_dependency("db", duration)
+    stats = query_stats.get()
+
+    if stats is not None:
+        stats.record(statement, duration)
+
+    return duration
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(QUERY_STARTED_AT, []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    finish_query(conn, statement)
+
+
+def handle_error(exception_context):
+    connection = exception_context.connection
+
+    if connection is not None and connection.info.get(QUERY_STARTED_AT):
+        dependency_errors_total.inc("db")
+        finish_query(connection, exception_context.statement or "")
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    # cursor events run inside the greenlet of the awaiting task, so the time lands on the request that ran it
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", handle_error)
+    return engine
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        with track_dependency("redis"):
+            return await super().execute(raise_on_error)
+
+
+class InstrumentedRedis(Redis):
+    async def execute_command(self, *args, **options):
+        with track_dependency("redis"):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def report_queries(route: str, stats: QueryStats):
+    db_queries_per_request.observe(route, value=stats.count)
+
+    for shape, count in stats.repeated():
+        db_repeated_statements_total.inc(route)
+        logging.warning("Statement ran %s times in one request to %s, possible N+1: %s", count, route, shape[:500])
+
+
+class QueryCounterMiddleware:
+    def __init__(self, app: ASGIApp, header_enabled: bool = Settings.QUERY_STATS_HEADER_ENABLED):
+        self.app = app
+        self.header_enabled = header_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_query_stats(message: Message):
+                if self.header_enabled and message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (QUERY_STATS_HEADER, stats.header().encode("latin-1"))]}
+
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_query_stats)
+
+            finally:
+                report_queries(route_name(scope), stats)
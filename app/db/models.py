@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, DateTime, String, Boolean, UUID, ForeignKey, Integer, ARRAY
+from sqlalchemy import Column, DateTime, String, Boolean, UUID, ForeignKey, Integer, ARRAY, Float, Index
 from sqlalchemy.orm import relationship
 from app.db.db import Base
 
@@ -24,6 +24,12 @@ class CompanyInvitations(Base):
     invitation_updated_at = Column(DateTime, index=True, default=datetime.utcnow, onupdate=datetime.utcnow,
                                    nullable=False)
 
+    __table_args__ = (
+        Index("ix_company_invitations_sender_created_at_id", "sender_id", "invitation_created_at", "invitation_id"),
+        Index("ix_company_invitations_recipient_created_at_id", "recipient_id", "invitation_created_at",
+              "invitation_id"),
+    )
+
 
 class Notification(Base):
     __tablename__: str = "company_notifications"
@@ -35,6 +41,12 @@ class Notification(Base):
     notification_text = Column(String, default=None)
     notification_created_at = Column(DateTime, index=True, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        Index("ix_company_notifications_user_created_at_id", "user_id", "notification_created_at", "notification_id"),
+        Index("ix_company_notifications_user_status_created_at_id", "user_id", "notification_status",
+              "notification_created_at", "notification_id"),
+    )
+
 
 class User(Base):
     __tablename__: str = "users"
@@ -59,6 +71,10 @@ class User(Base):
     results = relationship("Result", back_populates="result_user")
     notification = relationship("Company", secondary="company_notifications", back_populates="notifications")
 
+    __table_args__ = (
+        Index("ix_users_created_at_id", "user_created_at", "user_id"),
+    )
+
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}("
@@ -92,6 +108,10 @@ class Company(Base):
     results = relationship("Result", back_populates="result_company")
     notifications = relationship("User", secondary="company_notifications", back_populates="notification")
 
+    __table_args__ = (
+        Index("ix_companies_visible_created_at_id", "company_is_visible", "company_created_at", "company_id"),
+    )
+
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}("
@@ -112,6 +132,7 @@ class Quiz(Base):
     quiz_title = Column(String, default=None)
     quiz_description = Column(String, default=None)
     quiz_frequency = Column(DateTime, default=None)
+    quiz_content_version = Column(Integer, default=0, server_default="0", nullable=False)
     company_id = Column(UUID(as_uuid=True), ForeignKey('companies.company_id'))
     company = relationship("Company", back_populates="quiz")
     question = relationship("Question", back_populates="quiz", cascade="all, delete-orphan")
@@ -121,6 +142,10 @@ class Quiz(Base):
     quiz_updated_at = Column(DateTime, index=True, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     results = relationship("Result", back_populates="result_quiz")
 
+    __table_args__ = (
+        Index("ix_quizzes_company_created_at_id", "company_id", "quiz_created_at", "quiz_id"),
+    )
+
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}("
@@ -137,7 +162,7 @@ class Question(Base):
     __tablename__: str = "questions"
 
     question_id = Column(UUID(as_uuid=True), primary_key=True, index=True, unique=True, default=uuid.uuid4)
-    question_text = Column(String, default=None)
+    question_text = Column(String, default=None, index=True)
     question_answers = Column(ARRAY(String), default=None)
     question_correct_answer = Column(ARRAY(String), default=None)
     quiz_id = Column(UUID(as_uuid=True), ForeignKey('quizzes.quiz_id'))
@@ -148,6 +173,10 @@ class Question(Base):
     question_created_at = Column(DateTime, index=True, default=datetime.utcnow, nullable=False)
     question_updated_at = Column(DateTime, index=True, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        Index("ix_questions_company_created_at_id", "question_company_id", "question_created_at", "question_id"),
+    )
+
     def __repr__(self):
         return (
             f"<{self.__class__.__name__}("
@@ -172,3 +201,37 @@ class Result(Base):
     result_created_at = Column(DateTime, index=True, default=datetime.utcnow, nullable=False)
     result_right_count = Column(Integer, default=0)
     result_total_count = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_results_company_user_quiz", "result_company_id", "result_user_id", "result_quiz_id",
+              postgresql_include=["result_created_at", "result_right_count", "result_total_count"]),
+        Index("ix_results_user_created_at", "result_user_id", "result_created_at",
+              postgresql_include=["result_company_id", "result_quiz_id", "result_right_count", "result_total_count"]),
+        Index("ix_results_quiz_user", "result_quiz_id", "result_user_id", postgresql_include=["result_company_id"]),
+    )
+
+
+class ResultRollup(Base):
+    __tablename__: str = "result_rollups"
+
+    company_id = Column(UUID(as_uuid=True), ForeignKey('companies.company_id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    quiz_id = Column(UUID(as_uuid=True), ForeignKey('quizzes.quiz_id', ondelete='CASCADE'), primary_key=True)
+    attempt_count = Column(Integer, default=0, nullable=False)
+    right_count_sum = Column(Integer, default=0, nullable=False)
+    total_count_sum = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Float, default=0, nullable=False)
+    best_score = Column(Float, default=0, nullable=False)
+    last_attempt_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_result_rollups_user_quiz", "user_id", "quiz_id"),
+        Index("ix_result_rollups_quiz_user", "quiz_id", "user_id"),
+    )
+
+
+class NotificationCounter(Base):
+    __tablename__: str = "notification_counters"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    unread_count = Column(Integer, default=0, nullable=False)
@@ -291,7 +291,27 @@ class InvalidAction(Invalid):
 
 class InvalidExportFormat(Invalid):
     def __init__(self):
-        super().__init__(object_type="Export Format", details="supported formats: JSON, CSV.")
+        super().__init__(object_type="Export Format", details="supported formats: JSON, CSV, NDJSON.")
+
+
+class InvalidCursor(Invalid):
+    def __init__(self):
+        super().__init__(object_type="Cursor", details="use the next_cursor returned by the previous page.")
+
+
+class InvalidQuestionImport(Invalid):
+    def __init__(self, details):
+        super().__init__(object_type="Question Import", details=details)
+
+
+class InvalidQuizAttemptBatch(Invalid):
+    def __init__(self, details):
+        super().__init__(object_type="Quiz Attempt Batch", details=details)
+
+
+class InvalidNotificationBulkHandle(Invalid):
+    def __init__(self, details):
+        super().__init__(object_type="Notification Bulk Handle", details=details)
 
 
 class ErrorSettingRole(CustomException):
@@ -399,6 +419,11 @@ class ErrorPassQuiz(CustomException):
         super().__init__(detail=f"Error passing quiz: {e}", **kwargs)
 
 
+class ErrorPassQuizBatch(CustomException):
+    def __init__(self, e, **kwargs):
+        super().__init__(detail=f"Error passing quiz attempts: {e}", **kwargs)
+
+
 class EmptyAnswer(CustomException):
     def __init__(self, **kwargs):
         super().__init__(detail="Answer is empty", **kwargs)
@@ -488,3 +513,13 @@ class ErrorGetUserNotifications(CustomException):
 class ErrorHandleUserNotification(CustomException):
     def __init__(self, notification_id, e, **kwargs):
         super().__init__(detail=f"Error handling user notification with ID {notification_id}: {e}", **kwargs)
+
+
+class ErrorHandleUserNotifications(CustomException):
+    def __init__(self, e, **kwargs):
+        super().__init__(detail=f"Error handling user notifications: {e}", **kwargs)
+
+
+class ErrorImportingQuestions(CustomException):
+    def __init__(self, e, **kwargs):
+        super().__init__(detail=f"Error importing questions: {e}", **kwargs)
@@ -1,21 +1,20 @@
-import logging
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 from app.core.config import Settings
-from app.db.db import get_db
+from app.core.logging import init_logging, close_logging
+from app.core.metrics import MetricsMiddleware
+from app.db.instrumentation import QueryCounterMiddleware
+from app.db.db import close_db, init_redis, close_redis
 from app.depends.exceptions import CustomException
-from app.routers import health, user_routers, auth_routers, company_routers, quiz_routers
+from app.routers import health, metrics, user_routers, auth_routers, company_routers, quiz_routers
+from app.services.notification_stream import notification_broker
+from app.utils.security import init_password_executor, close_password_executor
 
-logging.basicConfig(
-    filename='app.log',
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+init_logging()
 
 app = FastAPI()
-app.db = None
 
 origins = [
     "http://localhost",
@@ -32,6 +31,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if Settings.METRICS_ENABLED:
+    app.add_middleware(QueryCounterMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.exception_handler(CustomException)
 async def custom_exception_handler(request: Request, exc: CustomException):
@@ -42,12 +45,17 @@ async def custom_exception_handler(request: Request, exc: CustomException):
 
 @app.on_event("startup")
 async def startup_event():
-    app.db = await get_db()
+    init_redis()
+    init_password_executor()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    await app.db.close()
+    await notification_broker.close()
+    await close_redis()
+    await close_db()
+    close_password_executor()
+    close_logging()
 
 app.include_router(health.router)
 app.include_router(user_routers.user_router)
@@ -55,6 +63,9 @@ app.include_router(auth_routers.auth_router)
 app.include_router(company_routers.company_router)
 app.include_router(quiz_routers.quiz_router)
 
+if Settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
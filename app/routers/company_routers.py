@@ -12,9 +12,10 @@ company_router = APIRouter(prefix="/companies", tags=["companies"])
 
 @company_router.get("/", operation_id="companies", )
 async def company_list(page: int = Query(default=1, description="Page number", ge=1),
-                       companies_per_page: int = Query(default=10, description="Items per page", le=100),
+                       companies_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                       cursor: str = Query(default=None, description="next_cursor from the previous page"),
                        company_service: CompanyService = Depends(get_company_service)):
-    return await company_service.get_all(page, companies_per_page)
+    return await company_service.get_all(page, companies_per_page, cursor)
 
 
 @company_router.post("/", status_code=HTTPStatus.CREATED, operation_id="company_create")
@@ -43,9 +44,10 @@ async def company_delete(company_id: str, user: User = Depends(AuthService.get_c
 
 @company_router.get("/{company_id}/members", operation_id="get_company_members")
 async def get_company_members(company_id: str, page: int = Query(default=1, description="Page number", ge=1),
-                              members_per_page: int = Query(default=10, description="Items per page", le=100),
+                              members_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                              cursor: str = Query(default=None, description="next_cursor from the previous page"),
                               company_service: CompanyService = Depends(get_company_service)):
-    return await company_service.get_company_members(company_id, page, members_per_page)
+    return await company_service.get_company_members(company_id, page, members_per_page, cursor)
 
 
 @company_router.delete("/{company_id}/{member_id}", operation_id="remove_member")
@@ -69,17 +71,19 @@ async def create_invitation(invitation_data: CompanyInvitationCreate, user: User
 @company_router.get("/user_requests/", operation_id="get_user_requests")
 async def user_requests(user: User = Depends(AuthService.get_current_user),
                         page: int = Query(default=1, description="Page number", ge=1),
-                        invitation_per_page: int = Query(default=10, description="Items per page", le=100),
+                        invitation_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                        cursor: str = Query(default=None, description="next_cursor from the previous page"),
                         invitation_service: InvitationService = Depends(get_invitation_service)):
-    return await invitation_service.user_requests(user.user_id, page, invitation_per_page)
+    return await invitation_service.user_requests(user.user_id, page, invitation_per_page, cursor)
 
 
 @company_router.get("/{company_id}/invitations", operation_id="get_user_invitations")
 async def user_invitations(user: User = Depends(AuthService.get_current_user),
                            page: int = Query(default=1, description="Page number", ge=1),
-                           invitation_per_page: int = Query(default=10, description="Items per page", le=100),
+                           invitation_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                           cursor: str = Query(default=None, description="next_cursor from the previous page"),
                            invitation_service: InvitationService = Depends(get_invitation_service)):
-    return await invitation_service.user_invitations(user.user_id, page, invitation_per_page)
+    return await invitation_service.user_invitations(user.user_id, page, invitation_per_page, cursor)
 
 
 @company_router.post("/{invitation_id}", operation_id="manage_invitation")
@@ -91,17 +95,19 @@ async def manage_invitation(invitation_id: str, action: str, user: User = Depend
 @company_router.get("{company_id}/invited", operation_id="get_invited_users")
 async def invited_users(company_id: str, user: User = Depends(AuthService.get_current_user),
                         page: int = Query(default=1, description="Page number", ge=1),
-                        invitation_per_page: int = Query(default=10, description="Items per page", le=100),
+                        invitation_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                        cursor: str = Query(default=None, description="next_cursor from the previous page"),
                         invitation_service: InvitationService = Depends(get_invitation_service)):
-    return await invitation_service.invited_users(company_id, user.user_id, page, invitation_per_page)
+    return await invitation_service.invited_users(company_id, user.user_id, page, invitation_per_page, cursor)
 
 
 @company_router.get("/{company_id}/requests", operation_id="get_membership_requests")
 async def membership_requests(company_id: str, user: User = Depends(AuthService.get_current_user),
                               page: int = Query(default=1, description="Page number", ge=1),
-                              invitation_per_page: int = Query(default=10, description="Items per page", le=100),
+                              invitation_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                              cursor: str = Query(default=None, description="next_cursor from the previous page"),
                               invitation_service: InvitationService = Depends(get_invitation_service)):
-    return await invitation_service.membership_requests(company_id, user.user_id, page, invitation_per_page)
+    return await invitation_service.membership_requests(company_id, user.user_id, page, invitation_per_page, cursor)
 
 
 @company_router.get("/{user_id}/", operation_id="get_user_companies")
@@ -112,9 +118,10 @@ async def get_user_companies(user_id: str, company_service: CompanyService = Dep
 @company_router.get("/{company_id}/admins", operation_id="get_admins")
 async def get_admins(company_id: str,
                      page: int = Query(default=1, description="Page number", ge=1),
-                     admin_per_page: int = Query(default=10, description="Items per page", le=100),
+                     admin_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                     cursor: str = Query(default=None, description="next_cursor from the previous page"),
                      company_service: CompanyService = Depends(get_company_service)):
-    return await company_service.get_admins(company_id, page, admin_per_page)
+    return await company_service.get_admins(company_id, page, admin_per_page, cursor)
 
 
 @company_router.put("/{company_id}/role", operation_id="set_admin_status")
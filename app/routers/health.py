@@ -4,7 +4,7 @@ from fastapi import Depends
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
-from app.db.db import get_db, get_redis
+from app.db.db import get_db, get_redis, get_pool_status, get_redis_pool_status
 from app.depends.exceptions import CustomException, ErrorStartingApp, ErrorPostgresSQL, ErrorRedis
 
 router = APIRouter(prefix="/health", tags=["health"])
@@ -38,6 +38,11 @@ async def check_postgresql(session: AsyncSession = Depends(get_db)):
         raise ErrorPostgresSQL(e)
 
 
+@router.get("/postgresql_pool")
+async def postgresql_pool():
+    return JSONResponse(content={"status_code": 200, "detail": "PostgresSQL pool status", "result": get_pool_status()})
+
+
 @router.get("/check_redis")
 async def check_redis(redis=Depends(get_redis)):
     try:
@@ -51,3 +56,8 @@ async def check_redis(redis=Depends(get_redis)):
     except CustomException as e:
         logging.error(f"Error checking Redis connection: {e}")
         raise ErrorRedis(e)
+
+
+@router.get("/redis_pool")
+async def redis_pool():
+    return JSONResponse(content={"status_code": 200, "detail": "Redis pool status", "result": get_redis_pool_status()})
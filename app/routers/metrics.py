@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+from app.core.metrics import metrics_registry, db_pool_connections, redis_pool_connections
+from app.db.db import get_pool_status, get_redis_pool_status
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    pool_status = get_pool_status()
+    redis_pool_status = get_redis_pool_status()
+
+    for state in ("checked_in", "checked_out"):
+        db_pool_connections.set(state, value=pool_status[state])
+
+    for state in ("idle", "in_use"):
+        redis_pool_connections.set(state, value=redis_pool_status[state])
+
+    return PlainTextResponse(metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
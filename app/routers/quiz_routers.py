@@ -1,13 +1,21 @@
 from http import HTTPStatus
-from fastapi import APIRouter, Depends, Query
+from typing import Any, List
+from fastapi import APIRouter, Depends, Query, Body, File, UploadFile, Request, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
+from app.db.db import get_db
 from app.db.models import User
+from app.depends.exceptions import NotSelf
 from app.depends.depends import get_quiz_service, get_question_service, get_result_service, get_notification_service
-from app.schemas.quiz import QuizBase, QuizUpdate, QuestionUpdate, QuestionBase, QuizPass
+from app.schemas.quiz import QuizBase, QuizUpdate, QuestionUpdate, QuestionBase, QuizPass, QuizAttemptBatch, \
+    NotificationBulkHandle
 from app.services.auth import AuthService
+from app.services.notification_stream import notification_events
 from app.services.notifications import NotificationService
 from app.services.questions import QuestionService
 from app.services.quizzes import QuizService
 from app.services.results import ResultService, get_redis_data
+from app.utils.http_cache import cached_json_response
 
 quiz_router = APIRouter(prefix="/quizzes", tags=["quizzes"])
 
@@ -15,9 +23,10 @@ quiz_router = APIRouter(prefix="/quizzes", tags=["quizzes"])
 @quiz_router.get("/", operation_id="quizzes", )
 async def quiz_list(company_id: str, user: User = Depends(AuthService.get_current_user),
                     page: int = Query(default=1, description="Page number", ge=1),
-                    quiz_per_page: int = Query(default=10, description="Items per page", le=100),
+                    quiz_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                    cursor: str = Query(default=None, description="next_cursor from the previous page"),
                     quiz_service: QuizService = Depends(get_quiz_service)):
-    return await quiz_service.get_all(company_id, user.user_id, page, quiz_per_page)
+    return await quiz_service.get_all(company_id, user.user_id, page, quiz_per_page, cursor)
 
 
 @quiz_router.get("/{quiz_id}", operation_id="quiz_get_by_id")
@@ -27,9 +36,10 @@ async def quiz_get_by_id(quiz_id: str, user: User = Depends(AuthService.get_curr
 
 
 @quiz_router.post("/", status_code=HTTPStatus.CREATED, operation_id="quiz_create")
-async def quiz_create(quiz_data: QuizBase, user: User = Depends(AuthService.get_current_user),
+async def quiz_create(quiz_data: QuizBase, background_tasks: BackgroundTasks,
+                      user: User = Depends(AuthService.get_current_user),
                       quiz_service: QuizService = Depends(get_quiz_service)):
-    return await quiz_service.create(user.user_id, quiz_data)
+    return await quiz_service.create(user.user_id, quiz_data, background_tasks)
 
 
 @quiz_router.put("/{quiz_id}", operation_id="quiz_update")
@@ -47,9 +57,10 @@ async def quiz_delete(quiz_id: str, user: User = Depends(AuthService.get_current
 @quiz_router.get("/questions/", operation_id="get_questions", )
 async def question_list(company_id: str, user: User = Depends(AuthService.get_current_user),
                         page: int = Query(default=1, description="Page number", ge=1),
-                        question_per_page: int = Query(default=10, description="Items per page", le=100),
+                        question_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                        cursor: str = Query(default=None, description="next_cursor from the previous page"),
                         question_service: QuestionService = Depends(get_question_service)):
-    return await question_service.get_all(company_id, user.user_id, page, question_per_page)
+    return await question_service.get_all(company_id, user.user_id, page, question_per_page, cursor)
 
 
 @quiz_router.get("/{question_id}/", operation_id="question_get_by_id")
@@ -64,6 +75,21 @@ async def question_create(question_data: QuestionBase, user: User = Depends(Auth
     return await question_service.create(user.user_id, question_data)
 
 
+@quiz_router.post("/{quiz_id}/questions/import", status_code=HTTPStatus.CREATED, operation_id="questions_import")
+async def questions_import(quiz_id: str, questions: List[Any] = Body(description="List of QuestionImportItem objects"),
+                           user: User = Depends(AuthService.get_current_user),
+                           question_service: QuestionService = Depends(get_question_service)):
+    return await question_service.import_questions(quiz_id, user.user_id, questions)
+
+
+@quiz_router.post("/{quiz_id}/questions/import/file", status_code=HTTPStatus.CREATED,
+                  operation_id="questions_import_file")
+async def questions_import_file(quiz_id: str, file: UploadFile = File(description="JSON array or NDJSON file"),
+                                user: User = Depends(AuthService.get_current_user),
+                                question_service: QuestionService = Depends(get_question_service)):
+    return await question_service.import_questions_file(quiz_id, user.user_id, file)
+
+
 @quiz_router.put("/{question_id}/", operation_id="question_update")
 async def question_update(question_id: str, question_data: QuestionUpdate,
                           user: User = Depends(AuthService.get_current_user),
@@ -78,9 +104,10 @@ async def question_delete(question_id: str, user: User = Depends(AuthService.get
 
 
 @quiz_router.get("/{quiz_id}/questions", operation_id="get_quiz_questions")
-async def quiz_questions(quiz_id: str, user: User = Depends(AuthService.get_current_user),
+async def quiz_questions(quiz_id: str, request: Request, user: User = Depends(AuthService.get_current_user),
                          question_service: QuestionService = Depends(get_question_service)):
-    return await question_service.quiz_questions(quiz_id, user.user_id)
+    content = await question_service.quiz_questions(quiz_id, user.user_id)
+    return cached_json_response(request, content["body"], content["etag"])
 
 
 @quiz_router.post("/{quiz_id}/quiz", operation_id="question_pass")
@@ -89,6 +116,12 @@ async def quiz_pass(quiz_id: str, quiz_data: QuizPass, user: User = Depends(Auth
     return await quiz_service.quiz_pass(quiz_id, quiz_data, user.user_id)
 
 
+@quiz_router.post("/attempts/batch", operation_id="quiz_pass_batch")
+async def quiz_pass_batch(batch: QuizAttemptBatch, user: User = Depends(AuthService.get_current_user),
+                          quiz_service: QuizService = Depends(get_quiz_service)):
+    return await quiz_service.quiz_pass_batch(batch.attempts, user.user_id)
+
+
 @quiz_router.get("/result/company", operation_id="user_quiz_result_company")
 async def user_result_company(company_id: str, user_id: str, export_format: str = None,
                               user: User = Depends(AuthService.get_current_user),
@@ -133,7 +166,7 @@ async def user_scores_all_quizzes_over_times(user_id: str, result_service: Resul
 
 
 @quiz_router.get("/result/redis", operation_id="user_quiz_redis_data")
-async def get_redis_data(quiz_id: str, user_id: str, question_id: str):
+async def user_quiz_redis_data(quiz_id: str, user_id: str, question_id: str):
     return await get_redis_data(quiz_id, user_id, question_id)
 
 
@@ -151,9 +184,35 @@ async def company_last_attempt_times(company_id: str, user: User = Depends(AuthS
 
 
 @quiz_router.get("/{user_id}/notifications", operation_id="get_user_notifications")
-async def get_user_notifications(user: User = Depends(AuthService.get_current_user),
+async def get_user_notifications(unread_only: bool = Query(default=False, description="Only unread notifications"),
+                                 page: int = Query(default=1, description="Page number", ge=1),
+                                 notification_per_page: int = Query(default=10, description="Items per page", ge=1,
+                                                                    le=100),
+                                 cursor: str = Query(default=None, description="next_cursor from the previous page"),
+                                 user: User = Depends(AuthService.get_current_user),
                                  notification_service: NotificationService = Depends(get_notification_service)):
-    return await notification_service.get_user_notifications(user.user_id)
+    return await notification_service.get_user_notifications(user.user_id, unread_only, page, notification_per_page,
+                                                             cursor)
+
+
+@quiz_router.get("/{user_id}/notifications/stream", operation_id="stream_user_notifications")
+async def stream_user_notifications(user_id: str, user: User = Depends(AuthService.get_current_user),
+                                    session: AsyncSession = Depends(get_db)):
+    # checked before the response starts, an error inside the stream could no longer change its status
+    if str(user.user_id) != user_id:
+        raise NotSelf
+
+    # the stream may stay open for hours, hand the connection used by authentication back to the pool first
+    await session.close()
+    return StreamingResponse(notification_events(user.user_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@quiz_router.get("/{user_id}/notifications/unread", operation_id="get_user_unread_notification_count")
+async def get_user_unread_notification_count(user: User = Depends(AuthService.get_current_user),
+                                             notification_service: NotificationService = Depends(
+                                                 get_notification_service)):
+    return await notification_service.get_unread_count(user.user_id)
 
 
 @quiz_router.get("/{user_id}/notification/handle", operation_id="handle_user_notifications")
@@ -161,3 +220,10 @@ async def handle_user_notifications(notification_id: str, action: bool,
                                     user: User = Depends(AuthService.get_current_user),
                                     notification_service: NotificationService = Depends(get_notification_service)):
     return await notification_service.handle_notifications(notification_id, action, user.user_id)
+
+
+@quiz_router.post("/{user_id}/notifications/handle", operation_id="handle_user_notifications_bulk")
+async def handle_user_notifications_bulk(handle_data: NotificationBulkHandle,
+                                         user: User = Depends(AuthService.get_current_user),
+                                         notification_service: NotificationService = Depends(get_notification_service)):
+    return await notification_service.handle_notifications_bulk(user.user_id, handle_data)
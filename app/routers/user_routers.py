@@ -9,9 +9,10 @@ user_router = APIRouter(prefix="/users", tags=["users"])
 
 @user_router.get("/")
 async def user_list(page: int = Query(default=1, description="Page number", ge=1),
-                    users_per_page: int = Query(default=10, description="Items per page", le=100),
+                    users_per_page: int = Query(default=10, description="Items per page", ge=1, le=100),
+                    cursor: str = Query(default=None, description="next_cursor from the previous page"),
                     user_service: UserService = Depends(get_user_service)):
-    return await user_service.get_all(page, users_per_page)
+    return await user_service.get_all(page, users_per_page, cursor)
 
 
 @user_router.post("/", status_code=HTTPStatus.CREATED, operation_id="user_create")
@@ -30,6 +30,22 @@ class QuestionBase(BaseModel):
     )
 
 
+class QuestionImportItem(BaseModel):
+    question_text: str = Field(title="Text", min_length=1)
+    question_answers: List[str] = Field(title="Answers", min_length=2)
+    question_correct_answer: List[str] = Field(title="Correct Answer", min_length=1)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "question_text": "1. Do you like your company?",
+                "question_answers": ["Yes", "No", "May be"],
+                "question_correct_answer": ["Yes"]
+            }
+        }
+    )
+
+
 class QuestionUpdate(BaseModel):
     question_text: Optional[str] = None
     question_answers: Optional[str] = None
@@ -108,3 +124,42 @@ class QuizPass(BaseModel):
             }
         }
     )
+
+
+class QuizAttempt(BaseModel):
+    quiz_id: UUID = Field(title="Quiz id")
+    answers: List[str] = Field(title="Answers")
+    attempted_at: Optional[datetime.datetime] = Field(None, title="Attempted")
+
+
+class QuizAttemptBatch(BaseModel):
+    attempts: List[QuizAttempt] = Field(title="Attempts", min_length=1)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "attempts": [
+                    {
+                        "quiz_id": "7b4f7d9e-0c5e-4a3e-9a77-1f2f4c5d6e7f",
+                        "answers": ["yes", "yes, no"],
+                        "attempted_at": "2023-11-20T09:30:00Z"
+                    }
+                ]
+            }
+        }
+    )
+
+
+class NotificationBulkHandle(BaseModel):
+    action: bool = Field(True, title="Action")
+    notification_ids: Optional[List[UUID]] = Field(None, title="Notification ids")
+    before: Optional[datetime.datetime] = Field(None, title="Created before")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "action": True,
+                "before": "2023-11-20T09:30:00Z"
+            }
+        }
+    )
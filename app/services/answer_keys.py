@@ -0,0 +1,140 @@
+import json
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import Settings
+from app.db.db import get_redis
+from app.db.models import Question, Quiz
+from app.services.quiz_versions import VersionedCache
+
+AnswerKey = Tuple[Tuple[str, Tuple[str, ...], FrozenSet[str]], ...]
+
+
+def normalize_answer(answer: str) -> str:
+    return answer.lower()
+
+
+def answer_key_redis_key(quiz_id: str) -> str:
+    return f"answer_key:{quiz_id}"
+
+
+def questions_query(*quiz_ids):
+    return (select(Question).filter(Question.quiz_id.in_(quiz_ids))
+            .order_by(Question.quiz_id, Question.question_created_at, Question.question_id))
+
+
+def compile_answer_key(questions: Iterable[Tuple[Any, Iterable[str]]]) -> AnswerKey:
+    answer_key = []
+
+    for question_id, correct_answers in questions:
+        correct_answers = tuple(normalize_answer(answer) for answer in correct_answers)
+        answer_key.append((str(question_id), correct_answers, frozenset(correct_answers)))
+
+    return tuple(answer_key)
+
+
+def build_answer_key(questions: Iterable[Question]) -> AnswerKey:
+    return compile_answer_key((question.question_id, question.question_correct_answer) for question in questions)
+
+
+def dump_answer_key(answer_key: AnswerKey, version: int) -> str:
+    return json.dumps({"version": version, "questions": [[question_id, list(correct_answers)]
+                                                         for question_id, correct_answers, _ in answer_key]})
+
+
+def load_answer_key(payload: Optional[bytes], version: int) -> Optional[AnswerKey]:
+    if payload is None:
+        return None
+
+    payload = json.loads(payload)
+
+    # built before the last invalidation, the questions may have changed since
+    if payload["version"] != version:
+        return None
+
+    return compile_answer_key(payload["questions"])
+
+
+answer_key_cache = VersionedCache(Settings.ANSWER_KEY_CACHE_SIZE, Settings.ANSWER_KEY_CACHE_TTL)
+
+
+async def get_cached_answer_keys(versions: Dict[str, int]) -> Dict[str, AnswerKey]:
+    try:
+        payloads = await (await get_redis()).mget([answer_key_redis_key(quiz_id) for quiz_id in versions])
+
+    except Exception as e:
+        logging.warning(f"Error reading cached answer keys, falling back to the database: {e}")
+        return {}
+
+    answer_keys = {}
+
+    for (quiz_id, version), payload in zip(versions.items(), payloads):
+        answer_key = load_answer_key(payload, version)
+
+        if answer_key is not None:
+            answer_keys[quiz_id] = answer_key
+
+    return answer_keys
+
+
+async def cache_answer_keys(answer_keys: Dict[str, AnswerKey], versions: Dict[str, int]):
+    try:
+        async with (await get_redis()).pipeline(transaction=False) as pipe:
+            for quiz_id, answer_key in answer_keys.items():
+                pipe.setex(answer_key_redis_key(quiz_id), Settings.ANSWER_KEY_CACHE_TTL,
+                           dump_answer_key(answer_key, versions[quiz_id]))
+
+            await pipe.execute()
+
+    except Exception as e:
+        logging.warning(f"Error caching answer keys: {e}")
+
+
+async def load_answer_keys(session: AsyncSession, quiz_ids: List[str]) -> Dict[str, AnswerKey]:
+    questions: Dict[str, List[Question]] = {quiz_id: [] for quiz_id in quiz_ids}
+    result = await session.scalars(questions_query(*quiz_ids))
+
+    for question in result.all():
+        questions[str(question.quiz_id)].append(question)
+
+    return {quiz_id: build_answer_key(quiz_questions) for quiz_id, quiz_questions in questions.items()}
+
+
+async def get_answer_keys(session: AsyncSession, quizzes: Iterable[Quiz]) -> Dict[str, AnswerKey]:
+    # the version is bumped in the transaction that changes the questions, so the quiz row a caller has already
+    # loaded never carries a version newer than the questions it would be built from
+    versions = {str(quiz.quiz_id): quiz.quiz_content_version for quiz in quizzes}
+
+    if not versions:
+        return {}
+
+    answer_keys = {}
+
+    for quiz_id, version in versions.items():
+        answer_key = answer_key_cache.get(quiz_id, version)
+
+        if answer_key is not None:
+            answer_keys[quiz_id] = answer_key
+
+    missing_versions = {quiz_id: version for quiz_id, version in versions.items() if quiz_id not in answer_keys}
+
+    if missing_versions:
+        cached_answer_keys = await get_cached_answer_keys(missing_versions)
+        loaded_answer_keys = {}
+        missing_quiz_ids = [quiz_id for quiz_id in missing_versions if quiz_id not in cached_answer_keys]
+
+        if missing_quiz_ids:
+            loaded_answer_keys = await load_answer_keys(session, missing_quiz_ids)
+            await cache_answer_keys(loaded_answer_keys, versions)
+
+        for quiz_id, answer_key in {**cached_answer_keys, **loaded_answer_keys}.items():
+            answer_key_cache.set(quiz_id, versions[quiz_id], answer_key)
+            answer_keys[quiz_id] = answer_key
+
+    return answer_keys
+
+
+async def get_answer_key(session: AsyncSession, quiz: Quiz) -> AnswerKey:
+    answer_keys = await get_answer_keys(session, [quiz])
+    return answer_keys[str(quiz.quiz_id)]
@@ -34,12 +34,22 @@ class AuthService:
                 logging.error(f"Error retrieving user with email {user_email}")
                 return None
 
-            if not await Hasher.verify_password(user_hashed_password, user.user_hashed_password):
-                logging.error(
-                    f"Error password match. Entered password: {user_hashed_password}, "
-                    f"password in the database: {User.user_hashed_password}")
+            if not user.user_hashed_password:
+                logging.error(f"User with email {user_email} has no password set")
                 raise ErrorPasswordMatch()
 
+            is_valid, new_hashed_password = await Hasher.verify_and_update(user_hashed_password,
+                                                                           user.user_hashed_password)
+
+            if not is_valid:
+                logging.error(f"Error password match for user with email {user_email}")
+                raise ErrorPasswordMatch()
+
+            if new_hashed_password:
+                user.user_hashed_password = new_hashed_password
+                await self.session.commit()
+                logging.info("Password hash upgraded for user with email %s", user_email)
+
             return user
 
         except Exception as e:
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Dict
+from typing import Any, Dict
 
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,7 +9,9 @@ from app.depends.exceptions import ErrorRetrievingList, ErrorRetrievingCompany,
     ErrorRetrievingMember, ErrorRemovingMember, OwnerLeave, ErrorLeavingCompany, NotMember, AlreadyExistsCompany, \
     ErrorRetrievingAdmin, ErrorSettingRoleAdmin, ErrorChangeOwnerAdminRole
 from app.schemas.company import CompanyBase, CompanyUpdate, CompanyMemberResponse, CompanyAdmin
+from app.services.permissions import PermissionService
 from app.services.users import UserService
+from app.utils.pagination import paginate, page_response
 
 
 async def check_company_owner(company: Company, user_id: str):
@@ -27,15 +29,18 @@ class CompanyService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.user_service = UserService(self.session)
+        self.permission_service = PermissionService(self.session)
 
-    async def get_all(self, page: int = 1, items_per_page: int = 10) -> List[CompanyBase]:
+    async def get_all(self, page: int = 1, items_per_page: int = 10, cursor: str = None) -> Dict[str, Any]:
         try:
-            offset = (page - 1) * items_per_page
-            query = (select(self.model).filter(self.model.company_is_visible == True).
-                     offset(offset).limit(items_per_page))
+            sort_key = [self.model.company_created_at, self.model.company_id]
+            query = paginate(select(self.model).filter(self.model.company_is_visible == True), sort_key, cursor, page,
+                             items_per_page)
             result = await self.session.execute(query)
             logging.info("Getting company list processed successfully")
-            return [CompanyBase(**user.__dict__) for user in result.scalars().all()]
+            return page_response(result.scalars().all(), items_per_page,
+                                 lambda company: (company.company_created_at, company.company_id),
+                                 lambda company: CompanyBase(**company.__dict__))
 
         except Exception as e:
             logging.error(f"Error retrieving company list: {e}")
@@ -76,7 +81,7 @@ class CompanyService:
             company_member = CompanyMembers(company_id=new_company.company_id, user_id=user_id, is_admin=True)
             self.session.add(company_member)
             await self.session.commit()
-            logging.info(f"Company created: {new_company}")
+            logging.info("Company created with ID %s", new_company.company_id)
             logging.info("Creating company processed successfully")
             return new_company
 
@@ -88,14 +93,17 @@ class CompanyService:
         try:
             company = await self.get_by_id(company_id, user_id)
             await check_company_owner(company, user_id)
-            logging.info(company_data)
+            logging.debug("Updating fields %s for company with ID %s", sorted(company_data.model_fields_set),
+                          company_id)
             company_dict = company_data.model_dump(exclude_none=True)
             query_company = (update(self.model).where(self.model.company_id == company_id)
-                             .values(company_dict).returning(self.model.company_id))
-            await self.session.execute(query_company)
+                             .values(company_dict).returning(self.model)
+                             .execution_options(synchronize_session="fetch"))
+            result = await self.session.scalars(query_company)
+            company = result.one()
             await self.session.commit()
-            logging.info(f"Company update successful for company ID: {company_id}")
-            return await self.get_by_id(company_id, user_id)
+            logging.info("Company update successful for company ID: %s", company_id)
+            return company
 
         except Exception as e:
             logging.error(f"Error during user update for company ID: {company_id}: {e}")
@@ -110,8 +118,12 @@ class CompanyService:
                 logging.error("You are not the owner of this company")
                 raise NotOwner()
 
+            member_ids = await self.session.scalars(select(CompanyMembers.user_id)
+                                                    .filter(CompanyMembers.company_id == company_id))
+            member_ids = member_ids.all()
             await self.session.delete(company)
             await self.session.commit()
+            await self.permission_service.invalidate(company_id, *member_ids)
             logging.info("Deleting user processed successfully")
             return company
 
@@ -119,28 +131,22 @@ class CompanyService:
             logging.error(f"Error deleting user with ID {company_id}: {e}")
             raise ErrorDeletingCompany(e)
 
-    async def get_company_members(self, company_id: str, page: int = 1, items_per_page: int = 10) \
-            -> List[CompanyMemberResponse]:
+    async def get_company_members(self, company_id: str, page: int = 1, items_per_page: int = 10,
+                                  cursor: str = None) -> Dict[str, Any]:
         try:
-            offset = (page - 1) * items_per_page
-            query = await self.session.execute(
+            query = await self.session.execute(paginate(
                 select(CompanyMembers.user_id, User.user_email, User.user_firstname, User.user_lastname)
                 .join(User, CompanyMembers.user_id == User.user_id)
-                .filter(CompanyMembers.company_id == company_id)
-                .offset(offset).limit(items_per_page)
-            )
+                .filter(CompanyMembers.company_id == company_id),
+                [CompanyMembers.user_id], cursor, page, items_per_page
+            ))
             logging.info("Getting member list processed successfully")
-            rows = query.all()
-            members_with_user_data = [
-                CompanyMemberResponse(
-                    user_id=row[0],
-                    user_email=row[1],
-                    user_firstname=row[2],
-                    user_lastname=row[3]
-                )
-                for row in rows
-            ]
-            return members_with_user_data
+            return page_response(query.all(), items_per_page, lambda row: (row[0],), lambda row: CompanyMemberResponse(
+                user_id=row[0],
+                user_email=row[1],
+                user_firstname=row[2],
+                user_lastname=row[3]
+            ))
 
         except Exception as e:
             logging.error(f"Error retrieving member list: {e}")
@@ -174,6 +180,7 @@ class CompanyService:
 
             await self.session.delete(member)
             await self.session.commit()
+            await self.permission_service.invalidate(company_id, member_id)
             return "User has been successfully removed from your company"
 
         except Exception as e:
@@ -196,34 +203,28 @@ class CompanyService:
 
             await self.session.delete(member)
             await self.session.commit()
+            await self.permission_service.invalidate(company_id, user_id)
             return f"You have left the company with ID {company_id}"
 
         except Exception as e:
             logging.error(f"Error leaving company with ID {company_id}: {e}")
             raise ErrorLeavingCompany(company_id, e)
 
-    async def get_admins(self, company_id: str, page: int = 1, admin_per_page: int = 10) -> List[Dict]:
+    async def get_admins(self, company_id: str, page: int = 1, admin_per_page: int = 10, cursor: str = None) \
+            -> Dict[str, Any]:
         try:
-            offset = (page - 1) * admin_per_page
-            query = (
+            query = paginate(
                 select(CompanyMembers, User)
                 .join(User, CompanyMembers.user_id == User.user_id)
                 .filter(
                     (CompanyMembers.company_id == company_id) &
                     (CompanyMembers.is_admin == True)
-                )
-                .offset(offset)
-                .limit(admin_per_page)
+                ),
+                [CompanyMembers.user_id], cursor, page, admin_per_page
             )
             result = await self.session.execute(query)
-            admins_with_user_data = []
-
-            for record in result:
-                company_member, user = record
-                admin_data = {**user.__dict__}
-                admins_with_user_data.append(admin_data)
-
-            return admins_with_user_data
+            return page_response(result.all(), admin_per_page, lambda record: (record[0].user_id,),
+                                 lambda record: {**record[1].__dict__})
 
         except Exception as e:
             logging.error(f"Error retrieving admins for company {company_id}: {e}")
@@ -238,9 +239,16 @@ class CompanyService:
                 logging.error("Error change admin role for owner")
                 raise ErrorChangeOwnerAdminRole
 
-            member = await self.get_user_companies(admin_data.user_id)
+            result = await self.session.scalars(select(CompanyMembers).filter(
+                CompanyMembers.company_id == admin_data.company_id, CompanyMembers.user_id == admin_data.user_id))
+            member = result.first()
+
+            if not member:
+                raise NotMember
+
             member.is_admin = admin_data.is_admin
             await self.session.commit()
+            await self.permission_service.invalidate(admin_data.company_id, admin_data.user_id)
             action = "set" if admin_data.is_admin else "removed from"
             return (f"User with ID {admin_data.user_id} has been {action}"
                     f"admin status for the company with ID {admin_data.company_id}")
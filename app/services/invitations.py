@@ -1,5 +1,5 @@
 import logging
-from typing import List, Sequence
+from typing import Any, Dict, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,14 +10,22 @@ from app.depends.exceptions import InviteToOwnCompany, ErrorRetrievingUser, Alre
     ErrorRetrievingMembershipCompany, ErrorRetrievingInvitation
 from app.schemas.company import CompanyInvitationCreate
 from app.services.companies import CompanyService
+from app.services.permissions import PermissionService
+from app.utils.pagination import paginate, page_response
 
 
 class InvitationService:
     model = CompanyInvitations
+    sort_key = [CompanyInvitations.invitation_created_at, CompanyInvitations.invitation_id]
 
     def __init__(self, session: AsyncSession):
         self.session = session
         self.company_service = CompanyService(self.session)
+        self.permission_service = PermissionService(self.session)
+
+    @staticmethod
+    def cursor_values(invitation: CompanyInvitations) -> Tuple:
+        return invitation.invitation_created_at, invitation.invitation_id
 
     async def create(self, user_id: str, invitation_data: CompanyInvitationCreate) -> str:
         try:
@@ -51,7 +59,7 @@ class InvitationService:
             new_invitation = self.model(**invitation_data.model_dump())
             self.session.add(new_invitation)
             await self.session.commit()
-            logging.info(f"Invitation created: {new_invitation}")
+            logging.info("Invitation created with ID %s", new_invitation.invitation_id)
             logging.info("Creating invitation processed successfully")
             return (f"The invitation for the user with ID {invitation_data.recipient_id} "
                     f"to the company with ID {invitation_data.company_id} was successfully created")
@@ -78,6 +86,7 @@ class InvitationService:
                 new_member = CompanyMembers(company_id=invitation.company_id, user_id=invitation.recipient_id)
                 self.session.add(new_member)
                 await self.session.commit()
+                await self.permission_service.invalidate(invitation.company_id, invitation.recipient_id)
                 return f"Invitation with ID {invitation_id} has been accepted"
 
             elif action == "reject":
@@ -93,8 +102,8 @@ class InvitationService:
             logging.error(f"Error during handle the invitation for company: {e}")
             raise ErrorHandleInvitation(e)
 
-    async def invited_users(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10) \
-            -> List[CompanyInvitations]:
+    async def invited_users(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10,
+                            cursor: str = None) -> Dict[str, Any]:
         try:
             company = await self.company_service.get_by_id(company_id, user_id)
 
@@ -102,59 +111,52 @@ class InvitationService:
                 logging.error("You are not the owner of this company")
                 raise NotOwner
 
-            offset = (page - 1) * items_per_page
-            result = await self.session.scalars(select(self.model).filter(
+            result = await self.session.scalars(paginate(select(self.model).filter(
                 (self.model.company_id == company_id) &
                 (self.model.sender_id == user_id)
-            ).offset(offset).limit(items_per_page))
-            invitations = result.all()
-
-            return invitations
+            ), self.sort_key, cursor, page, items_per_page))
+            return page_response(result.all(), items_per_page, self.cursor_values)
 
         except Exception as e:
             logging.error(f"Error getting invited users for company with ID {company_id}: {e}")
             raise ErrorRetrievingInvited(e)
 
-    async def membership_requests(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10) \
-            -> Sequence[CompanyInvitations]:
+    async def membership_requests(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10,
+                                  cursor: str = None) -> Dict[str, Any]:
         try:
             company = await self.company_service.get_by_id(company_id, user_id)
 
             if company.owner_id != user_id:
                 raise NotOwner
 
-            offset = (page - 1) * items_per_page
-            result = await self.session.scalars(select(self.model).filter(
+            result = await self.session.scalars(paginate(select(self.model).filter(
                 (self.model.company_id == company_id) &
                 (self.model.recipient_id == user_id) &
-                (self.model.sender_id != user_id)).offset(offset).limit(items_per_page))
-            membership_requests = result.all()
-            return membership_requests
+                (self.model.sender_id != user_id)), self.sort_key, cursor, page, items_per_page))
+            return page_response(result.all(), items_per_page, self.cursor_values)
 
         except Exception as e:
             logging.error(f"Error getting membership requests for company with ID {company_id}: {e}")
             raise ErrorRetrievingMembershipCompany(e)
 
-    async def user_requests(self, user_id: str, page: int = 1, items_per_page: int = 10) \
-            -> Sequence[CompanyInvitations]:
+    async def user_requests(self, user_id: str, page: int = 1, items_per_page: int = 10, cursor: str = None) \
+            -> Dict[str, Any]:
         try:
-            offset = (page - 1) * items_per_page
-            result = await self.session.scalars(select(self.model).filter(
+            result = await self.session.scalars(paginate(select(self.model).filter(
                 (self.model.recipient_id == user_id) &
-                (self.model.sender_id != user_id)).offset(offset).limit(items_per_page))
-            return result.all()
+                (self.model.sender_id != user_id)), self.sort_key, cursor, page, items_per_page))
+            return page_response(result.all(), items_per_page, self.cursor_values)
 
         except Exception as e:
             logging.error(f"Error getting membership requests for user with ID {user_id}: {e}")
             raise ErrorRetrievingMembershipUser(e)
 
-    async def user_invitations(self, user_id: str, page: int = 1, items_per_page: int = 10) \
-            -> Sequence[CompanyInvitations]:
+    async def user_invitations(self, user_id: str, page: int = 1, items_per_page: int = 10, cursor: str = None) \
+            -> Dict[str, Any]:
         try:
-            offset = (page - 1) * items_per_page
-            result = await self.session.scalars(select(self.model).filter(
-                (self.model.sender_id == user_id)).offset(offset).limit(items_per_page))
-            return result.all()
+            result = await self.session.scalars(paginate(select(self.model).filter(
+                (self.model.sender_id == user_id)), self.sort_key, cursor, page, items_per_page))
+            return page_response(result.all(), items_per_page, self.cursor_values)
 
         except Exception as e:
             logging.error(f"Error getting invitations for user with ID {user_id}: {e}")
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+import anyio
+from redis.asyncio.client import PubSub
+from app.core.config import Settings
+from app.db.db import get_redis
+
+
+def notification_channel(user_id: str) -> str:
+    return f"notifications:{user_id}"
+
+
+async def publish_notifications(notifications: Iterable[Dict]):
+    try:
+        async with (await get_redis()).pipeline(transaction=False) as pipe:
+            for notification in notifications:
+                pipe.publish(notification_channel(notification["user_id"]), json.dumps(notification))
+
+            await pipe.execute()
+
+    except Exception as e:
+        logging.warning(f"Error publishing notifications, streams will miss them until the next inbox read: {e}")
+
+
+class NotificationBroker:
+    def __init__(self):
+        self.queues: Dict[str, Set[asyncio.Queue]] = {}
+        self.pubsub: Optional[PubSub] = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    async def subscribe(self, user_id: str) -> asyncio.Queue:
+        channel = notification_channel(user_id)
+        queue = asyncio.Queue(maxsize=Settings.NOTIFICATION_STREAM_QUEUE_SIZE)
+
+        async with self.lock:
+            if channel not in self.queues:
+                if self.pubsub is None:
+                    self.pubsub = (await get_redis()).pubsub(ignore_subscribe_messages=True)
+
+                # one redis subscription per locally connected user, however many tabs they have open
+                await self.pubsub.subscribe(channel)
+                self.queues[channel] = set()
+
+                if self.reader is None or self.reader.done():
+                    self.reader = asyncio.create_task(self.read())
+
+            self.queues[channel].add(queue)
+
+        return queue
+
+    async def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        channel = notification_channel(user_id)
+
+        async with self.lock:
+            queues = self.queues.get(channel)
+
+            if queues is None:
+                return
+
+            queues.discard(queue)
+
+            if queues:
+                return
+
+            del self.queues[channel]
+
+            try:
+                await self.pubsub.unsubscribe(channel)
+
+            except Exception as e:
+                logging.error(f"Error unsubscribing from {channel}: {e}")
+
+    def dispatch(self, message: Dict):
+        channel = message["channel"]
+        channel = channel.decode() if isinstance(channel, bytes) else channel
+        data = message["data"]
+        data = data.decode() if isinstance(data, bytes) else data
+
+        for queue in self.queues.get(channel, ()):
+            try:
+                queue.put_nowait(data)
+
+            except asyncio.QueueFull:
+                logging.warning(f"Dropping notification for slow stream on {channel}")
+
+    async def read(self):
+        while True:
+            try:
+                # a blocking read would fall back to the pool's socket timeout and drop the connection on every
+                # quiet spell, a bounded poll returns None instead and lets the health check ping keep it alive
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True,
+                                                        timeout=Settings.NOTIFICATION_STREAM_POLL_INTERVAL)
+
+                if message is not None and message["type"] == "message":
+                    self.dispatch(message)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                # the pubsub reconnects and resubscribes its channels on the next read
+                logging.error(f"Error reading notification stream: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+
+            try:
+                await self.reader
+
+            except asyncio.CancelledError:
+                pass
+
+        if self.pubsub is not None:
+            await self.pubsub.close()
+
+        self.queues.clear()
+        self.pubsub = None
+        self.reader = None
+
+
+notification_broker = NotificationBroker()
+
+
+async def notification_events(user_id: str) -> AsyncIterator[str]:
+    queue = await notification_broker.subscribe(str(user_id))
+
+    try:
+        yield "retry: 5000\n\n"
+
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=Settings.NOTIFICATION_STREAM_KEEPALIVE)
+                yield f"event: notification\ndata: {data}\n\n"
+
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+    finally:
+        # the stream is cancelled when the client disconnects, the cleanup still has to reach redis
+        with anyio.CancelScope(shield=True):
+            await notification_broker.unsubscribe(str(user_id), queue)
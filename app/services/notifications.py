@@ -1,53 +1,124 @@
 import logging
-from typing import List, Sequence
-
-from sqlalchemy import insert, select
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+from sqlalchemy import insert, select, update, func, literal, String, DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.models import Notification
+from app.core.config import Settings
+from app.db.db import async_session
+from app.db.models import Notification, NotificationCounter, CompanyMembers
 from app.depends.exceptions import NoPermission, ErrorCreatingNotification, NotificationNotFound, \
-    ErrorGetUserNotifications, ErrorHandleUserNotification
+    ErrorGetUserNotifications, ErrorHandleUserNotification, ErrorHandleUserNotifications, InvalidNotificationBulkHandle
+from app.schemas.quiz import NotificationBulkHandle
+from app.services.notification_stream import publish_notifications
+from app.utils.pagination import paginate, page_response
+
+NOTIFICATION_FANOUT_COLUMNS = ["notification_id", "user_id", "company_id", "notification_text",
+                               "notification_created_at"]
+
+
+async def notify_quiz_created(company_id: str, quiz_name: str):
+    try:
+        async with async_session() as session:
+            await NotificationService(session).create_quiz_notifications(company_id, quiz_name)
+
+    except Exception as e:
+        logging.error(f"Error fanning out notifications for quiz {quiz_name} in company with ID {company_id}: {e}")
 
 
 class NotificationService:
     model = Notification
+    sort_key = [Notification.notification_created_at, Notification.notification_id]
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create_quiz_notification(self, user_ids: List[str], company_id: str, quiz_name: str) -> List:
+    async def create_quiz_notifications(self, company_id: str, quiz_name: str) -> int:
         try:
-            notifications = [{
-                "user_id": user,
-                "company_id": company_id,
-                "notification_text": f"New quiz in company with ID {company_id} with name {quiz_name} is available!"
-            } for user in user_ids]
-
-            await self.session.execute(insert(Notification).values(notifications))
-            await self.session.commit()
-            return notifications
+            notification_text = f"New quiz in company with ID {company_id} with name {quiz_name} is available!"
+            created_at = datetime.utcnow()
+            created = 0
+            last_user_id = None
+
+            while True:
+                members = (
+                    select(func.gen_random_uuid(), CompanyMembers.user_id, CompanyMembers.company_id,
+                           literal(notification_text, String), literal(created_at, DateTime))
+                    .filter(CompanyMembers.company_id == company_id)
+                    .order_by(CompanyMembers.user_id)
+                    .limit(Settings.NOTIFICATION_FANOUT_CHUNK_SIZE)
+                )
+
+                if last_user_id is not None:
+                    members = members.filter(CompanyMembers.user_id > last_user_id)
+
+                # each chunk is one statement, member ids never leave the database
+                inserted = (insert(self.model)
+                            .from_select(NOTIFICATION_FANOUT_COLUMNS, members, include_defaults=False)
+                            .returning(self.model.notification_id, self.model.user_id)
+                            .cte("inserted"))
+                counters = pg_insert(NotificationCounter).from_select(
+                    ["user_id", "unread_count"],
+                    select(inserted.c.user_id, func.count()).group_by(inserted.c.user_id))
+                counters = counters.on_conflict_do_update(
+                    index_elements=[NotificationCounter.user_id],
+                    set_={"unread_count": NotificationCounter.unread_count + counters.excluded.unread_count},
+                ).cte("counters")
+                result = await self.session.execute(
+                    select(inserted.c.notification_id, inserted.c.user_id).add_cte(counters))
+                inserted_rows = result.all()
+                await self.session.commit()
+                created += len(inserted_rows)
+                await publish_notifications({
+                    "notification_id": str(notification_id),
+                    "user_id": str(user_id),
+                    "company_id": str(company_id),
+                    "notification_text": notification_text,
+                    "notification_created_at": created_at.isoformat(),
+                } for notification_id, user_id in inserted_rows)
+
+                if len(inserted_rows) < Settings.NOTIFICATION_FANOUT_CHUNK_SIZE:
+                    break
+
+                last_user_id = max(user_id for _, user_id in inserted_rows)
+
+            logging.info("Created %s quiz notifications for company with ID %s", created, company_id)
+            return created
 
         except Exception as e:
             logging.error(f"Error creating quiz notifications: {e}")
             raise ErrorCreatingNotification(e)
 
-    async def get_user_notifications(self, user_id: str) -> Sequence[Notification]:
-        try:
-            result = await self.session.scalars(select(self.model).where(self.model.user_id == user_id))
-            notifications = result.all()
+    @staticmethod
+    def cursor_values(notification: Notification) -> Tuple:
+        return notification.notification_created_at, notification.notification_id
 
-            if not notifications:
-                raise NotificationNotFound
+    async def get_user_notifications(self, user_id: str, unread_only: bool = False, page: int = 1,
+                                     items_per_page: int = 10, cursor: str = None) -> Dict[str, Any]:
+        try:
+            query = select(self.model).filter(self.model.user_id == user_id)
 
-            for notification in notifications:
-                if user_id != notification.user_id:
-                    raise NoPermission
+            if unread_only:
+                query = query.filter(self.model.notification_status.is_(None))
 
-            return notifications
+            notifications = await self.session.scalars(paginate(query, self.sort_key, cursor, page, items_per_page,
+                                                                descending=True))
+            return page_response(notifications.all(), items_per_page, self.cursor_values)
 
         except Exception as e:
             logging.error(f"Error getting user notifications: {e}")
             raise ErrorGetUserNotifications(e)
 
+    async def get_unread_count(self, user_id: str) -> Dict[str, int]:
+        try:
+            unread_count = await self.session.scalar(select(NotificationCounter.unread_count)
+                                                     .filter(NotificationCounter.user_id == user_id))
+            return {"unread_count": unread_count or 0}
+
+        except Exception as e:
+            logging.error(f"Error getting unread notification count: {e}")
+            raise ErrorGetUserNotifications(e)
+
     async def handle_notifications(self, notification_id: str, action: bool, user_id: str) -> str:
         try:
             result = await self.session.scalars(select(self.model).where(self.model.notification_id == notification_id))
@@ -59,10 +130,83 @@ class NotificationService:
             if notification.user_id != user_id:
                 raise NoPermission
 
-            notification.notification_status = action
+            # only the request that flips the status away from unread may decrement the counter
+            marked_read = await self.session.scalar(
+                update(self.model)
+                .where(self.model.notification_id == notification_id, self.model.notification_status.is_(None))
+                .values(notification_status=action)
+                .returning(self.model.notification_id))
+
+            if marked_read is None:
+                notification.notification_status = action
+
+            else:
+                await self.session.execute(
+                    update(NotificationCounter)
+                    .where(NotificationCounter.user_id == user_id)
+                    .values(unread_count=func.greatest(NotificationCounter.unread_count - 1, 0)))
+
             await self.session.commit()
             return f"Notification with ID {notification_id} successfully read."
 
         except Exception as e:
             logging.error(f"Error getting user notification with ID {notification_id}: {e}")
             raise ErrorHandleUserNotification(notification_id, e)
+
+    async def handle_notifications_bulk(self, user_id: str, handle_data: NotificationBulkHandle) -> Dict[str, Any]:
+        try:
+            if (handle_data.notification_ids is None) == (handle_data.before is None):
+                raise InvalidNotificationBulkHandle("pass either notification_ids or before.")
+
+            if handle_data.notification_ids is not None:
+                if len(handle_data.notification_ids) > Settings.NOTIFICATION_BULK_MAX_IDS:
+                    raise InvalidNotificationBulkHandle(
+                        f"at most {Settings.NOTIFICATION_BULK_MAX_IDS} notification ids per request.")
+
+                selected = self.model.notification_id.in_(handle_data.notification_ids)
+
+            else:
+                before = handle_data.before
+
+                if before.tzinfo is not None:
+                    before = before.astimezone(timezone.utc).replace(tzinfo=None)
+
+                selected = self.model.notification_created_at <= before
+
+            # the locked sub-select keeps each row's status from before the update for the counter adjustment
+            targets = (
+                select(self.model.notification_id, self.model.notification_status.label("previous_status"))
+                .filter(self.model.user_id == user_id, selected,
+                        self.model.notification_status.is_distinct_from(handle_data.action))
+                .with_for_update()
+                .subquery()
+            )
+            updated = (
+                update(self.model)
+                .where(self.model.user_id == user_id, self.model.notification_id == targets.c.notification_id)
+                .values(notification_status=handle_data.action)
+                .returning(self.model.notification_id, targets.c.previous_status)
+                .cte("updated")
+            )
+            marked_read = select(func.count()).select_from(updated).filter(updated.c.previous_status.is_(None))
+            counter = (
+                update(NotificationCounter)
+                .where(NotificationCounter.user_id == user_id)
+                .values(unread_count=func.greatest(NotificationCounter.unread_count - marked_read.scalar_subquery(), 0))
+                .returning(NotificationCounter.unread_count)
+                .cte("counter")
+            )
+            result = await self.session.execute(select(
+                select(func.array_agg(updated.c.notification_id)).scalar_subquery(),
+                select(counter.c.unread_count).scalar_subquery(),
+            ))
+            notification_ids, unread_count = result.one()
+            await self.session.commit()
+            notification_ids = notification_ids or []
+            logging.info("Handled %s notifications for user with ID %s", len(notification_ids), user_id)
+            return {"updated": len(notification_ids), "notification_ids": notification_ids,
+                    "unread_count": unread_count or 0}
+
+        except Exception as e:
+            logging.error(f"Error handling notifications in bulk for user with ID {user_id}: {e}")
+            raise ErrorHandleUserNotifications(e)
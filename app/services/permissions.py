@@ -0,0 +1,121 @@
+import logging
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import Settings
+from app.db.db import get_redis
+from app.db.models import CompanyMembers
+from app.depends.exceptions import NotOwnerOrAdmin, NotMember
+
+ROLE_ADMIN = "admin"
+ROLE_MEMBER = "member"
+ROLE_NONE = "none"
+ROLES_SESSION_KEY = "company_roles"
+
+
+def role_redis_key(company_id: str, user_id: str) -> str:
+    return f"company_role:{company_id}:{user_id}"
+
+
+def role_generation_redis_key(company_id: str) -> str:
+    return f"company_role_generation:{company_id}"
+
+
+class PermissionService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        # get_db hands out one session per request, so its info dict doubles as the request-scoped memo
+        self.roles: Dict[Tuple[str, str], str] = session.info.setdefault(ROLES_SESSION_KEY, {})
+
+    async def get_role(self, user_id: str, company_id: str) -> str:
+        if company_id is None:
+            return ROLE_NONE
+
+        key = (str(company_id), str(user_id))
+
+        if key not in self.roles:
+            role, generation = await self.get_cached_role(*key)
+
+            if role is None:
+                role = await self.load_role(*key)
+
+                # a non-member is not cached, so an accepted invitation is never locked out by a stale entry
+                if generation is not None and role != ROLE_NONE:
+                    await self.cache_role(*key, generation, role)
+
+            self.roles[key] = role
+
+        return self.roles[key]
+
+    async def load_role(self, company_id: str, user_id: str) -> str:
+        is_admin = await self.session.scalar(select(CompanyMembers.is_admin).filter(
+            CompanyMembers.user_id == user_id, CompanyMembers.company_id == company_id))
+
+        if is_admin is None:
+            return ROLE_NONE
+
+        return ROLE_ADMIN if is_admin else ROLE_MEMBER
+
+    async def get_cached_role(self, company_id: str, user_id: str) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            cached, generation = await (await get_redis()).mget(role_redis_key(company_id, user_id),
+                                                                role_generation_redis_key(company_id))
+
+        except Exception as e:
+            logging.warning(f"Error reading cached role, falling back to the database: {e}")
+            return None, None
+
+        # the generation is read before the database, so a role loaded before a membership change is stored
+        # under the old generation and never served once invalidate has bumped it
+        generation = generation.decode() if generation is not None else "0"
+
+        if cached is not None:
+            cached_generation, _, role = cached.decode().partition(":")
+
+            if cached_generation == generation:
+                return role, generation
+
+        return None, generation
+
+    async def cache_role(self, company_id: str, user_id: str, generation: str, role: str):
+        try:
+            await (await get_redis()).setex(role_redis_key(company_id, user_id), Settings.ROLE_CACHE_TTL,
+                                            f"{generation}:{role}")
+
+        except Exception as e:
+            logging.warning(f"Error caching role: {e}")
+
+    async def invalidate(self, company_id: str, *user_ids: str):
+        keys = [(str(company_id), str(user_id)) for user_id in user_ids]
+
+        for key in keys:
+            self.roles.pop(key, None)
+
+        if not keys:
+            return
+
+        try:
+            async with (await get_redis()).pipeline(transaction=True) as pipe:
+                pipe.incr(role_generation_redis_key(str(company_id)))
+                pipe.delete(*[role_redis_key(*key) for key in keys])
+                await pipe.execute()
+
+        except Exception as e:
+            logging.error(f"Error invalidating cached roles for company with ID {company_id}: {e}")
+
+    async def is_owner_or_admin(self, user_id: str, company_id: str) -> bool:
+        return await self.get_role(user_id, company_id) == ROLE_ADMIN
+
+    async def check_owner_or_admin(self, user_id: str, company_id: str) -> bool:
+        if not await self.is_owner_or_admin(user_id, company_id):
+            logging.error("You are not the owner or admin of this company")
+            raise NotOwnerOrAdmin
+
+        return True
+
+    async def check_member(self, user_id: str, company_id: str) -> bool:
+        if await self.get_role(user_id, company_id) == ROLE_NONE:
+            logging.error("You are not member of this company")
+            raise NotMember
+
+        return True
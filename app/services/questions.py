@@ -1,24 +1,21 @@
 import logging
-from typing import List, Union, Tuple, Dict
-from sqlalchemy import select, update
+from typing import Any, List, Union, Tuple, Dict
+from fastapi import UploadFile
+from pydantic import ValidationError
+from sqlalchemy import select, update, insert, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.models import Question, Company, CompanyMembers, Quiz
-from app.depends.exceptions import NotOwnerOrAdmin, AlreadyExistsQuestion, ErrorCreatingQuestion, ErrorRetrievingList, \
-    ErrorUpdatingQuestion, ErrorRetrievingQuestion, QuestionNotFound, ErrorDeletingQuestion, LessThen2Answers, NotMember
-from app.schemas.quiz import QuestionBase, QuestionUpdate
+from app.core.config import Settings
+from app.db.models import Question, Quiz
+from app.depends.exceptions import AlreadyExistsQuestion, ErrorCreatingQuestion, ErrorRetrievingList, \
+    ErrorUpdatingQuestion, ErrorRetrievingQuestion, QuestionNotFound, ErrorDeletingQuestion, LessThen2Answers, \
+    QuizNotFound, InvalidQuestionImport, ErrorImportingQuestions
+from app.schemas.quiz import QuestionBase, QuestionUpdate, QuestionImportItem
 from app.services.companies import CompanyService
-
-
-async def check_company_owner_or_admin(session: AsyncSession, user_id: str, company_id: str):
-    result = await session.scalars(select(CompanyMembers).filter(
-        CompanyMembers.user_id == user_id, CompanyMembers.company_id == company_id,
-        CompanyMembers.is_admin == True))
-
-    if not result:
-        logging.error("You are not the owner or admin of this company")
-        raise NotOwnerOrAdmin
-
-    return True
+from app.services.permissions import PermissionService
+from app.services.quiz_content import get_quiz_content
+from app.services.quiz_versions import bump_quiz_versions
+from app.utils.imports import read_import_file
+from app.utils.pagination import paginate, page_response
 
 
 class QuestionService:
@@ -27,16 +24,20 @@ class QuestionService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.company_service = CompanyService(self.session)
+        self.permission_service = PermissionService(self.session)
 
-    async def get_all(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10) \
-            -> List[QuestionBase]:
+    async def get_all(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10,
+                      cursor: str = None) -> Dict[str, Any]:
         try:
-            await check_company_owner_or_admin(self.session, company_id, user_id)
-            offset = (page - 1) * items_per_page
-            questions = await self.session.scalars(select(self.model).filter(Company.company_id == company_id)
-                                                   .offset(offset).limit(items_per_page))
+            await self.permission_service.check_owner_or_admin(user_id, company_id)
+            sort_key = [self.model.question_created_at, self.model.question_id]
+            questions = await self.session.scalars(paginate(
+                select(self.model).filter(self.model.question_company_id == company_id),
+                sort_key, cursor, page, items_per_page))
             logging.info("Getting question list processed successfully")
-            return [QuestionBase(**question.__dict__) for question in questions.all()]
+            return page_response(questions.all(), items_per_page,
+                                 lambda question: (question.question_created_at, question.question_id),
+                                 lambda question: QuestionBase(**question.__dict__))
 
         except Exception as e:
             logging.error(f"Error retrieving question list: {e}")
@@ -51,7 +52,7 @@ class QuestionService:
                 logging.error(f"Quiz with ID {question_id} not found")
                 raise QuestionNotFound(question_id)
 
-            await check_company_owner_or_admin(self.session, question.question_company_id, user_id)
+            await self.permission_service.check_owner_or_admin(user_id, question.question_company_id)
             logging.info("Getting quiz processed successfully")
             return question
 
@@ -63,7 +64,7 @@ class QuestionService:
         try:
             quiz_company_id = await self.session.scalar(select(Quiz.company_id)
                                                         .filter(Quiz.quiz_id == question_data.quiz_id))
-            await check_company_owner_or_admin(self.session, quiz_company_id, user_id)
+            await self.permission_service.check_owner_or_admin(user_id, quiz_company_id)
             exist_question = await self.session.scalars(select(self.model).filter(
                 self.model.question_text == question_data.question_text))
 
@@ -79,13 +80,14 @@ class QuestionService:
             question_data.question_company_id = quiz_company_id
             new_question = self.model(**question_data.model_dump())
             self.session.add(new_question)
+            await bump_quiz_versions(self.session, question_data.quiz_id)
             await self.session.commit()
-            logging.info(f"Question created: {new_question}")
+            logging.info("Question created with ID %s", new_question.question_id)
             logging.info("Creating question processed successfully")
             quiz_question_count = await self.session.scalar(
-                select(Question).filter(Question.quiz_id == question_data.quiz_id).count())
+                select(func.count()).select_from(Question).filter(Question.quiz_id == question_data.quiz_id))
 
-            if quiz_question_count == 0:
+            if quiz_question_count < 2:
                 comment = "Do not forget to add a second question, the quiz must have at least 2 questions"
                 logging.warning(comment)
                 return new_question, comment
@@ -96,20 +98,92 @@ class QuestionService:
             logging.error(f"Error creating question: {e}")
             raise ErrorCreatingQuestion(e)
 
+    async def import_questions(self, quiz_id: str, user_id: str, items: List[Any]) -> Dict[str, Any]:
+        try:
+            if len(items) > Settings.QUESTION_IMPORT_MAX_ITEMS:
+                raise InvalidQuestionImport(f"at most {Settings.QUESTION_IMPORT_MAX_ITEMS} questions per import.")
+
+            quiz_company_id = await self.session.scalar(select(Quiz.company_id).filter(Quiz.quiz_id == quiz_id))
+
+            if quiz_company_id is None:
+                raise QuizNotFound(quiz_id)
+
+            await self.permission_service.check_owner_or_admin(user_id, quiz_company_id)
+            errors = []
+            questions: Dict[str, Tuple[int, QuestionImportItem]] = {}
+
+            for index, item in enumerate(items):
+                try:
+                    if isinstance(item, Exception):
+                        raise item
+
+                    question = QuestionImportItem.model_validate(item)
+
+                    if question.question_text in questions:
+                        raise ValueError(f"Duplicate of question {questions[question.question_text][0]}")
+
+                    questions[question.question_text] = (index, question)
+
+                except ValidationError as e:
+                    errors.append({"index": index, "error": "; ".join(
+                        f"{'.'.join(map(str, error['loc'])) or 'question'}: {error['msg']}" for error in e.errors())})
+
+                except ValueError as e:
+                    errors.append({"index": index, "error": str(e)})
+
+            if questions:
+                existing_texts = await self.session.scalars(select(self.model.question_text)
+                                                            .filter(self.model.question_text.in_(questions)))
+
+                for question_text in existing_texts.all():
+                    index, _ = questions.pop(question_text)
+                    errors.append({"index": index, "error": "Question already exist"})
+
+            question_ids = []
+
+            if questions:
+                rows = [{
+                    **question.model_dump(),
+                    "quiz_id": quiz_id,
+                    "question_company_id": quiz_company_id,
+                    "question_created_by": user_id,
+                } for _, question in sorted(questions.values(), key=lambda item: item[0])]
+                result = await self.session.execute(insert(self.model).values(rows).returning(self.model.question_id))
+                question_ids = result.scalars().all()
+                await bump_quiz_versions(self.session, quiz_id)
+                await self.session.commit()
+
+            logging.info("Imported %s questions into quiz with ID %s, %s rejected", len(question_ids), quiz_id,
+                         len(errors))
+            return {"created": len(question_ids), "question_ids": question_ids,
+                    "errors": sorted(errors, key=lambda error: error["index"])}
+
+        except Exception as e:
+            logging.error(f"Error importing questions into quiz with ID {quiz_id}: {e}")
+            raise ErrorImportingQuestions(e)
+
+    async def import_questions_file(self, quiz_id: str, user_id: str, file: UploadFile) -> Dict[str, Any]:
+        items = await read_import_file(file, Settings.QUESTION_IMPORT_MAX_ITEMS)
+        return await self.import_questions(quiz_id, user_id, items)
+
     async def update(self, question_id: str, question_data: QuestionUpdate, user_id: str) -> Question:
         try:
             result = await (self.session.scalars(
                 select(self.model).filter(self.model.question_id == question_id)))
             question = result.first()
-            await check_company_owner_or_admin(self.session, question.question_company_id, user_id)
+            await self.permission_service.check_owner_or_admin(user_id, question.question_company_id)
             question_data.question_updated_by = user_id
-            logging.info(question_data)
+            logging.debug("Updating fields %s for question with ID %s", sorted(question_data.model_fields_set),
+                          question_id)
             question_dict = question_data.model_dump(exclude_none=True)
-            await self.session.execute(update(self.model).where(self.model.question_id == question_id)
-                                       .values(question_dict).returning(self.model.question_id))
+            result = await self.session.scalars(update(self.model).where(self.model.question_id == question_id)
+                                                .values(question_dict).returning(self.model)
+                                                .execution_options(synchronize_session="fetch"))
+            question = result.one()
+            await bump_quiz_versions(self.session, question.quiz_id)
             await self.session.commit()
-            logging.info(f"Company update successful for question ID: {question_id}")
-            return await self.get_by_id(question_id, user_id)
+            logging.info("Company update successful for question ID: %s", question_id)
+            return question
 
         except Exception as e:
             logging.error(f"Error during user update for question ID: {question_id}: {e}")
@@ -120,8 +194,9 @@ class QuestionService:
             result = await self.session.scalars(
                 select(self.model).filter(self.model.question_id == question_id))
             question = result.first()
-            await check_company_owner_or_admin(self.session, question.question_company_id, user_id)
+            await self.permission_service.check_owner_or_admin(user_id, question.question_company_id)
             await self.session.delete(question)
+            await bump_quiz_versions(self.session, question.quiz_id)
             await self.session.commit()
             logging.info("Deleting quiz processed successfully")
 
@@ -129,34 +204,21 @@ class QuestionService:
             logging.error(f"Error deleting quiz with ID {question_id}: {e}")
             raise ErrorDeletingQuestion(e)
 
-    async def quiz_questions(self, quiz_id: str, user_id: str) -> List[Dict[str, Union[str, List[str]]]]:
+    async def quiz_questions(self, quiz_id: str, user_id: str) -> Dict[str, Any]:
         try:
-            quiz_company_id = await self.session.scalar(select(Quiz.company_id).filter(Quiz.quiz_id == quiz_id))
-            result = await self.session.scalars(select(CompanyMembers)
-                                                .filter(CompanyMembers.user_id == user_id,
-                                                        CompanyMembers.company_id == quiz_company_id))
+            content = await get_quiz_content(self.session, quiz_id)
 
-            if not result.first():
-                logging.error("You are not the member of this company")
-                raise NotMember
+            if content is None:
+                logging.error(f"Quiz with ID {quiz_id} not found")
+                raise QuizNotFound(quiz_id)
 
-            result = await self.session.scalars(select(Question).filter(Question.quiz_id == quiz_id))
-            quiz_questions = result.all()
+            await self.permission_service.check_member(user_id, content["company_id"])
 
-            if not quiz_questions:
+            if not content["question_count"]:
                 logging.error("No questions found for the given quiz ID")
                 raise QuestionNotFound(quiz_id="")
 
-            questions_with_answers = []
-
-            for question in quiz_questions:
-                question_data = {
-                    "question_text": question.question_text,
-                    "question_answers": question.question_answers,
-                }
-                questions_with_answers.append(question_data)
-
-            return questions_with_answers
+            return content
 
         except Exception as e:
             logging.error(f"Error retrieving questions for quiz with ID {quiz_id}: {e}")
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import Settings
+from app.db.db import get_redis
+from app.db.models import Quiz
+from app.services.answer_keys import questions_query
+from app.services.quiz_versions import VersionedCache
+
+
+def quiz_content_redis_key(quiz_id: str) -> str:
+    return f"quiz_content:{quiz_id}"
+
+
+quiz_content_cache = VersionedCache(Settings.QUIZ_CONTENT_CACHE_SIZE, Settings.QUIZ_CONTENT_CACHE_TTL)
+
+
+async def load_quiz_content(session: AsyncSession, quiz_id: str, company_id) -> Dict[str, Any]:
+    result = await session.scalars(questions_query(quiz_id))
+    questions = [{"question_text": question.question_text, "question_answers": question.question_answers}
+                 for question in result.all()]
+    body = json.dumps(questions, ensure_ascii=False).encode()
+    return {
+        "company_id": str(company_id),
+        "question_count": len(questions),
+        "etag": f'"{hashlib.sha256(body).hexdigest()}"',
+        "body": body,
+    }
+
+
+async def get_cached_quiz_content(quiz_id: str, version: int) -> Optional[Dict[str, Any]]:
+    try:
+        payload = await (await get_redis()).get(quiz_content_redis_key(quiz_id))
+
+    except Exception as e:
+        logging.warning(f"Error reading cached content for quiz with ID {quiz_id}: {e}")
+        return None
+
+    if payload is None:
+        return None
+
+    content = json.loads(payload)
+
+    # cached before the questions last changed
+    if content.pop("version") != version:
+        return None
+
+    content["body"] = content["body"].encode()
+    return content
+
+
+async def cache_quiz_content(quiz_id: str, version: int, content: Dict[str, Any]):
+    try:
+        await (await get_redis()).setex(quiz_content_redis_key(quiz_id), Settings.QUIZ_CONTENT_CACHE_TTL,
+                                        json.dumps({**content, "body": content["body"].decode(), "version": version}))
+
+    except Exception as e:
+        logging.warning(f"Error caching content for quiz with ID {quiz_id}: {e}")
+
+
+async def get_quiz_content(session: AsyncSession, quiz_id) -> Optional[Dict[str, Any]]:
+    quiz_id = str(quiz_id)
+    result = await session.execute(select(Quiz.company_id, Quiz.quiz_content_version).filter(Quiz.quiz_id == quiz_id))
+    quiz = result.first()
+
+    if quiz is None:
+        return None
+
+    company_id, version = quiz
+    content = quiz_content_cache.get(quiz_id, version)
+
+    if content is None:
+        content = await get_cached_quiz_content(quiz_id, version)
+
+        if content is None:
+            content = await load_quiz_content(session, quiz_id, company_id)
+            await cache_quiz_content(quiz_id, version, content)
+
+        quiz_content_cache.set(quiz_id, version, content)
+
+    return content
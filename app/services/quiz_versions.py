@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Quiz
+
+
+class VersionedCache:
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[int, float, Any]] = OrderedDict()
+
+    def get(self, quiz_id: str, version: int) -> Optional[Any]:
+        entry = self.entries.get(quiz_id)
+
+        if entry is None:
+            return None
+
+        cached_version, expires_at, value = entry
+
+        if cached_version != version or expires_at <= time.monotonic():
+            del self.entries[quiz_id]
+            return None
+
+        self.entries.move_to_end(quiz_id)
+        return value
+
+    def set(self, quiz_id: str, version: int, value: Any):
+        if self.max_size <= 0:
+            return
+
+        self.entries[quiz_id] = (version, time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(quiz_id)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def discard(self, quiz_id: str):
+        self.entries.pop(quiz_id, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+async def bump_quiz_versions(session: AsyncSession, *quiz_ids):
+    # runs in the caller's transaction, so the new version becomes visible together with the questions it covers
+    # and a failed bump rolls the change back instead of leaving cached answer keys stale
+    quiz_ids = list(dict.fromkeys(str(quiz_id) for quiz_id in quiz_ids if quiz_id is not None))
+
+    if quiz_ids:
+        await session.execute(update(Quiz).where(Quiz.quiz_id.in_(quiz_ids))
+                              .values(quiz_content_version=Quiz.quiz_content_version + 1)
+                              .execution_options(synchronize_session=False))
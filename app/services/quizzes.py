@@ -1,30 +1,91 @@
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import List, Union
-from redis import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Union, Dict, Iterable, Optional
+from fastapi import BackgroundTasks
+from redis.asyncio import Redis
 from sqlalchemy import update, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import Settings
-from app.db.models import Quiz, CompanyMembers, Question, Result
-from app.depends.exceptions import ErrorRetrievingList, AlreadyExistsQuiz, NotOwnerOrAdmin, ErrorCreatingQuiz, \
-    QuizNotFound, ErrorRetrievingQuiz, NotMember, ErrorUpdatingQuiz, ErrorDeletingQuiz, ErrorPassQuiz, EmptyAnswer, \
-    LessThen2Questions, QuizNotAvailable
-from app.schemas.quiz import QuizBase, QuizUpdate, QuizPass
-from app.services.notifications import NotificationService
+from app.db.db import get_redis
+from app.db.models import Quiz, Question, Result
+from app.depends.exceptions import ErrorRetrievingList, AlreadyExistsQuiz, ErrorCreatingQuiz, \
+    QuizNotFound, ErrorRetrievingQuiz, ErrorUpdatingQuiz, ErrorDeletingQuiz, ErrorPassQuiz, EmptyAnswer, \
+    LessThen2Questions, QuizNotAvailable, CustomException, InvalidQuizAttemptBatch, ErrorPassQuizBatch
+from app.schemas.quiz import QuizBase, QuizUpdate, QuizPass, QuizAttempt
+from app.services.answer_keys import AnswerKey, get_answer_key, get_answer_keys, normalize_answer
+from app.services.notifications import notify_quiz_created
+from app.services.permissions import PermissionService
+from app.services.rollups import upsert_result_rollups
+from app.utils.pagination import paginate, page_response
 
 
-async def check_company_owner_or_admin(session: AsyncSession, user_id: str, company_id: str):
-    result = await session.scalars(select(CompanyMembers).filter(
-        CompanyMembers.user_id == user_id, CompanyMembers.company_id == company_id,
-        CompanyMembers.is_admin == True))
-    logging.debug(f"result: {result}")
+ANSWER_TTL = timedelta(hours=48)
 
-    if not result:
-        logging.error("You are not the owner or admin of this company")
-        raise NotOwnerOrAdmin
 
-    return True
+def answer_redis_key(quiz_id: str, user_id: str, question_id: str) -> str:
+    return f"quiz_pass:{quiz_id}:{user_id}:question_{question_id}"
+
+
+async def store_quiz_answers(redis_client: Redis, answers: List[Dict]):
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for answer in answers:
+            redis_key = answer_redis_key(answer["quiz_id"], answer["user_id"], answer["question_id"])
+            pipe.setex(redis_key, ANSWER_TTL, json.dumps(answer))
+
+        await pipe.execute()
+
+
+def grade_answers(answer_key: AnswerKey, user_answers: List[str]) -> List[bool]:
+    return [not correct_set.isdisjoint(normalize_answer(answer) for answer in user_answer.split(','))
+            for (_, _, correct_set), user_answer in zip(answer_key, user_answers)]
+
+
+def answer_feedback(answer_key: AnswerKey, correctness: List[bool]) -> List[str]:
+    feedback = []
+
+    for index, ((_, correct_answers, _), is_correct) in enumerate(zip(answer_key, correctness)):
+        if is_correct:
+            feedback.append(f"Question {index + 1}: Correct!")
+
+        else:
+            correct_answers_str = "; ".join(correct_answers)
+            feedback.append(f"Question {index + 1}: Incorrect. Correct answer(s) is/are '{correct_answers_str}'")
+
+    return feedback
+
+
+def answer_records(quiz: Quiz, user_id: str, answer_key: AnswerKey, user_answers: List[str],
+                   correctness: List[bool]) -> List[Dict]:
+    return [{
+        "user_id": str(user_id),
+        "company_id": str(quiz.company_id),
+        "quiz_id": str(quiz.quiz_id),
+        "question_id": str(question_id),
+        "user_answer": user_answer,
+        "is_correct": is_correct,
+    } for (question_id, _, _), user_answer, is_correct in zip(answer_key, user_answers, correctness)]
+
+
+def check_quiz_available(quiz: Quiz, quiz_start_time: datetime):
+    if quiz.quiz_frequency is not None:
+        logging.debug("Quiz attempt at %s, quiz frequency %s", quiz_start_time, quiz.quiz_frequency,
+                      extra={"sampled": True})
+
+        if quiz_start_time > quiz.quiz_frequency:
+            logging.error("Quiz is not available at the moment")
+            raise QuizNotAvailable
+
+
+def attempt_time(attempted_at: Optional[datetime], received_at: datetime) -> datetime:
+    if attempted_at is None:
+        return received_at
+
+    if attempted_at.tzinfo is not None:
+        attempted_at = attempted_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # offline clocks drift, an attempt can't have happened after it reached us
+    return min(attempted_at, received_at)
 
 
 class QuizService:
@@ -32,22 +93,19 @@ class QuizService:
 
     def __init__(self, session: AsyncSession):
         self.session = session
-        self.notification_service = NotificationService(self.session)
+        self.permission_service = PermissionService(self.session)
+        self.quiz_question_ids: Dict[str, List] = {}
 
-    async def get_all(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10) -> List[QuizBase]:
+    async def get_all(self, company_id: str, user_id: str, page: int = 1, items_per_page: int = 10,
+                      cursor: str = None) -> Dict[str, Any]:
         try:
-            offset = (page - 1) * items_per_page
-            result = await self.session.scalars(select(CompanyMembers)
-                                                .filter(CompanyMembers.user_id == user_id,
-                                                        CompanyMembers.company_id == company_id))
-            if not result.first():
-                logging.error("You are not member of this company")
-                raise NotMember
-
-            quizzes = await self.session.scalars(select(self.model).filter(self.model.company_id == company_id)
-                                                 .offset(offset).limit(items_per_page))
+            await self.permission_service.check_member(user_id, company_id)
+            sort_key = [self.model.quiz_created_at, self.model.quiz_id]
+            quizzes = await self.session.scalars(paginate(
+                select(self.model).filter(self.model.company_id == company_id), sort_key, cursor, page, items_per_page))
             logging.info("Getting quiz list processed successfully")
-            return [QuizBase(**quiz.__dict__) for quiz in quizzes.all()]
+            return page_response(quizzes.all(), items_per_page, lambda quiz: (quiz.quiz_created_at, quiz.quiz_id),
+                                 lambda quiz: QuizBase(**quiz.__dict__))
 
         except Exception as e:
             logging.error(f"Error retrieving quiz list: {e}")
@@ -62,8 +120,7 @@ class QuizService:
                 logging.error(f"Quiz with ID {quiz_id} not found")
                 raise QuizNotFound(quiz_id)
 
-            quiz_company_id = await self.session.scalar(select(Quiz.company_id).filter(Quiz.quiz_id == quiz_id))
-            await check_company_owner_or_admin(self.session, user_id, quiz_company_id)
+            await self.permission_service.check_owner_or_admin(user_id, quiz.company_id)
             logging.info("Getting quiz processed successfully")
             return quiz
 
@@ -71,7 +128,7 @@ class QuizService:
             logging.error(f"Error retrieving quiz with ID {quiz_id}: {e}")
             raise ErrorRetrievingQuiz(e)
 
-    async def create(self, user_id: str, quiz_data: QuizBase) -> Quiz:
+    async def create(self, user_id: str, quiz_data: QuizBase, background_tasks: BackgroundTasks) -> Quiz:
         try:
             result = await (self.session.scalars(select(self.model)
                                                  .filter(self.model.quiz_name == quiz_data.quiz_name)))
@@ -80,21 +137,13 @@ class QuizService:
                 logging.error("Quiz already exist")
                 raise AlreadyExistsQuiz
 
-            quiz_company_id = await self.session.scalar(
-                select(Quiz.company_id).filter(Quiz.quiz_id == quiz_data.quiz_id))
-            await check_company_owner_or_admin(self.session, user_id, quiz_company_id)
-            result = await self.session.scalars(select(CompanyMembers.user_id)
-                                                .filter(CompanyMembers.company_id == quiz_data.company_id))
-            user_ids = [str(result.first())]
-            logging.info(user_ids)
-            await self.notification_service.create_quiz_notification(user_ids, str(quiz_data.company_id),
-                                                                     quiz_data.quiz_name)
-            logging.info("Creating quiz notification processed successfully")
+            await self.permission_service.check_owner_or_admin(user_id, quiz_data.company_id)
             quiz_data.quiz_created_by = user_id
             new_quiz = self.model(**quiz_data.model_dump())
             self.session.add(new_quiz)
             await self.session.commit()
-            logging.info(f"Quiz created: {new_quiz}")
+            background_tasks.add_task(notify_quiz_created, str(quiz_data.company_id), quiz_data.quiz_name)
+            logging.info("Quiz created with ID %s", new_quiz.quiz_id)
             logging.info("Creating quiz processed successfully")
             return new_quiz
 
@@ -105,15 +154,17 @@ class QuizService:
     async def update(self, quiz_id: str, quiz_data: QuizUpdate, user_id: str) -> Quiz:
         try:
             quiz_company_id = await self.session.scalar(select(Quiz.company_id).filter(Quiz.quiz_id == quiz_id))
-            await check_company_owner_or_admin(self.session, user_id, quiz_company_id)
+            await self.permission_service.check_owner_or_admin(user_id, quiz_company_id)
             quiz_data.quiz_updated_by = user_id
-            logging.info(quiz_data)
+            logging.debug("Updating fields %s for quiz with ID %s", sorted(quiz_data.model_fields_set), quiz_id)
             quiz_dict = quiz_data.model_dump(exclude_none=True)
-            await self.session.execute(update(self.model).where(self.model.quiz_id == quiz_id)
-                                       .values(quiz_dict).returning(self.model.quiz_id))
+            result = await self.session.scalars(update(self.model).where(self.model.quiz_id == quiz_id)
+                                                .values(quiz_dict).returning(self.model)
+                                                .execution_options(synchronize_session="fetch"))
+            quiz = result.one()
             await self.session.commit()
-            logging.info(f"Company update successful for quiz ID: {quiz_id}")
-            return await self.get_by_id(quiz_id, user_id)
+            logging.info("Company update successful for quiz ID: %s", quiz_id)
+            return quiz
 
         except Exception as e:
             logging.error(f"Error during user update for quiz ID: {quiz_id}: {e}")
@@ -122,7 +173,7 @@ class QuizService:
     async def delete(self, quiz_id: str, user_id: str):
         try:
             quiz_company_id = await self.session.scalar(select(Quiz.company_id).filter(Quiz.quiz_id == quiz_id))
-            await check_company_owner_or_admin(self.session, user_id, quiz_company_id)
+            await self.permission_service.check_owner_or_admin(user_id, quiz_company_id)
             quiz = await self.get_by_id(quiz_id, user_id)
             await self.session.delete(quiz)
             await self.session.commit()
@@ -134,93 +185,138 @@ class QuizService:
 
     async def quiz_pass(self, quiz_id: str, quiz_data: QuizPass, user_id: str) -> List[Union[str, List[str]]]:
         try:
-            quiz_company_id = await self.session.scalar(select(Quiz.company_id).filter(Quiz.quiz_id == quiz_id))
-            await check_company_owner_or_admin(self.session, user_id, quiz_company_id)
+            result = await self.session.scalars(select(self.model).filter(self.model.quiz_id == quiz_id))
+            quiz = result.first()
+
+            if not quiz:
+                logging.error(f"Quiz with ID {quiz_id} not found")
+                raise QuizNotFound(quiz_id)
+
+            await self.permission_service.check_member(user_id, quiz.company_id)
 
             if not quiz_data.answers:
                 logging.error("Answer is empty")
                 raise EmptyAnswer
 
-            result = await self.session.scalars(select(Question).filter(Question.quiz_id == quiz_id))
-            quiz_questions = result.all()
+            answer_key = await get_answer_key(self.session, quiz)
 
-            if len(quiz_questions) < 2:
+            if len(answer_key) < 2:
                 logging.error("There should be at least 2 questions in the quiz")
                 raise LessThen2Questions
 
-            feedback = []
-            quiz = await self.get_by_id(quiz_id, user_id)
-
-            if quiz.quiz_frequency is not None:
-                quiz_start_time = datetime.now()
-                logging.info(f"Current time: {quiz_start_time}")
-                logging.info(f"Quiz frequency: {quiz.quiz_frequency}")
-
-                if quiz_start_time > quiz.quiz_frequency:
-                    logging.error("Quiz is not available at the moment")
-                    raise QuizNotAvailable
-
-            right_count = 0
-            total_count = len(quiz_questions)
-
-            async with await asyncio.from_url(Settings.REDIS_URL) as redis_client:
-                logging.info("Connecting redis processed successfully")
-
-                for index, (question, user_answer) in enumerate(zip(quiz_questions, quiz_data.answers)):
-                    correct_answers = [answer.lower() for answer in question.question_correct_answer]
-                    user_answers = user_answer.split(',')
-                    user_answers_lower = [ans.lower() for ans in user_answers]
-                    is_correct = any(ans in correct_answers for ans in user_answers_lower)
-                    redis_key = f"quiz_pass:{quiz_id}:{user_id}:question_{question.question_id}"
-                    await redis_client.get(redis_key)
-                    redis_data = {
-                        "user_id": str(user_id),
-                        "company_id": str(quiz.company_id),
-                        "quiz_id": str(quiz_id),
-                        "question_id": str(question.question_id),
-                        "user_answer": user_answer,
-                        "is_correct": is_correct,
-                    }
-                    logging.info(f"Redis Key: {redis_key}")
-                    logging.info(f"Redis data: {redis_data}")
-                    await redis_client.setex(redis_key, timedelta(hours=48), json.dumps(redis_data))
-
-                    if is_correct:
-                        feedback.append(f"Question {index + 1}: Correct!")
-                        right_count += 1
-
-                    else:
-                        correct_answers_str = "; ".join(correct_answers)
-                        feedback.append(
-                            f"Question {index + 1}: Incorrect. Correct answer(s) is/are '{correct_answers_str}'"
-                        )
-
-            await redis_client.close()
-            logging.info("Passing quiz processed successfully")
-            query = await self.session.scalars(select(Result)
-                                               .filter(Result.result_user_id == user_id,
-                                                       Result.result_quiz_id == quiz_id))
-            existing_result = query.first()
-            logging.info(existing_result)
-
+            check_quiz_available(quiz, datetime.now())
+            correctness = grade_answers(answer_key, quiz_data.answers)
+            await store_quiz_answers(await get_redis(),
+                                     answer_records(quiz, user_id, answer_key, quiz_data.answers, correctness))
+            logging.debug("Passing quiz processed successfully", extra={"sampled": True})
             result_instance = Result(
                 result_user_id=user_id,
                 result_company_id=quiz.company_id,
                 result_quiz_id=quiz_id,
                 result_created_at=datetime.utcnow(),
-                result_right_count=right_count,
-                result_total_count=total_count,
+                result_right_count=sum(correctness),
+                result_total_count=len(answer_key),
             )
             self.session.add(result_instance)
-
+            await upsert_result_rollups(self.session, [result_instance])
             await self.session.commit()
-            return feedback
+            return answer_feedback(answer_key, correctness)
 
         except Exception as e:
             logging.error(f"Error passing quiz with ID {quiz_id}: {e}")
             raise ErrorPassQuiz(e)
 
-    async def get_question_ids_for_quiz(self, quiz_id):
-        result = await self.session.scalars(select(Question.question_id).filter(Question.quiz_id == quiz_id))
-        question_ids = [question_id for question_id in result.all()]
-        return question_ids
+    async def quiz_pass_batch(self, attempts: List[QuizAttempt], user_id: str) -> Dict[str, Any]:
+        try:
+            if len(attempts) > Settings.QUIZ_ATTEMPT_BATCH_MAX_ITEMS:
+                raise InvalidQuizAttemptBatch(f"at most {Settings.QUIZ_ATTEMPT_BATCH_MAX_ITEMS} attempts per batch.")
+
+            quiz_ids = {str(attempt.quiz_id) for attempt in attempts}
+            result = await self.session.scalars(select(self.model).filter(self.model.quiz_id.in_(quiz_ids)))
+            quizzes = {str(quiz.quiz_id): quiz for quiz in result.all()}
+            answer_keys = await get_answer_keys(self.session, quizzes.values())
+            received_at = datetime.utcnow()
+            outcomes, results, answers = [], [], []
+
+            for index, attempt in enumerate(attempts):
+                quiz = quizzes.get(str(attempt.quiz_id))
+
+                try:
+                    if quiz is None:
+                        raise QuizNotFound(attempt.quiz_id)
+
+                    await self.permission_service.check_member(user_id, quiz.company_id)
+
+                    if not attempt.answers:
+                        raise EmptyAnswer
+
+                    answer_key = answer_keys[str(quiz.quiz_id)]
+
+                    if len(answer_key) < 2:
+                        raise LessThen2Questions
+
+                    attempted_at = attempt_time(attempt.attempted_at, received_at)
+                    check_quiz_available(quiz, attempted_at)
+
+                except CustomException as e:
+                    outcomes.append({"index": index, "quiz_id": attempt.quiz_id, "status": "rejected",
+                                     "error": e.detail})
+                    continue
+
+                correctness = grade_answers(answer_key, attempt.answers)
+                # attempts replay in order, so a later attempt of the same quiz overwrites the stored answers
+                answers.extend(answer_records(quiz, user_id, answer_key, attempt.answers, correctness))
+                results.append(Result(
+                    result_user_id=user_id,
+                    result_company_id=quiz.company_id,
+                    result_quiz_id=quiz.quiz_id,
+                    result_created_at=attempted_at,
+                    result_right_count=sum(correctness),
+                    result_total_count=len(answer_key),
+                ))
+                outcomes.append({"index": index, "quiz_id": attempt.quiz_id, "status": "accepted",
+                                 "result": results[-1], "feedback": answer_feedback(answer_key, correctness)})
+
+            if results:
+                await store_quiz_answers(await get_redis(), answers)
+                self.session.add_all(results)
+                await self.session.flush()
+                await upsert_result_rollups(self.session, results)
+
+                for outcome in outcomes:
+                    if "result" in outcome:
+                        result_instance = outcome.pop("result")
+                        outcome.update(result_id=result_instance.result_id,
+                                       right_count=result_instance.result_right_count,
+                                       total_count=result_instance.result_total_count)
+
+                await self.session.commit()
+
+            logging.info("Passed %s quiz attempts, %s rejected", len(results), len(outcomes) - len(results))
+            return {"accepted": len(results), "rejected": len(outcomes) - len(results), "attempts": outcomes}
+
+        except Exception as e:
+            logging.error(f"Error passing quiz attempts batch: {e}")
+            raise ErrorPassQuizBatch(e)
+
+    async def get_question_ids_for_quizzes(self, quiz_ids: Iterable) -> Dict[str, List]:
+        quiz_ids = {str(quiz_id) for quiz_id in quiz_ids}
+        missing_quiz_ids = quiz_ids - self.quiz_question_ids.keys()
+
+        if missing_quiz_ids:
+            for quiz_id in missing_quiz_ids:
+                self.quiz_question_ids[quiz_id] = []
+
+            result = await self.session.execute(
+                select(Question.quiz_id, Question.question_id)
+                .filter(Question.quiz_id.in_(missing_quiz_ids))
+                .order_by(Question.quiz_id, Question.question_created_at, Question.question_id))
+
+            for quiz_id, question_id in result.all():
+                self.quiz_question_ids[str(quiz_id)].append(question_id)
+
+        return {quiz_id: self.quiz_question_ids[quiz_id] for quiz_id in quiz_ids}
+
+    async def get_question_ids_for_quiz(self, quiz_id) -> List:
+        question_ids = await self.get_question_ids_for_quizzes([quiz_id])
+        return question_ids[str(quiz_id)]
@@ -1,36 +1,35 @@
-import csv
 import json
 import logging
-import os
-from redis import asyncio
+from typing import AsyncIterator, Dict, Iterable, List, Tuple, Union
 from sqlalchemy import select, func, desc, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
 from app.core.config import Settings
-from app.db.models import Result, Quiz
-from app.depends.exceptions import ErrorGetRedisData, InvalidExportFormat, ErrorExport, NotOwnerOrAdminOrSelf, \
+from app.db.db import get_redis
+from app.db.models import Result, Quiz, ResultRollup
+from app.depends.exceptions import ErrorGetRedisData, ErrorExport, NotOwnerOrAdminOrSelf, \
     NotSelf, ErrorUserResultCompany, ErrorUserResultCompanies, ErrorCompaniesResults, ErrorUsersResults, \
     ErrorQuizResults, ErrorCompanyAverageScoresOverTime, ErrorCompanyLastAttemptTimes, ErrorUserCompletedQuizzes, \
     ErrorUserResultsQuizzesOverTimes
-from app.services.quizzes import check_company_owner_or_admin, QuizService
+from app.services.permissions import PermissionService
+from app.services.quizzes import QuizService, answer_redis_key
+from app.utils.export import export_response
 
 
 async def get_redis_data(quiz_id: str, user_id: str, question_id: str) -> dict:
     try:
-        async with await asyncio.from_url(Settings.REDIS_URL) as redis_client:
-            logging.info("Connecting redis processed successfully")
-        redis_key = f"quiz_pass:{quiz_id}:{user_id}:question_{question_id}"
-        logging.info(f"Redis key: {redis_key}")
+        redis_client = await get_redis()
+        redis_key = answer_redis_key(quiz_id, user_id, question_id)
+        logging.debug("Redis key: %s", redis_key, extra={"sampled": True})
         redis_data_str = await redis_client.get(redis_key)
 
         if redis_data_str is not None:
             redis_data = json.loads(redis_data_str)
-            logging.info("Getting redis data processed successfully")
-            await redis_client.close()
-            logging.info("Disconnecting redis processed successfully")
+            logging.debug("Getting redis data processed successfully", extra={"sampled": True})
             return redis_data
 
         else:
-            logging.warning("Redis data not found for key: {redis_key}")
+            logging.warning("Redis data not found for key: %s", redis_key)
             raise ErrorGetRedisData(e="Redis data not found.")
 
     except Exception as e:
@@ -38,36 +37,33 @@ async def get_redis_data(quiz_id: str, user_id: str, question_id: str) -> dict:
         raise ErrorGetRedisData(e)
 
 
-async def export_redis_data(user_id: str, quiz_id: str, question_id: str, export_format: str, filename: str):
+async def get_redis_data_bulk(keys: Iterable[Tuple[str, str, str]], chunk_size: int = Settings.REDIS_MGET_CHUNK_SIZE) \
+        -> Tuple[Dict[Tuple[str, str, str], dict], List[Tuple[str, str, str]]]:
     try:
-        logging.info(f"Exported data for user_id: {user_id}, quiz_id: {quiz_id}, question_id: {question_id} to Redis")
-        redis_data = await get_redis_data(quiz_id, user_id, question_id)
-        logging.info(f" Redis_data: {redis_data}")
-        file_path = os.path.join("C:/", "results", filename)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        redis_client = await get_redis()
+        keys = list(keys)
+        redis_data = {}
+        missing_keys = []
 
-        if export_format.lower() == 'json':
-            with open(file_path, 'a', encoding='utf-8') as json_file:
-                json.dump(redis_data, json_file, ensure_ascii=False, indent=2)
-            logging.info("Export redis data with JSON processed successfully")
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            values = await redis_client.mget([answer_redis_key(*key) for key in chunk])
 
-        elif export_format.lower() == 'csv':
-            with open(file_path, mode='a', newline='', encoding='utf-8') as csv_file:
-                writer = csv.DictWriter(csv_file, fieldnames=redis_data.keys())
+            for key, value in zip(chunk, values):
+                if value is None:
+                    missing_keys.append(key)
 
-                if csv_file.tell() == 0:
-                    writer.writeheader()
+                else:
+                    redis_data[key] = json.loads(value)
 
-                writer.writerow(redis_data)
-            logging.info("Export redis data with CSV processed successfully")
+        if missing_keys:
+            logging.warning(f"Redis data not found for {len(missing_keys)} of {len(keys)} keys")
 
-        else:
-            logging.error(f"Invalid export format '{export_format}'. Supported formats: JSON, CSV.")
-            raise InvalidExportFormat
+        return redis_data, missing_keys
 
-    except ErrorGetRedisData as e:
-        logging.error(f"Error exporting data: {e}")
-        raise ErrorExport(e)
+    except Exception as e:
+        logging.error(f"Error retrieving redis data: {e}")
+        raise ErrorGetRedisData(e)
 
 
 class ResultService:
@@ -76,26 +72,72 @@ class ResultService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.quiz_service = QuizService(self.session)
+        self.permission_service = PermissionService(self.session)
+
+    async def stream_answer_records(self, *criteria) -> AsyncIterator[Dict]:
+        try:
+            result = await self.session.stream(
+                select(self.model.result_company_id, self.model.result_user_id, self.model.result_quiz_id)
+                .filter(*criteria)
+                .distinct()
+                .execution_options(yield_per=Settings.RESULT_EXPORT_BATCH_SIZE)
+            )
+
+            async for partition in result.partitions():
+                keys = []
+                company_ids = {}
+                question_ids = await self.quiz_service.get_question_ids_for_quizzes(
+                    row.result_quiz_id for row in partition)
+
+                for row in partition:
+                    quiz_id = row.result_quiz_id
+
+                    for question_id in question_ids[str(quiz_id)]:
+                        key = (str(quiz_id), str(row.result_user_id), str(question_id))
+                        company_ids[key] = str(row.result_company_id)
+                        keys.append(key)
+
+                redis_data, missing_keys = await get_redis_data_bulk(keys)
+
+                for key in keys:
+                    quiz_id, user_id, question_id = key
+
+                    if key in redis_data:
+                        yield {**redis_data[key], "status": "ok"}
+
+                    else:
+                        yield {"user_id": user_id, "company_id": company_ids[key], "quiz_id": quiz_id,
+                               "question_id": question_id, "user_answer": None, "is_correct": None,
+                               "status": "missing"}
 
-    async def user_result_company(self, company_id: str, user_id: str, export_format: str, user: str) -> str:
+        except Exception as e:
+            logging.error(f"Error exporting data: {e}")
+            raise ErrorExport(e)
+
+    async def user_result_company(self, company_id: str, user_id: str, export_format: str, user: str) \
+            -> Union[str, StreamingResponse]:
         try:
-            if str(user) != user_id or await check_company_owner_or_admin(self.session, str(user), company_id) != True:
+            if str(user) != user_id and not await self.permission_service.is_owner_or_admin(str(user), company_id):
                 logging.error("You are not the owner or admin of this company")
                 raise NotOwnerOrAdminOrSelf
 
+            if export_format:
+                return export_response(
+                    self.stream_answer_records(self.model.result_user_id == user_id,
+                                               self.model.result_company_id == company_id),
+                    export_format, "user_score_company_results")
+
             query = await self.session.execute(
                 select(
-                    self.model.result_user_id,
-                    self.model.result_quiz_id,
-                    func.avg(self.model.result_right_count / self.model.result_total_count).label('average_score'))
-                .filter(self.model.result_user_id == user_id, self.model.result_company_id == company_id)
-                .group_by(self.model.result_user_id, self.model.result_quiz_id)
+                    ResultRollup.quiz_id,
+                    (ResultRollup.score_sum / ResultRollup.attempt_count).label('average_score'))
+                .filter(ResultRollup.user_id == user_id, ResultRollup.company_id == company_id)
             )
             user_scores = query.all()
             quiz_scores = {}
 
             for user in user_scores:
-                quiz_id = user.result_quiz_id
+                quiz_id = user.quiz_id
                 average_score = round(user.average_score, 2)
 
                 if quiz_id not in quiz_scores:
@@ -107,11 +149,6 @@ class ResultService:
                 quiz_scores[quiz_id]['sum_scores'] += average_score
                 quiz_scores[quiz_id]['count_scores'] += 1
 
-                for question_id in await self.quiz_service.get_question_ids_for_quiz(quiz_id):
-                    if export_format:
-                        filename = f"user_score_company_results.{export_format.lower()}"
-                        await export_redis_data(user_id, quiz_id, question_id, export_format, filename)
-
             result_str = ""
             company_average_score = sum(
                 scores['sum_scores'] / scores['count_scores'] for scores in quiz_scores.values()) / len(quiz_scores)
@@ -122,68 +159,47 @@ class ResultService:
             logging.error(f"Error retrieving average scores for user in company with ID {company_id}: {e}")
             raise ErrorUserResultCompany(company_id, e)
 
-    async def user_result_companies(self, user_id: str, export_format: str) -> str:
+    async def user_result_companies(self, user_id: str, export_format: str) -> Union[str, StreamingResponse]:
         try:
+            if export_format:
+                return export_response(self.stream_answer_records(self.model.result_user_id == user_id),
+                                       export_format, "user_score_companies_results")
+
             query = await self.session.execute(
-                select(
-                    self.model.result_user_id,
-                    self.model.result_company_id,
-                    self.model.result_quiz_id,
-                    func.avg(self.model.result_right_count / self.model.result_total_count).label('average_score'))
-                .filter(self.model.result_user_id == user_id)
-                .group_by(self.model.result_company_id, self.model.result_quiz_id, self.model.result_user_id)
+                select((ResultRollup.score_sum / ResultRollup.attempt_count).label('average_score'))
+                .filter(ResultRollup.user_id == user_id)
             )
             user_scores = query.all()
-            formatted_scores = {}
-            result_str = ""
-
-            for user in user_scores:
-                user_id = user.result_user_id
-                quiz_id = user.result_quiz_id
-
-                if user_id not in formatted_scores:
-                    formatted_scores[user_id] = {
-                        'question_ids': {}
-                    }
-
-                if quiz_id not in formatted_scores[user_id]['question_ids']:
-
-                    formatted_scores[user_id]['question_ids'][quiz_id] = await (
-                        self.quiz_service.get_question_ids_for_quiz(quiz_id))
-
-                for quiz_id, question_ids in formatted_scores[user_id]['question_ids'].items():
-                    for question_id in question_ids:
-                        if export_format:
-                            filename = f"user_score_companies_results.{export_format.lower()}"
-                            await export_redis_data(user_id, quiz_id, question_id, export_format, filename)
-
-                average_across_companies = sum([score.average_score for score in user_scores]) / len(user_scores)
-                result_str = round(average_across_companies, 2)
-            return f"Your average score across all companies for user with ID {user_id}: {result_str:.2f}"
+            average_across_companies = sum([score.average_score for score in user_scores]) / len(user_scores)
+            return f"Your average score across all companies for user with ID {user_id}: {average_across_companies:.2f}"
 
         except Exception as e:
             logging.error(f"Error retrieving average scores for user in companies: {e}")
             raise ErrorUserResultCompanies(e)
 
-    async def company_results(self, company_id: str, export_format: str, user_id: str) -> str:
+    async def company_results(self, company_id: str, export_format: str, user_id: str) \
+            -> Union[str, StreamingResponse]:
         try:
-            await check_company_owner_or_admin(self.session, user_id, company_id)
+            await self.permission_service.check_owner_or_admin(user_id, company_id)
+
+            if export_format:
+                return export_response(self.stream_answer_records(self.model.result_company_id == company_id),
+                                       export_format, "company_results")
+
             query = await self.session.execute(
                 select(
-                    self.model.result_user_id,
-                    self.model.result_quiz_id,
-                    func.avg(self.model.result_right_count / self.model.result_total_count).label('average_score')
+                    ResultRollup.user_id,
+                    ResultRollup.quiz_id,
+                    (ResultRollup.score_sum / ResultRollup.attempt_count).label('average_score')
                 )
-                .filter(self.model.result_company_id == company_id)
-                .group_by(self.model.result_user_id, self.model.result_quiz_id)
+                .filter(ResultRollup.company_id == company_id)
                 .order_by(desc(text('average_score')))
             )
             user_scores = query.all()
             formatted_scores = {}
 
             for user in user_scores:
-                user_id = user.result_user_id
-                quiz_id = user.result_quiz_id
+                user_id = user.user_id
                 average_score = round(user.average_score, 2)
 
                 if user_id not in formatted_scores:
@@ -195,10 +211,6 @@ class ResultService:
                 formatted_scores[user_id]['sum_scores'] += average_score
                 formatted_scores[user_id]['count_scores'] += 1
 
-                if export_format:
-                    filename = f"company_results.{export_format.lower()}"
-                    await export_redis_data(user_id, quiz_id, export_format, filename)
-
             result_str = ""
 
             for user_id, scores in formatted_scores.items():
@@ -215,19 +227,19 @@ class ResultService:
         try:
             result = await self.session.execute(
                 select(
-                    self.model.result_user_id,
-                    func.sum(self.model.result_right_count).label('total_right_count'),
-                    func.sum(self.model.result_total_count).label('total_question_count'),
-                    func.avg(self.model.result_right_count / self.model.result_total_count).label('average_score')
+                    ResultRollup.user_id,
+                    func.sum(ResultRollup.right_count_sum).label('total_right_count'),
+                    func.sum(ResultRollup.total_count_sum).label('total_question_count'),
+                    (func.sum(ResultRollup.score_sum) / func.sum(ResultRollup.attempt_count)).label('average_score')
                 )
-                .group_by(self.model.result_user_id)
+                .group_by(ResultRollup.user_id)
                 .order_by(desc(text('average_score')))
             )
             user_scores = result.all()
             formatted_scores = {}
 
             for user in user_scores:
-                user_id = user.result_user_id
+                user_id = user.user_id
                 average_score = round(user.average_score, 2)
 
                 if user_id not in formatted_scores:
@@ -251,38 +263,36 @@ class ResultService:
             logging.error(f"Error retrieving average scores for all users: {e}")
             raise ErrorUsersResults(e)
 
-    async def quiz_results_for_users(self, quiz_id: str, user_id: str, export_format: str) -> str:
+    async def quiz_results_for_users(self, quiz_id: str, user_id: str, export_format: str) \
+            -> Union[str, StreamingResponse]:
         try:
             company_id = await self.session.scalar(select(Quiz.company_id).filter(Quiz.quiz_id == quiz_id))
-            await check_company_owner_or_admin(self.session, user_id, company_id)
+            await self.permission_service.check_owner_or_admin(user_id, company_id)
+
+            if export_format:
+                return export_response(self.stream_answer_records(self.model.result_quiz_id == quiz_id),
+                                       export_format, "quiz_results")
+
             query = await self.session.execute(
                 select(
-                    self.model.result_user_id,
-                    func.avg(self.model.result_right_count / self.model.result_total_count).label('average_score')
+                    ResultRollup.user_id,
+                    (func.sum(ResultRollup.score_sum) / func.sum(ResultRollup.attempt_count)).label('average_score')
                 )
-                .filter(self.model.result_quiz_id == quiz_id)
-                .group_by(self.model.result_user_id)
+                .filter(ResultRollup.quiz_id == quiz_id)
+                .group_by(ResultRollup.user_id)
             )
             formatted_scores = {}
 
             for user in query.all():
-                user_id = user.result_user_id
+                user_id = user.user_id
                 if user_id not in formatted_scores:
                     formatted_scores[user_id] = {
-                        'question_ids': [],
                         'average_score': user.average_score
                     }
-                formatted_scores[user_id]['question_ids'].extend(
-                    await self.quiz_service.get_question_ids_for_quiz(quiz_id))
 
             result_str = ""
 
             for user_id, user_data in formatted_scores.items():
-                for question_id in user_data['question_ids']:
-                    if export_format:
-                        filename = f"quiz_results.{export_format.lower()}"
-                        await export_redis_data(user_id, quiz_id, question_id, export_format, filename)
-
                 user_str = f"{user_id}: {user_data['average_score']:.2f}, "
                 result_str += user_str
 
@@ -342,15 +352,15 @@ class ResultService:
                 raise NotSelf
 
             query = await self.session.execute(
-                select(self.model.result_quiz_id, func.max(self.model.result_created_at).label("last_completion_date"))
-                .where(self.model.result_user_id == user_id)
-                .group_by(self.model.result_quiz_id)
+                select(ResultRollup.quiz_id, func.max(ResultRollup.last_attempt_at).label("last_completion_date"))
+                .where(ResultRollup.user_id == user_id)
+                .group_by(ResultRollup.quiz_id)
             )
             result_list = []
 
             for result in query.all():
                 result_data = {
-                    "quiz_id": result.result_quiz_id,
+                    "quiz_id": result.quiz_id,
                     "last_completion_date": result.last_completion_date
                 }
                 result_list.append(result_data)
@@ -364,7 +374,7 @@ class ResultService:
 
     async def company_average_scores_over_times(self, company_id: str, user: str, user_id: str = None) -> dict:
         try:
-            await check_company_owner_or_admin(self.session, user, company_id)
+            await self.permission_service.check_owner_or_admin(user, company_id)
             query = await self.session.execute(
                 select(
                     self.model.result_created_at,
@@ -408,24 +418,21 @@ class ResultService:
 
     async def company_last_attempt_times(self, company_id: str, user_id: str) -> dict:
         try:
-            await check_company_owner_or_admin(self.session, user_id, company_id)
+            await self.permission_service.check_owner_or_admin(user_id, company_id)
             query = await self.session.execute(
                 select(
-                    self.model.result_user_id,
-                    self.model.result_quiz_id,
-                    func.max(self.model.result_created_at).label("last_attempt_time")
-                )
-                .where(
-                    (self.model.result_company_id == company_id)
+                    ResultRollup.user_id,
+                    ResultRollup.quiz_id,
+                    ResultRollup.last_attempt_at.label("last_attempt_time")
                 )
-                .group_by(self.model.result_user_id, self.model.result_quiz_id)
+                .where(ResultRollup.company_id == company_id)
             )
             result_data = []
 
             for result in query.all():
                 result_data.append({
-                    "user_id": result.result_user_id,
-                    "quiz_id": result.result_quiz_id,
+                    "user_id": result.user_id,
+                    "quiz_id": result.quiz_id,
                     "last_attempt_time": result.last_attempt_time
                 })
 
@@ -0,0 +1,92 @@
+import logging
+from datetime import datetime
+from typing import Iterable
+from sqlalchemy import select, func, delete, case, cast, text, Float
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Result, ResultRollup
+
+ROLLUP_KEY = [ResultRollup.company_id, ResultRollup.user_id, ResultRollup.quiz_id]
+
+
+def result_score(right_count: int, total_count: int) -> float:
+    return (right_count or 0) / total_count if total_count else 0.0
+
+
+async def upsert_result_rollups(session: AsyncSession, results: Iterable[Result]):
+    rollups = {}
+
+    for result in results:
+        key = (str(result.result_company_id), str(result.result_user_id), str(result.result_quiz_id))
+        score = result_score(result.result_right_count, result.result_total_count)
+        attempt_at = result.result_created_at or datetime.utcnow()
+        rollup = rollups.get(key)
+
+        if rollup is None:
+            rollups[key] = {
+                "company_id": result.result_company_id,
+                "user_id": result.result_user_id,
+                "quiz_id": result.result_quiz_id,
+                "attempt_count": 1,
+                "right_count_sum": result.result_right_count or 0,
+                "total_count_sum": result.result_total_count or 0,
+                "score_sum": score,
+                "best_score": score,
+                "last_attempt_at": attempt_at,
+            }
+
+        else:
+            rollup["attempt_count"] += 1
+            rollup["right_count_sum"] += result.result_right_count or 0
+            rollup["total_count_sum"] += result.result_total_count or 0
+            rollup["score_sum"] += score
+            rollup["best_score"] = max(rollup["best_score"], score)
+            rollup["last_attempt_at"] = max(rollup["last_attempt_at"], attempt_at)
+
+    if not rollups:
+        return
+
+    statement = insert(ResultRollup).values(list(rollups.values()))
+    excluded = statement.excluded
+    await session.execute(statement.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "attempt_count": ResultRollup.attempt_count + excluded.attempt_count,
+            "right_count_sum": ResultRollup.right_count_sum + excluded.right_count_sum,
+            "total_count_sum": ResultRollup.total_count_sum + excluded.total_count_sum,
+            "score_sum": ResultRollup.score_sum + excluded.score_sum,
+            "best_score": func.greatest(ResultRollup.best_score, excluded.best_score),
+            "last_attempt_at": func.greatest(ResultRollup.last_attempt_at, excluded.last_attempt_at),
+        }
+    ))
+
+
+async def backfill_result_rollups(session: AsyncSession) -> int:
+    right_count = func.coalesce(Result.result_right_count, 0)
+    total_count = func.coalesce(Result.result_total_count, 0)
+    score = case((total_count > 0, cast(right_count, Float) / total_count), else_=0.0)
+    rollups = (
+        select(
+            Result.result_company_id,
+            Result.result_user_id,
+            Result.result_quiz_id,
+            func.count(),
+            func.sum(right_count),
+            func.sum(total_count),
+            func.sum(score),
+            func.max(score),
+            func.max(Result.result_created_at),
+        )
+        .filter(Result.result_company_id.is_not(None), Result.result_user_id.is_not(None),
+                Result.result_quiz_id.is_not(None))
+        .group_by(Result.result_company_id, Result.result_user_id, Result.result_quiz_id)
+    )
+
+    await session.execute(text("LOCK TABLE results IN SHARE MODE"))
+    await session.execute(delete(ResultRollup))
+    result = await session.execute(insert(ResultRollup).from_select(
+        ["company_id", "user_id", "quiz_id", "attempt_count", "right_count_sum", "total_count_sum", "score_sum",
+         "best_score", "last_attempt_at"], rollups))
+    await session.commit()
+    logging.info("Backfilled %s result rollups", result.rowcount)
+    return result.rowcount
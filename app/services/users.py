@@ -1,15 +1,15 @@
 import logging
 import secrets
 import string
-from typing import List, Optional
+from typing import Any, Dict, Optional
 
-import bcrypt
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import User
 from app.depends.exceptions import UserNotFound, ErrorRetrievingUser, ErrorRetrievingList, AlreadyExistsUser, \
     ErrorCreatingUser, ErrorUpdatingUser, ErrorDeletingUser
 from app.schemas.user import UserBase, UserUpdate
+from app.utils.pagination import paginate, page_response
 from app.utils.security import Hasher
 
 
@@ -19,12 +19,13 @@ class UserService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_all(self, page: int = 1, items_per_page: int = 10) -> List[UserBase]:
+    async def get_all(self, page: int = 1, items_per_page: int = 10, cursor: str = None) -> Dict[str, Any]:
         try:
-            offset = (page - 1) * items_per_page
-            query = await self.session.scalars(select(self.model).offset(offset).limit(items_per_page))
+            sort_key = [self.model.user_created_at, self.model.user_id]
+            query = await self.session.scalars(paginate(select(self.model), sort_key, cursor, page, items_per_page))
             logging.info("Getting entity list processed successfully")
-            return [UserBase(**user.__dict__) for user in query.all()]
+            return page_response(query.all(), items_per_page, lambda user: (user.user_created_at, user.user_id),
+                                 lambda user: UserBase(**user.__dict__))
 
         except Exception as e:
             logging.error(f"Error retrieving entity list: {e}")
@@ -69,13 +70,11 @@ class UserService:
             else:
                 password = user_data.user_hashed_password
 
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(password.encode(), salt).decode('utf-8')
-            user_data.user_hashed_password = str(hashed_password)
+            user_data.user_hashed_password = await Hasher.get_password_hash(password)
             new_user = User(**user_data.model_dump())
             self.session.add(new_user)
             await self.session.commit()
-            logging.info(f"User created: {new_user.user_id}")
+            logging.info("User created with ID %s", new_user.user_id)
             logging.info("Creating user processed successfully")
             return new_user
 
@@ -91,13 +90,15 @@ class UserService:
                 user_data.user_hashed_password = await Hasher.get_password_hash(user_data.user_hashed_password)
                 user.user_hashed_password = user_data.user_hashed_password
 
-            logging.info(user_data)
+            logging.debug("Updating fields %s for user with ID %s", sorted(user_data.model_fields_set), user_id)
             user_dict = user_data.model_dump(exclude_none=True)
-            await self.session.execute(update(self.model).where(self.model.user_id == user_id)
-                                       .values(user_dict).returning(self.model.user_id))
+            result = await self.session.scalars(update(self.model).where(self.model.user_id == user_id)
+                                                .values(user_dict).returning(self.model)
+                                                .execution_options(synchronize_session="fetch"))
+            user = result.one()
             await self.session.commit()
-            logging.info(f"User update successful for user ID: {user_id}")
-            return await self.get_by_id(user_id)
+            logging.info("User update successful for user ID: %s", user_id)
+            return user
 
         except Exception as e:
             logging.error(f"Error during user update for user ID: {user_id}: {e}")
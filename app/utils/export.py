@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator, Dict
+from starlette.responses import StreamingResponse
+from app.depends.exceptions import InvalidExportFormat
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+EXPORT_FIELDS = ["user_id", "company_id", "quiz_id", "question_id", "user_answer", "is_correct", "status"]
+
+
+def get_export_format(export_format: str) -> str:
+    export_format = export_format.lower()
+
+    if export_format not in EXPORT_MEDIA_TYPES:
+        logging.error(f"Invalid export format '{export_format}'. Supported formats: JSON, CSV, NDJSON.")
+        raise InvalidExportFormat
+
+    return export_format
+
+
+async def format_csv(rows: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+
+    async for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def format_json(rows: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    separator = "["
+
+    async for row in rows:
+        yield separator + json.dumps(row, ensure_ascii=False)
+        separator = ",\n"
+
+    yield "[]" if separator == "[" else "]"
+
+
+async def format_ndjson(rows: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+EXPORT_FORMATTERS = {
+    "csv": format_csv,
+    "json": format_json,
+    "ndjson": format_ndjson,
+}
+
+
+def export_response(rows: AsyncIterator[Dict], export_format: str, filename: str) -> StreamingResponse:
+    export_format = get_export_format(export_format)
+    return StreamingResponse(
+        EXPORT_FORMATTERS[export_format](rows),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,22 @@
+from http import HTTPStatus
+from typing import Optional
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def cached_json_response(request: Request, body: bytes, etag: str) -> Response:
+    # private and revalidated every time, the membership check has to run before a 304 is sent
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,50 @@
+import json
+from typing import Any, List
+from fastapi import UploadFile
+from app.depends.exceptions import InvalidQuestionImport
+
+IMPORT_READ_SIZE = 64 * 1024
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+def parse_import_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+
+    except ValueError as e:
+        return ValueError(f"Invalid JSON line: {e}")
+
+
+async def read_ndjson_items(file: UploadFile, max_items: int) -> List[Any]:
+    items = []
+    buffer = b""
+
+    while len(items) <= max_items:
+        chunk = await file.read(IMPORT_READ_SIZE)
+
+        if not chunk:
+            break
+
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        items.extend(parse_import_line(line) for line in lines if line.strip())
+
+    if buffer.strip() and len(items) <= max_items:
+        items.append(parse_import_line(buffer))
+
+    return items
+
+
+async def read_import_file(file: UploadFile, max_items: int) -> List[Any]:
+    if file.content_type in NDJSON_MEDIA_TYPES or (file.filename or "").endswith((".ndjson", ".jsonl")):
+        return await read_ndjson_items(file, max_items)
+
+    try:
+        items = json.loads(await file.read())
+
+    except ValueError as e:
+        raise InvalidQuestionImport(f"file is not valid JSON: {e}")
+
+    if not isinstance(items, list):
+        raise InvalidQuestionImport("expected a JSON array of questions.")
+
+    return items
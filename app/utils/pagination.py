@@ -0,0 +1,50 @@
+import base64
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from sqlalchemy import Column, DateTime, UUID, Select, literal, tuple_
+from app.depends.exceptions import InvalidCursor
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else str(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Column]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+
+        return [datetime.fromisoformat(value) if isinstance(column.type, DateTime)
+                else uuid.UUID(value) if isinstance(column.type, UUID) else value
+                for column, value in zip(columns, values)]
+
+    except Exception as e:
+        logging.error(f"Invalid cursor '{cursor}': {e}")
+        raise InvalidCursor
+
+
+def paginate(query: Select, columns: Sequence[Column], cursor: Optional[str], page: int, items_per_page: int,
+             descending: bool = False) -> Select:
+    if cursor:
+        values = tuple_(*[literal(value, column.type)
+                          for column, value in zip(columns, decode_cursor(cursor, columns))])
+        query = query.filter(tuple_(*columns) < values if descending else tuple_(*columns) > values)
+
+    else:
+        query = query.offset((page - 1) * items_per_page)
+
+    # one extra row tells whether there is a next page without a COUNT
+    return query.order_by(*[column.desc() if descending else column for column in columns]).limit(items_per_page + 1)
+
+
+def page_response(rows: Sequence, items_per_page: int, cursor_values: Callable[[Any], Sequence[Any]],
+                  item: Callable[[Any], Any] = lambda row: row) -> Dict[str, Any]:
+    rows = list(rows)
+    next_cursor = encode_cursor(cursor_values(rows[items_per_page - 1])) if len(rows) > items_per_page else None
+    return {"items": [item(row) for row in rows[:items_per_page]], "next_cursor": next_cursor}
@@ -1,30 +1,64 @@
+import asyncio
+import hashlib
 import logging
-import bcrypt
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import httpx
 from datetime import timedelta, datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from jose import jwt
 from app.core.config import Settings
+from app.core.metrics import timed, track_dependency
 from app.depends.exceptions import ErrorCreatingAccessToken, ErrorCreatingRefreshToken, InvalidToken, \
     ErrorCreatingUserAuth0
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=Settings.PASSWORD_HASH_ROUNDS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/signin/")
 
+password_executor: Optional[ThreadPoolExecutor] = None
+
+
+def init_password_executor() -> ThreadPoolExecutor:
+    global password_executor
+
+    # bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop and caps how many run at once
+    if password_executor is None:
+        password_executor = ThreadPoolExecutor(max_workers=Settings.PASSWORD_HASH_WORKERS,
+                                               thread_name_prefix="password-hash")
+
+    return password_executor
+
+
+def close_password_executor():
+    global password_executor
+
+    if password_executor is not None:
+        password_executor.shutdown(wait=False, cancel_futures=True)
+        password_executor = None
+
+
+async def run_in_password_executor(func, *args):
+    with track_dependency("hash"):
+        return await asyncio.get_running_loop().run_in_executor(init_password_executor(), func, *args)
+
 
 class Hasher:
     @staticmethod
     async def verify_password(user_plain_password: str, user_hashed_password: str) -> bool:
-        return password_context.verify(user_plain_password, user_hashed_password)
+        return await run_in_password_executor(password_context.verify, user_plain_password, user_hashed_password)
+
+    @staticmethod
+    async def verify_and_update(user_plain_password: str, user_hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await run_in_password_executor(password_context.verify_and_update, user_plain_password,
+                                              user_hashed_password)
 
     @staticmethod
     async def get_password_hash(user_plain_password: str) -> str:
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(user_plain_password.encode(), salt)
-        return hashed_password.decode('utf-8')
+        return await run_in_password_executor(password_context.hash, user_plain_password)
 
 
 async def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, algorithm: str = "HS256"):
@@ -73,8 +107,55 @@ async def create_refresh_token(data: dict, expires_delta: Optional[timedelta] =
         raise ErrorCreatingRefreshToken(e)
 
 
+class TokenCache:
+    def __init__(self, max_size: int = Settings.TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self.tokens: OrderedDict[str, Dict] = OrderedDict()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self.digest(token)
+        claims = self.tokens.get(key)
+
+        if claims is None:
+            return None
+
+        if claims["exp"] <= time.time():
+            del self.tokens[key]
+            return None
+
+        self.tokens.move_to_end(key)
+        return dict(claims)
+
+    def set(self, token: str, claims: Dict):
+        if self.max_size <= 0 or not isinstance(claims.get("exp"), (int, float)):
+            return
+
+        key = self.digest(token)
+        self.tokens[key] = dict(claims)
+        self.tokens.move_to_end(key)
+
+        while len(self.tokens) > self.max_size:
+            self.tokens.popitem(last=False)
+
+    def clear(self):
+        self.tokens.clear()
+
+
+token_cache = TokenCache()
+
+
+@timed("auth")
 async def decode_and_verify_access_token(token: str) -> Optional[Dict]:
     try:
+        cached_claims = token_cache.get(token)
+
+        if cached_claims is not None:
+            return cached_claims
+
         try:
             auth0_decoded = jwt.decode(
                 token,
@@ -82,6 +163,7 @@ async def decode_and_verify_access_token(token: str) -> Optional[Dict]:
                 algorithms=[Settings.ALGORITHM_AUTH0],
                 audience=Settings.API_AUDIENCE,
             )
+            token_cache.set(token, auth0_decoded)
             return auth0_decoded
         except jwt.JWTError:
             pass
@@ -92,6 +174,7 @@ async def decode_and_verify_access_token(token: str) -> Optional[Dict]:
                 Settings.SECRET_KEY,
                 algorithms=[Settings.ALGORITHM]
             )
+            token_cache.set(token, app_decoded)
             return app_decoded
         except jwt.JWTError:
             pass
@@ -0,0 +1,52 @@
+"""Token verification cost of the auth dependency with and without the verified-token cache.
+
+The user lookup that follows verification is left out, so this runs without a database.
+
+Usage: python -m benchmarks.auth [--requests 5000] [--tokens 100]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from app.schemas.auth import TokenPayload
+from app.utils import security
+from app.utils.security import TokenCache, create_access_token, decode_and_verify_access_token
+
+
+async def verify(token: str) -> TokenPayload:
+    payload = await decode_and_verify_access_token(token)
+    return TokenPayload(**payload)
+
+
+async def measure(tokens, requests: int) -> float:
+    started = time.perf_counter()
+
+    for index in range(requests):
+        await verify(tokens[index % len(tokens)])
+
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def run(requests: int, token_count: int):
+    tokens = [await create_access_token({"sub": f"{uuid.uuid4()}@example.com", "user_id": str(uuid.uuid4())})
+              for _ in range(token_count)]
+
+    security.token_cache = TokenCache(max_size=0)
+    uncached = await measure(tokens, requests)
+    security.token_cache = TokenCache()
+    cached = await measure(tokens, requests)
+
+    print(f"{'tokens':>8} {'requests':>9} {'uncached us/req':>16} {'cached us/req':>14} {'speedup':>8}")
+    print(f"{token_count:>8} {requests:>9} {uncached:>16.1f} {cached:>14.1f} {uncached / cached:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare two benchmark suite reports and flag cases whose median got slower.
+
+Exits with status 1 when any case regressed by more than --threshold, so it can gate a CI job.
+
+Usage: python -m benchmarks.compare baseline.json current.json [--threshold 1.2]
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def load_results(path: str) -> Dict[Tuple, Dict]:
+    with open(path) as report:
+        results = json.load(report)["results"]
+
+    return {(result["case"], tuple(sorted(result["params"].items()))): result for result in results}
+
+
+def compare(baseline: Dict[Tuple, Dict], current: Dict[Tuple, Dict], threshold: float) -> int:
+    regressions = 0
+    print(f"{'case':<45} {'size':>22} {'base ms':>9} {'now ms':>9} {'ratio':>7} {'queries':>9}")
+
+    for key in sorted(baseline.keys() & current.keys()):
+        name, params = key
+        before, after = baseline[key], current[key]
+        ratio = after["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        size = ",".join(f"{parameter}={value}" for parameter, value in params)
+        queries = f"{before['queries']:g}->{after['queries']:g}"
+        flag = ""
+
+        if ratio > threshold or after["queries"] > before["queries"]:
+            regressions += 1
+            flag = "  REGRESSED"
+
+        print(f"{name:<45} {size:>22} {before['median_ms']:>9.2f} {after['median_ms']:>9.2f} {ratio:>6.2f}x "
+              f"{queries:>9}{flag}")
+
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"{key[0]} {dict(key[1])} is only in {'the baseline' if key in baseline else 'the current run'}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio of the median that fails")
+    args = parser.parse_args()
+
+    regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Seed a synthetic, production-shaped dataset with COPY.
+
+Company sizes follow a Zipf-like curve (--skew), every company has one owner and a few admins, members
+answer a skewed subset of their company's quizzes and repeat some of them, and results and notifications
+are spread over the last --days days. The same --seed always produces the same rows. The target database
+is dropped and recreated, secondary indexes are built after the load, then the result rollups and
+notification counters are backfilled and the tables analyzed.
+
+Usage: python -m benchmarks.dataset [--users 10000] [--companies 200] [--results 100000]
+                                    [--notifications 50000] [--database-url URL]
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.core.config import Settings
+from app.db.db import Base, create_engine
+from app.db.models import User, Company, CompanyMembers, Quiz, Question, Result, Notification
+from app.services.rollups import backfill_result_rollups
+
+# high bits of the generated ids, so an index maps to the same uuid on every run without keeping them all
+ID_PREFIXES = {"users": 1, "companies": 2, "quizzes": 3, "questions": 4, "results": 5, "notifications": 6}
+# loaded with their secondary indexes dropped, rebuilding them afterwards is much faster than maintaining them
+BULK_TABLES = (Result.__table__, Notification.__table__)
+ANSWERS = ["a", "b", "c", "d"]
+
+
+def entity_id(kind: str, index: int) -> uuid.UUID:
+    return uuid.UUID(int=ID_PREFIXES[kind] << 96 | index, version=4)
+
+
+class Dataset:
+    def __init__(self, users: int, companies: int, quizzes_per_company: int, questions_per_quiz: int,
+                 results: int, notifications: int, skew: float, days: int, seed: int):
+        self.users = users
+        self.companies = min(companies, users)
+        self.quizzes_per_company = quizzes_per_company
+        self.questions_per_quiz = questions_per_quiz
+        self.results = results
+        self.notifications = notifications
+        self.skew = skew
+        self.random = random.Random(seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.started_at = self.now - timedelta(days=days)
+        self.span = (self.now - self.started_at).total_seconds()
+        self.owners = [self.random.randrange(users) for _ in range(self.companies)]
+        # memberships as parallel arrays, a list of tuples costs several times the memory at scale
+        self.member_companies, self.member_users = array("I"), array("I")
+        self.member_admins = bytearray()
+        self.quizzes: List[Tuple[int, int]] = []
+        self.company_quizzes: List[List[int]] = [[] for _ in range(self.companies)]
+
+    def timestamp(self) -> datetime:
+        return self.started_at + timedelta(seconds=self.random.random() * self.span)
+
+    def company_sizes(self, memberships: int) -> List[int]:
+        weights = [1 / (rank + 1) ** self.skew for rank in range(self.companies)]
+        total = sum(weights)
+        return [max(1, min(self.users, round(memberships * weight / total))) for weight in weights]
+
+    def plan(self, memberships_per_user: float):
+        for company, size in enumerate(self.company_sizes(round(self.users * memberships_per_user))):
+            owner = self.owners[company]
+            members = set(self.random.sample(range(self.users), size - 1)) if size > 1 else set()
+            members.discard(owner)
+
+            for user in (owner, *members):
+                self.member_companies.append(company)
+                self.member_users.append(user)
+                self.member_admins.append(user == owner or self.random.random() < 0.05)
+
+            for _ in range(self.random.randint(1, 2 * self.quizzes_per_company - 1)):
+                self.company_quizzes[company].append(len(self.quizzes))
+                self.quizzes.append((company, self.questions_per_quiz))
+
+    def user_rows(self) -> Iterator[Tuple]:
+        for index in range(self.users):
+            created_at = self.timestamp()
+            yield entity_id("users", index), f"user{index}@example.com", f"User{index}", True, False, \
+                created_at, created_at
+
+    def company_rows(self) -> Iterator[Tuple]:
+        for index, owner in enumerate(self.owners):
+            created_at = self.timestamp()
+            yield entity_id("companies", index), f"company{index}", self.random.random() < 0.8, created_at, \
+                created_at, entity_id("users", owner)
+
+    def member_rows(self) -> Iterator[Tuple]:
+        for company, user, is_admin in zip(self.member_companies, self.member_users, self.member_admins):
+            yield entity_id("companies", company), entity_id("users", user), bool(is_admin)
+
+    def quiz_rows(self) -> Iterator[Tuple]:
+        for index, (company, _) in enumerate(self.quizzes):
+            created_at = self.timestamp()
+            yield entity_id("quizzes", index), f"quiz{index}", entity_id("companies", company), created_at, created_at
+
+    def question_rows(self) -> Iterator[Tuple]:
+        index = 0
+
+        for quiz, (company, question_count) in enumerate(self.quizzes):
+            for _ in range(question_count):
+                created_at = self.timestamp()
+                yield entity_id("questions", index), f"question{index}", ANSWERS, [self.random.choice(ANSWERS)], \
+                    entity_id("quizzes", quiz), entity_id("companies", company), created_at, created_at
+                index += 1
+
+    def result_rows(self) -> Iterator[Tuple]:
+        index = 0
+
+        while index < self.results:
+            membership = self.random.randrange(len(self.member_users))
+            company, user = self.member_companies[membership], self.member_users[membership]
+            quizzes = self.company_quizzes[company]
+            # earlier quizzes of a company get most of the attempts
+            quiz = quizzes[min(int(self.random.expovariate(3 / len(quizzes))), len(quizzes) - 1)]
+            total_count = self.quizzes[quiz][1]
+            attempted_at = self.timestamp()
+
+            # a member retakes a quiz a geometric number of times, one in three never does
+            while index < self.results:
+                yield entity_id("results", index), entity_id("users", user), entity_id("companies", company), \
+                    entity_id("quizzes", quiz), attempted_at, self.random.randint(0, total_count), total_count
+                index += 1
+                attempted_at = min(attempted_at + timedelta(hours=self.random.expovariate(1 / 72)), self.now)
+
+                if self.random.random() < 0.35:
+                    break
+
+    def notification_rows(self) -> Iterator[Tuple]:
+        for index in range(self.notifications):
+            membership = self.random.randrange(len(self.member_users))
+            status = self.random.choice((None, None, True, True, False))
+            yield entity_id("notifications", index), entity_id("users", self.member_users[membership]), \
+                entity_id("companies", self.member_companies[membership]), status, f"notification{index}", \
+                self.timestamp()
+
+
+COPY_PLAN = (
+    (User.__table__, ["user_id", "user_email", "user_firstname", "user_status", "user_is_superuser",
+                      "user_created_at", "user_updated_at"], Dataset.user_rows),
+    (Company.__table__, ["company_id", "company_name", "company_is_visible", "company_created_at",
+                         "company_updated_at", "owner_id"], Dataset.company_rows),
+    (CompanyMembers.__table__, ["company_id", "user_id", "is_admin"], Dataset.member_rows),
+    (Quiz.__table__, ["quiz_id", "quiz_name", "company_id", "quiz_created_at", "quiz_updated_at"],
+     Dataset.quiz_rows),
+    (Question.__table__, ["question_id", "question_text", "question_answers", "question_correct_answer",
+                          "quiz_id", "question_company_id", "question_created_at", "question_updated_at"],
+     Dataset.question_rows),
+    (Result.__table__, ["result_id", "result_user_id", "result_company_id", "result_quiz_id", "result_created_at",
+                        "result_right_count", "result_total_count"], Dataset.result_rows),
+    (Notification.__table__, ["notification_id", "user_id", "company_id", "notification_status",
+                              "notification_text", "notification_created_at"], Dataset.notification_rows),
+)
+
+BACKFILL_NOTIFICATION_COUNTERS = text(
+    "INSERT INTO notification_counters (user_id, unread_count) "
+    "SELECT user_id, count(*) FILTER (WHERE notification_status IS NULL) FROM company_notifications "
+    "GROUP BY user_id")
+
+
+async def recreate_schema(engine: AsyncEngine):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+        for table in BULK_TABLES:
+            for index in table.indexes:
+                await connection.run_sync(index.drop)
+
+
+async def copy_rows(engine: AsyncEngine, dataset: Dataset) -> Dict[str, int]:
+    counts = {}
+
+    async with engine.connect() as connection:
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        for table, columns, rows in COPY_PLAN:
+            started = time.perf_counter()
+            status = await driver_connection.copy_records_to_table(table.name, records=rows(dataset),
+                                                                   columns=columns)
+            counts[table.name] = int(status.split()[-1])
+            elapsed = time.perf_counter() - started
+            print(f"Copied {counts[table.name]:>10} rows into {table.name:<22} in {elapsed:.1f}s")
+
+    return counts
+
+
+async def finish_load(engine: AsyncEngine):
+    async with engine.begin() as connection:
+        for table in BULK_TABLES:
+            for index in table.indexes:
+                await connection.run_sync(index.create)
+
+    async with AsyncSession(engine) as session:
+        await backfill_result_rollups(session)
+        await session.execute(BACKFILL_NOTIFICATION_COUNTERS)
+        await session.commit()
+
+    async with engine.begin() as connection:
+        await connection.execute(text("ANALYZE"))
+
+
+async def seed_dataset(engine: AsyncEngine, dataset: Dataset, memberships_per_user: float = 1.5) -> Dict[str, int]:
+    dataset.plan(memberships_per_user)
+    await recreate_schema(engine)
+    counts = await copy_rows(engine, dataset)
+    started = time.perf_counter()
+    await finish_load(engine)
+    print(f"Built indexes, rollups and counters in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def dataset_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--memberships-per-user", type=float, default=1.5)
+    parser.add_argument("--quizzes-per-company", type=int, default=5)
+    parser.add_argument("--questions-per-quiz", type=int, default=10)
+    parser.add_argument("--notifications", type=int, default=50000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the company sizes")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=Settings.TEST_DB_URL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset_arguments(parser)
+    parser.add_argument("--results", type=int, default=100000)
+    args = parser.parse_args()
+
+    async def run():
+        engine = create_engine(args.database_url)
+
+        try:
+            await seed_dataset(engine, Dataset(args.users, args.companies, args.quizzes_per_company,
+                                               args.questions_per_quiz, args.results, args.notifications,
+                                               args.skew, args.days, args.seed), args.memberships_per_user)
+
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Signin throughput and event-loop latency during a burst of password verifications.
+
+Compares verifying on the event loop with the bounded password executor. A ticker coroutine
+sleeps for --tick-ms and records how late it wakes up, which is the delay every other request
+on the worker would see.
+
+Usage: python -m benchmarks.password_hashing [--burst 32] [--rounds 12]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from passlib.context import CryptContext
+from app.core.config import Settings
+from app.utils import security
+from app.utils.security import Hasher, close_password_executor
+
+
+async def verify_inline(password: str, hashed_password: str) -> bool:
+    return security.password_context.verify(password, hashed_password)
+
+
+async def measure_loop_lag(stop: asyncio.Event, tick: float, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append((time.perf_counter() - started - tick) * 1000)
+
+
+async def measure(verify, hashed_password: str, burst: int, tick: float):
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_loop_lag(stop, tick, lags))
+    await asyncio.sleep(tick)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[verify("PassWord123", hashed_password) for _ in range(burst)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    lags.sort()
+    return burst / elapsed, statistics.median(lags), lags[int(len(lags) * 0.99)], lags[-1]
+
+
+async def run(burst: int, rounds: int, tick_ms: float):
+    security.password_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    hashed_password = await Hasher.get_password_hash("PassWord123")
+    print(f"burst={burst} rounds={rounds} workers={Settings.PASSWORD_HASH_WORKERS}")
+    print(f"{'mode':>10} {'signins/s':>10} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+
+    for mode, verify in (("inline", verify_inline), ("executor", Hasher.verify_password)):
+        throughput, p50, p99, worst = await measure(verify, hashed_password, burst, tick_ms / 1000)
+        print(f"{mode:>10} {throughput:>10.1f} {p50:>11.2f} {p99:>11.2f} {worst:>11.2f}")
+
+    close_password_executor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=Settings.PASSWORD_HASH_ROUNDS)
+    parser.add_argument("--tick-ms", type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.burst, args.rounds, args.tick_ms))
+
+
+if __name__ == "__main__":
+    main()
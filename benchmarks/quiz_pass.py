@@ -0,0 +1,67 @@
+"""Redis write latency of a quiz submission as the number of questions grows.
+
+Usage: python -m benchmarks.quiz_pass [--sizes 5 10 25 50 100] [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from app.db.db import get_redis, close_redis
+from app.services.quizzes import ANSWER_TTL, answer_redis_key, store_quiz_answers
+
+
+def make_answers(question_count: int):
+    quiz_id, user_id, company_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    return [{
+        "user_id": user_id,
+        "company_id": company_id,
+        "quiz_id": quiz_id,
+        "question_id": str(uuid.uuid4()),
+        "user_answer": "yes",
+        "is_correct": True,
+    } for _ in range(question_count)]
+
+
+async def store_sequential(redis_client, answers):
+    for answer in answers:
+        redis_key = answer_redis_key(answer["quiz_id"], answer["user_id"], answer["question_id"])
+        await redis_client.get(redis_key)
+        await redis_client.setex(redis_key, ANSWER_TTL, json.dumps(answer))
+
+
+async def measure(store, redis_client, question_count: int, repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat):
+        answers = make_answers(question_count)
+        started = time.perf_counter()
+        await store(redis_client, answers)
+        timings.append(time.perf_counter() - started)
+
+    return statistics.median(timings) * 1000
+
+
+async def run(sizes, repeat):
+    redis_client = await get_redis()
+    print(f"{'questions':>10} {'sequential ms':>15} {'pipelined ms':>14} {'speedup':>8}")
+
+    for size in sizes:
+        sequential = await measure(store_sequential, redis_client, size, repeat)
+        pipelined = await measure(store_quiz_answers, redis_client, size, repeat)
+        print(f"{size:>10} {sequential:>15.3f} {pipelined:>14.3f} {sequential / pipelined:>7.1f}x")
+
+    await close_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 25, 50, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Latency and peak memory of every ResultService endpoint as the results table grows.
+
+For each --scales size a dataset is seeded with benchmarks.dataset, with users, companies and notifications
+scaled along with the results. The endpoints then run against the largest company, its owner, the member
+with the most attempts there and that company's most attempted quiz. Peak memory is the tracemalloc
+high-water mark of one extra call, kept out of the timed runs because tracing slows them down. The JSON
+report has the same layout as benchmarks.suite, so benchmarks.compare works on it too.
+
+Usage: python -m benchmarks.scale [--scales 10000 1000000 10000000] [--repeat 10] [--output scale.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import tracemalloc
+from datetime import datetime
+from typing import Dict
+from fakeredis import aioredis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from app.core.config import Settings
+from app.core.logging import init_logging, close_logging
+from app.db import db
+from app.db.db import create_engine
+from app.db.instrumentation import instrument_engine
+from app.services.results import ResultService
+from benchmarks.dataset import Dataset, seed_dataset
+from benchmarks.suite import Run, git_commit, measure
+
+TARGETS_QUERY = text(
+    "WITH company AS ("
+    "  SELECT companies.company_id, companies.owner_id FROM companies "
+    "  JOIN company_members ON company_members.company_id = companies.company_id "
+    "  GROUP BY companies.company_id ORDER BY count(*) DESC LIMIT 1) "
+    "SELECT company.company_id, company.owner_id, "
+    "  (SELECT user_id FROM result_rollups WHERE result_rollups.company_id = company.company_id "
+    "   GROUP BY user_id ORDER BY sum(attempt_count) DESC LIMIT 1) AS user_id, "
+    "  (SELECT quiz_id FROM result_rollups WHERE result_rollups.company_id = company.company_id "
+    "   GROUP BY quiz_id ORDER BY sum(attempt_count) DESC LIMIT 1) AS quiz_id "
+    "FROM company")
+
+
+async def consume(response):
+    async for _ in response.body_iterator:
+        pass
+
+
+RESULT_ENDPOINTS = {
+    "user_result_company": lambda service, targets: service.user_result_company(
+        targets["company_id"], targets["user_id"], None, targets["owner_id"]),
+    "user_result_company.csv": lambda service, targets: service.user_result_company(
+        targets["company_id"], targets["user_id"], "csv", targets["owner_id"]),
+    "user_result_companies": lambda service, targets: service.user_result_companies(targets["user_id"], None),
+    "company_results": lambda service, targets: service.company_results(
+        targets["company_id"], None, targets["owner_id"]),
+    "all_users_results": lambda service, targets: service.all_users_results(),
+    "quiz_results_for_users": lambda service, targets: service.quiz_results_for_users(
+        targets["quiz_id"], targets["owner_id"], None),
+    "user_results_quizzes_over_times": lambda service, targets: service.user_results_quizzes_over_times(
+        targets["user_id"]),
+    "user_completed_quizzes": lambda service, targets: service.user_completed_quizzes(
+        targets["user_id"], targets["user_id"]),
+    "company_average_scores_over_times": lambda service, targets: service.company_average_scores_over_times(
+        targets["company_id"], targets["owner_id"]),
+    "company_user_average_scores_over_times": lambda service, targets: service.company_average_scores_over_times(
+        targets["company_id"], targets["owner_id"], targets["user_id"]),
+    "company_last_attempt_times": lambda service, targets: service.company_last_attempt_times(
+        targets["company_id"], targets["owner_id"]),
+}
+
+
+def endpoint_run(name: str, targets: Dict[str, str]) -> Run:
+    async def run(session: AsyncSession):
+        response = await RESULT_ENDPOINTS[name](ResultService(session), targets)
+
+        # exports only do their work while the body is read
+        if hasattr(response, "body_iterator"):
+            await consume(response)
+
+    return run
+
+
+async def peak_memory(session_factory, run: Run) -> int:
+    tracemalloc.start()
+
+    try:
+        async with session_factory() as session:
+            await run(session)
+
+        return tracemalloc.get_traced_memory()[1]
+
+    finally:
+        tracemalloc.stop()
+
+
+def scaled_dataset(results: int, args) -> Dataset:
+    users = max(100, results // args.results_per_user)
+    return Dataset(users, max(10, users // args.users_per_company), args.quizzes_per_company,
+                   args.questions_per_quiz, results, results // 10, args.skew, args.days, args.seed)
+
+
+async def run(args) -> Dict:
+    init_logging()
+    engine = instrument_engine(create_engine(Settings.TEST_DB_URL))
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    db.redis_client = aioredis.FakeRedis()
+    results = []
+    print(f"{'endpoint':<40} {'results':>10} {'median ms':>10} {'p95 ms':>9} {'queries':>8} {'peak KiB':>9}")
+
+    try:
+        for scale in args.scales:
+            await seed_dataset(engine, scaled_dataset(scale, args))
+
+            async with engine.connect() as connection:
+                row = (await connection.execute(TARGETS_QUERY)).one()
+
+            targets = {key: str(value) for key, value in row._mapping.items()}
+
+            for name in RESULT_ENDPOINTS:
+                run_endpoint = endpoint_run(name, targets)
+                result = {"case": f"results.{name}", "params": {"results": scale},
+                          **await measure(session_factory, run_endpoint, args.repeat, args.warmup),
+                          "peak_memory_kib": await peak_memory(session_factory, run_endpoint) / 1024}
+                results.append(result)
+                print(f"{name:<40} {scale:>10} {result['median_ms']:>10.2f} {result['p95_ms']:>9.2f} "
+                      f"{result['queries']:>8.1f} {result['peak_memory_kib']:>9.0f}")
+
+    finally:
+        await db.redis_client.close()
+        db.redis_client = None
+        await engine.dispose()
+        close_logging()
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "redis": "fakeredis",
+            "warmup": args.warmup,
+            # ru_maxrss is in KiB on Linux, the whole run including seeding
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--results-per-user", type=int, default=20)
+    parser.add_argument("--users-per-company", type=int, default=50)
+    parser.add_argument("--quizzes-per-company", type=int, default=5)
+    parser.add_argument("--questions-per-quiz", type=int, default=10)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output", default="scale.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Service-layer benchmark suite, written to JSON so runs can be compared between builds.
+
+Runs against POSTGRES_TEST_DB, whose tables are dropped and recreated for every case and size, and
+against an in-process fakeredis unless --redis-url is given. Every measured call gets its own session,
+like a request does, and records how many SQL statements it ran.
+
+Usage: python -m benchmarks.suite [--cases quiz_pass results auth hasher notifications] [--repeat 20]
+                                  [--sizes questions=5,20,100 members=100,1000] [--output bench.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Tuple
+from fakeredis import aioredis
+from redis.asyncio import Redis
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from app.core.config import Settings
+from app.core.logging import init_logging, close_logging
+from app.db import db
+from app.db.db import Base, create_engine
+from app.db.instrumentation import instrument_engine, track_queries
+from app.db.models import User, Company, CompanyMembers, Quiz, Question, Result
+from app.schemas.quiz import QuizPass
+from app.services.auth import AuthService
+from app.services.notifications import NotificationService
+from app.services.quizzes import QuizService
+from app.services.results import ResultService
+from app.services.rollups import backfill_result_rollups
+from app.utils.security import Hasher, create_access_token, close_password_executor
+
+Run = Callable[[AsyncSession], Awaitable]
+
+RESULT_AGGREGATIONS = {
+    "user_result_companies": lambda service, data: service.user_result_companies(data["user_id"], None),
+    "user_completed_quizzes": lambda service, data: service.user_completed_quizzes(data["user_id"], data["user_id"]),
+    "user_results_quizzes_over_times": lambda service, data: service.user_results_quizzes_over_times(
+        data["user_id"]),
+    "company_results": lambda service, data: service.company_results(data["company_id"], None, data["owner_id"]),
+    "company_average_scores_over_times": lambda service, data: service.company_average_scores_over_times(
+        data["company_id"], data["owner_id"]),
+    "quiz_results_for_users": lambda service, data: service.quiz_results_for_users(
+        data["quiz_id"], data["owner_id"], None),
+}
+
+
+async def reset_schema(engine):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+
+async def seed_company(session: AsyncSession, members: int = 1, quizzes: int = 1, questions: int = 2) -> Dict:
+    user_ids = [uuid.uuid4() for _ in range(members)]
+    company_id, quiz_ids = uuid.uuid4(), [uuid.uuid4() for _ in range(quizzes)]
+
+    await session.execute(insert(User), [{"user_id": user_id, "user_email": f"{user_id}@example.com"}
+                                         for user_id in user_ids])
+    await session.execute(insert(Company), [{"company_id": company_id, "company_name": str(company_id),
+                                             "owner_id": user_ids[0]}])
+    await session.execute(insert(CompanyMembers), [{"company_id": company_id, "user_id": user_id,
+                                                    "is_admin": index == 0}
+                                                   for index, user_id in enumerate(user_ids)])
+    await session.execute(insert(Quiz), [{"quiz_id": quiz_id, "quiz_name": str(quiz_id), "company_id": company_id}
+                                         for quiz_id in quiz_ids])
+    await session.execute(insert(Question), [{"question_text": str(uuid.uuid4()), "question_answers": ["a", "b"],
+                                              "question_correct_answer": ["a"], "quiz_id": quiz_id,
+                                              "question_company_id": company_id}
+                                             for quiz_id in quiz_ids for _ in range(questions)])
+    await session.commit()
+    return {"owner_id": str(user_ids[0]), "user_id": str(user_ids[-1]), "user_ids": user_ids,
+            "company_id": str(company_id), "quiz_id": str(quiz_ids[0]), "quiz_ids": quiz_ids}
+
+
+async def setup_quiz_pass(session: AsyncSession, questions: int) -> Run:
+    data = await seed_company(session, members=2, questions=questions)
+    quiz_data = QuizPass(answers=["a" if index % 2 else "b" for index in range(questions)])
+    return lambda run_session: QuizService(run_session).quiz_pass(data["quiz_id"], quiz_data, data["user_id"])
+
+
+def results_setup(aggregation: str):
+    async def setup(session: AsyncSession, results: int) -> Run:
+        data = await seed_company(session, members=10, quizzes=10)
+        started_at = datetime.utcnow() - timedelta(days=30)
+        # every member has the same number of results, spread over the quizzes and the last month
+        await session.execute(insert(Result), [{
+            "result_user_id": user_id, "result_company_id": data["company_id"],
+            "result_quiz_id": data["quiz_ids"][index % len(data["quiz_ids"])],
+            "result_right_count": index % 3, "result_total_count": 2,
+            "result_created_at": started_at + timedelta(minutes=index),
+        } for user_id in data["user_ids"] for index in range(results)])
+        await session.commit()
+        await backfill_result_rollups(session)
+        return lambda run_session: RESULT_AGGREGATIONS[aggregation](ResultService(run_session), data)
+
+    return setup
+
+
+async def setup_auth(session: AsyncSession, users: int) -> Run:
+    data = await seed_company(session, members=users)
+    tokens = [await create_access_token({"sub": f"{user_id}@example.com", "user_id": str(user_id)},
+                                        timedelta(minutes=Settings.ACCESS_TOKEN_EXPIRY_TIME), Settings.ALGORITHM)
+              for user_id in data["user_ids"]]
+    calls = itertools.count()
+    return lambda run_session: AuthService.get_current_user(tokens[next(calls) % len(tokens)], run_session)
+
+
+async def setup_hasher(session: AsyncSession, concurrency: int) -> Run:
+    hashed_password = await Hasher.get_password_hash("PassWord123")
+    return lambda run_session: asyncio.gather(*[Hasher.verify_password("PassWord123", hashed_password)
+                                                for _ in range(concurrency)])
+
+
+async def setup_notifications(session: AsyncSession, members: int) -> Run:
+    data = await seed_company(session, members=members)
+    return lambda run_session: NotificationService(run_session).create_quiz_notifications(
+        data["company_id"], "benchmark")
+
+
+# case name -> (size parameter, default sizes, setup)
+CASES: Dict[str, Tuple[str, List[int], Callable]] = {
+    "quiz_pass": ("questions", [5, 20, 100], setup_quiz_pass),
+    **{f"results.{aggregation}": ("results_per_user", [10, 100, 1000], results_setup(aggregation))
+       for aggregation in RESULT_AGGREGATIONS},
+    "auth.get_current_user": ("users", [1, 100], setup_auth),
+    "hasher.verify_password": ("concurrency", [1, 8], setup_hasher),
+    "notifications.create_quiz_notifications": ("members", [100, 1000, 10000], setup_notifications),
+}
+
+
+async def measure(session_factory, run: Run, repeat: int, warmup: int) -> Dict:
+    timings, queries = [], []
+
+    for iteration in range(warmup + repeat):
+        async with session_factory() as session:
+            with track_queries() as stats:
+                started = time.perf_counter()
+                await run(session)
+                elapsed = time.perf_counter() - started
+
+        if iteration >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(stats.count)
+
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": timings[0],
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "mean_ms": statistics.fmean(timings),
+        "queries": statistics.fmean(queries),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_sizes(values: List[str]) -> Dict[str, List[int]]:
+    sizes = {}
+
+    for value in values:
+        name, _, numbers = value.partition("=")
+        sizes[name] = [int(number) for number in numbers.split(",")]
+
+    return sizes
+
+
+def selected_cases(prefixes: List[str]) -> List[str]:
+    return [name for name in CASES if not prefixes or any(name.split(".")[0] == prefix or name == prefix
+                                                          for prefix in prefixes)]
+
+
+async def run(case_names: List[str], sizes: Dict[str, List[int]], repeat: int, warmup: int, redis_url: str) -> Dict:
+    # service logs go to stderr, or LOG_FILE when it is set, so they stay out of the table on stdout
+    init_logging()
+    engine = instrument_engine(create_engine(Settings.TEST_DB_URL))
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    db.redis_client = Redis.from_url(redis_url) if redis_url else aioredis.FakeRedis()
+    results = []
+    print(f"{'case':<45} {'size':>22} {'median ms':>10} {'p95 ms':>9} {'queries':>8}")
+
+    try:
+        for name in case_names:
+            parameter, default_sizes, setup = CASES[name]
+
+            for size in sizes.get(parameter, default_sizes):
+                await reset_schema(engine)
+                await db.redis_client.flushdb()
+
+                async with session_factory() as session:
+                    run_case = await setup(session, size)
+
+                result = {"case": name, "params": {parameter: size},
+                          **await measure(session_factory, run_case, repeat, warmup)}
+                results.append(result)
+                print(f"{name:<45} {f'{parameter}={size}':>22} {result['median_ms']:>10.2f} "
+                      f"{result['p95_ms']:>9.2f} {result['queries']:>8.1f}")
+
+    finally:
+        await db.redis_client.close()
+        db.redis_client = None
+        await engine.dispose()
+        close_password_executor()
+        close_logging()
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "redis": redis_url or "fakeredis",
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="*", default=[], help="case names or groups, e.g. results quiz_pass")
+    parser.add_argument("--sizes", nargs="*", default=[], help="parameter=comma separated sizes")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--output", default="bench.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(selected_cases(args.cases), parse_sizes(args.sizes), args.repeat, args.warmup,
+                             args.redis_url))
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
+from contextlib import contextmanager
 import pytest
+import pytest_asyncio
+from fakeredis import FakeServer, aioredis
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
 from app.core.config import Settings
+from app.db.db import Base
+from app.db.instrumentation import track_queries
 from app.main import app
+from app.services import answer_keys, notification_stream, permissions, quiz_content, quizzes, results
+
+# every module that imported get_redis directly, they keep their own reference to it
+REDIS_MODULES = (answer_keys, notification_stream, permissions, quiz_content, quizzes, results)
 
 
 @pytest.fixture
@@ -15,3 +25,50 @@ async def test_db():
     engine = create_async_engine(Settings.TEST_DB_URL, echo=True, future=True)
     async with AsyncSession(engine) as session:
         yield session
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis_client = aioredis.FakeRedis(server=FakeServer())
+
+    async def get_fake_redis():
+        return redis_client
+
+    for module in REDIS_MODULES:
+        monkeypatch.setattr(module, "get_redis", get_fake_redis)
+
+    return redis_client
+
+
+@pytest_asyncio.fixture
+async def db_engine():
+    # a fresh schema in POSTGRES_TEST_DB, tests that need real constraints skip without it
+    engine = create_async_engine(Settings.TEST_DB_URL, poolclass=NullPool)
+
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Test database is not available: {e}")
+
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def query_budget():
+    # only counts statements on instrumented engines that run in the test's own task, so use it around
+    # service calls or an httpx AsyncClient rather than the threaded TestClient
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = Settings.QUERY_REPEAT_THRESHOLD):
+        with track_queries() as stats:
+            yield stats
+
+        shapes = "\n".join(f"{count} x {shape}" for shape, count in stats.shapes.most_common())
+        assert stats.count <= max_queries, f"{stats.count} statements, budget is {max_queries}:\n{shapes}"
+        assert not stats.repeated(max_repeats), f"statements repeated more than {max_repeats} times:\n{shapes}"
+
+    return budget
@@ -0,0 +1,130 @@
+import uuid
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import Settings
+from app.db.models import User, Company, CompanyMembers, Quiz, Question
+from app.depends.exceptions import ErrorUpdatingQuestion
+from app.schemas.quiz import QuestionUpdate
+from app.services import answer_keys, questions
+from app.services.answer_keys import build_answer_key, get_answer_key
+from app.services.questions import QuestionService
+from app.services.quiz_versions import VersionedCache, bump_quiz_versions
+
+QUIZ_ID = "quiz"
+
+
+class QuestionSession:
+    def __init__(self, correct_answers):
+        self.correct_answers = correct_answers
+        self.queries = 0
+
+    async def scalars(self, statement):
+        self.queries += 1
+        questions = [SimpleNamespace(quiz_id=QUIZ_ID, question_id=index, question_correct_answer=correct_answers)
+                     for index, correct_answers in enumerate(self.correct_answers)]
+        return SimpleNamespace(all=lambda: questions)
+
+
+def new_cache():
+    return VersionedCache(Settings.ANSWER_KEY_CACHE_SIZE, Settings.ANSWER_KEY_CACHE_TTL)
+
+
+def quiz_at(version: int):
+    return SimpleNamespace(quiz_id=QUIZ_ID, quiz_content_version=version)
+
+
+@pytest.fixture(autouse=True)
+def empty_answer_key_cache(monkeypatch):
+    monkeypatch.setattr(answer_keys, "answer_key_cache", new_cache())
+
+
+def test_answer_key_is_normalized_and_ordered():
+    answer_key = build_answer_key([SimpleNamespace(question_id=1, question_correct_answer=["Yes", "OK"]),
+                                   SimpleNamespace(question_id=2, question_correct_answer=["no"])])
+
+    assert answer_key == (("1", ("yes", "ok"), frozenset({"yes", "ok"})), ("2", ("no",), frozenset({"no"})))
+
+
+@pytest.mark.asyncio
+async def test_answer_key_is_built_once_and_shared_through_redis(fake_redis, monkeypatch):
+    session = QuestionSession([["A"], ["b"]])
+
+    assert await get_answer_key(session, quiz_at(0)) == await get_answer_key(session, quiz_at(0))
+    assert session.queries == 1
+
+    # another worker starts with an empty process cache but finds the compiled key in redis
+    monkeypatch.setattr(answer_keys, "answer_key_cache", new_cache())
+    answer_key = await get_answer_key(QuestionSession([]), quiz_at(0))
+
+    assert [correct_set for _, _, correct_set in answer_key] == [frozenset({"a"}), frozenset({"b"})]
+
+
+@pytest.mark.asyncio
+async def test_new_version_reaches_other_workers(fake_redis):
+    await get_answer_key(QuestionSession([["a"], ["b"]]), quiz_at(0))
+    session = QuestionSession([["c"], ["d"]])
+
+    assert [correct_set for _, _, correct_set in await get_answer_key(session, quiz_at(1))] == [frozenset({"c"}),
+                                                                                                 frozenset({"d"})]
+    assert session.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_falls_back_to_database(monkeypatch):
+    async def broken_redis():
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(answer_keys, "get_redis", broken_redis)
+    monkeypatch.setattr(answer_keys, "answer_key_cache", new_cache())
+    session = QuestionSession([["a"], ["b"]])
+
+    assert len(await get_answer_key(session, quiz_at(0))) == 2
+    assert len(await get_answer_key(session, quiz_at(0))) == 2
+    assert session.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_version_bump_rolls_back_the_question_change(db_engine, fake_redis, monkeypatch):
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        user = User(user_email=f"{uuid.uuid4()}@example.com")
+        session.add(user)
+        await session.flush()
+        company = Company(company_name=str(uuid.uuid4()), owner_id=user.user_id)
+        session.add(company)
+        await session.flush()
+        quiz = Quiz(quiz_name=str(uuid.uuid4()), company_id=company.company_id)
+        session.add_all([CompanyMembers(company_id=company.company_id, user_id=user.user_id, is_admin=True), quiz])
+        await session.flush()
+        question = Question(question_text="old", question_answers=["a", "b"], question_correct_answer=["a"],
+                            quiz_id=quiz.quiz_id, question_company_id=company.company_id)
+        session.add(question)
+        await session.commit()
+
+    async with AsyncSession(db_engine) as session:
+        await get_answer_key(session, await session.get(Quiz, quiz.quiz_id))
+
+    async def failing_bump(session, *quiz_ids):
+        raise ConnectionError("bump failed")
+
+    monkeypatch.setattr(questions, "bump_quiz_versions", failing_bump)
+
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        with pytest.raises(ErrorUpdatingQuestion):
+            await QuestionService(session).update(str(question.question_id), QuestionUpdate(question_text="new"),
+                                                  str(user.user_id))
+
+    # nothing was committed, so the answer key cached under the unchanged version is still right
+    async with AsyncSession(db_engine) as session:
+        assert await session.scalar(select(Question.question_text)) == "old"
+        assert await session.scalar(select(Quiz.quiz_content_version)) == 0
+
+    monkeypatch.setattr(questions, "bump_quiz_versions", bump_quiz_versions)
+
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        await QuestionService(session).update(str(question.question_id), QuestionUpdate(question_text="new"),
+                                              str(user.user_id))
+
+    async with AsyncSession(db_engine) as session:
+        assert await session.scalar(select(Quiz.quiz_content_version)) == 1
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import Settings
+from app.db import db
+from app.db.db import get_db, get_pool_status, get_redis, close_redis, get_redis_pool_status
+
+
+@pytest.mark.asyncio
+async def test_get_db_yields_session_per_request():
+    first = get_db()
+    second = get_db()
+    first_session = await first.__anext__()
+    second_session = await second.__anext__()
+
+    assert isinstance(first_session, AsyncSession)
+    assert first_session is not second_session
+
+    await first.aclose()
+    await second.aclose()
+
+
+def test_pool_status():
+    status = get_pool_status()
+    assert status["pool_size"] == Settings.DB_POOL_SIZE
+    assert status["max_overflow"] == Settings.DB_MAX_OVERFLOW
+    assert status["checked_out"] == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_client_is_shared():
+    client = await get_redis()
+    assert client is await get_redis()
+    assert client.connection_pool is db.redis_pool
+
+    status = get_redis_pool_status()
+    assert status["max_connections"] == Settings.REDIS_MAX_CONNECTIONS
+    assert status["live"] == 0
+
+    await close_redis()
+    assert db.redis_client is None
@@ -0,0 +1,40 @@
+import json
+import pytest
+from app.depends.exceptions import InvalidExportFormat
+from app.utils.export import export_response
+
+rows = [
+    {"user_id": "u1", "company_id": "c1", "quiz_id": "q1", "question_id": "a", "user_answer": "yes",
+     "is_correct": True, "status": "ok"},
+    {"user_id": "u1", "company_id": "c1", "quiz_id": "q1", "question_id": "b", "user_answer": None,
+     "is_correct": None, "status": "missing"},
+]
+
+
+async def iterate(items):
+    for item in items:
+        yield item
+
+
+async def read_body(items, export_format):
+    response = export_response(iterate(items), export_format, "results")
+    return "".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.mark.asyncio
+async def test_export_json_and_ndjson():
+    assert json.loads(await read_body(rows, "JSON")) == rows
+    assert json.loads(await read_body([], "json")) == []
+    assert [json.loads(line) for line in (await read_body(rows, "ndjson")).splitlines()] == rows
+
+
+@pytest.mark.asyncio
+async def test_export_csv():
+    lines = (await read_body(rows, "csv")).splitlines()
+    assert lines[0] == "user_id,company_id,quiz_id,question_id,user_answer,is_correct,status"
+    assert lines[1:] == ["u1,c1,q1,a,yes,True,ok", "u1,c1,q1,b,,,missing"]
+
+
+def test_export_invalid_format():
+    with pytest.raises(InvalidExportFormat):
+        export_response(iterate(rows), "xml", "results")
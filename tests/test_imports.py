@@ -0,0 +1,49 @@
+import io
+import json
+import pytest
+from starlette.datastructures import UploadFile, Headers
+from app.depends.exceptions import InvalidQuestionImport
+from app.utils import imports
+from app.utils.imports import read_import_file
+
+QUESTIONS = [{"question_text": f"Question {index}", "question_answers": ["Yes", "No"],
+              "question_correct_answer": ["Yes"]} for index in range(5)]
+
+
+def upload(body: bytes, filename: str, content_type: str) -> UploadFile:
+    return UploadFile(io.BytesIO(body), filename=filename, headers=Headers({"content-type": content_type}))
+
+
+@pytest.mark.asyncio
+async def test_ndjson_lines_split_across_reads(monkeypatch):
+    monkeypatch.setattr(imports, "IMPORT_READ_SIZE", 7)
+    body = b"\n".join(json.dumps(question).encode() for question in QUESTIONS) + b"\n\n{broken"
+
+    items = await read_import_file(upload(body, "questions.ndjson", "application/octet-stream"), max_items=100)
+
+    assert items[:5] == QUESTIONS
+    assert isinstance(items[5], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_ndjson_stops_reading_past_the_limit():
+    body = b"\n".join(json.dumps(question).encode() for question in QUESTIONS * 20)
+
+    items = await read_import_file(upload(body, "questions", "application/x-ndjson"), max_items=3)
+
+    assert 3 < len(items) < 100
+
+
+@pytest.mark.asyncio
+async def test_json_array_file():
+    items = await read_import_file(upload(json.dumps(QUESTIONS).encode(), "questions.json", "application/json"),
+                                   max_items=100)
+
+    assert items == QUESTIONS
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [b"{broken", json.dumps(QUESTIONS[0]).encode()])
+async def test_json_file_must_be_an_array(body):
+    with pytest.raises(InvalidQuestionImport):
+        await read_import_file(upload(body, "questions.json", "application/json"), max_items=100)
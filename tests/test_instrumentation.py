@@ -0,0 +1,76 @@
+import logging
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import create_engine, event, text
+from app.core.config import Settings
+from app.core.metrics import db_queries_per_request, db_repeated_statements_total
+from app.db.instrumentation import QueryCounterMiddleware, QueryStats, after_cursor_execute, before_cursor_execute, \
+    statement_shape, track_queries
+
+# in-memory sqlite with the same cursor listeners instrument_engine installs, so no database server is needed
+engine = create_engine("sqlite://")
+event.listen(engine, "before_cursor_execute", before_cursor_execute)
+event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+app = FastAPI()
+app.add_middleware(QueryCounterMiddleware, header_enabled=True)
+
+
+@app.get("/quizzes/{quiz_id}/questions")
+async def list_questions(quiz_id: int):
+    with engine.connect() as connection:
+        for question_id in range(Settings.QUERY_REPEAT_THRESHOLD + 1):
+            connection.execute(text("SELECT :question_id"), {"question_id": question_id})
+
+        connection.execute(text("SELECT :quiz_id AS quiz_id"), {"quiz_id": quiz_id})
+
+    return {"quiz_id": quiz_id}
+
+
+@app.get("/quizzes/{quiz_id}")
+async def get_quiz(quiz_id: int):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    return {"quiz_id": quiz_id}
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT * FROM results\n WHERE id IN ($1::UUID, $2::UUID, $3::UUID)") == \
+        statement_shape("SELECT * FROM results WHERE id IN ($4::UUID)")
+
+
+def test_repeated_statements_are_flagged_and_nested_tracking_merges():
+    with track_queries() as outer:
+        with track_queries() as inner:
+            for index in range(7):
+                inner.record(f"SELECT * FROM questions WHERE quiz_id = ${index + 1}", 0.001)
+
+            inner.record("SELECT * FROM quizzes WHERE quiz_id = $1", 0.001)
+
+    assert outer.count == 8
+    assert outer.repeated(5) == [("SELECT * FROM questions WHERE quiz_id = ?", 7)]
+    assert "repeated=1" in outer.header()
+    assert QueryStats().repeated() == []
+
+
+@pytest.mark.asyncio
+async def test_middleware_counts_queries_per_request_and_warns_on_repeats(caplog):
+    route = "/quizzes/{quiz_id}/questions"
+    observed = (db_queries_per_request.values.get((route,)) or [0])[-1]
+    repeated = db_repeated_statements_total.values.get((route,), 0)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        with caplog.at_level(logging.WARNING):
+            response = await client.get("/quizzes/1/questions")
+            single = await client.get("/quizzes/1")
+
+    assert response.headers["x-db-queries"].startswith(f"count={Settings.QUERY_REPEAT_THRESHOLD + 2};")
+    assert response.headers["x-db-queries"].endswith("repeated=1")
+    assert single.headers["x-db-queries"].startswith("count=1;")
+    assert db_queries_per_request.values[(route,)][-1] == observed + Settings.QUERY_REPEAT_THRESHOLD + 2
+    assert db_repeated_statements_total.values[(route,)] == repeated + 1
+    assert [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING] == [
+        f"Statement ran {Settings.QUERY_REPEAT_THRESHOLD + 1} times in one request to {route}, "
+        f"possible N+1: SELECT ?"]
@@ -0,0 +1,63 @@
+import json
+import logging
+import queue
+from app.core.config import Settings
+from app.core.logging import JsonFormatter, NonBlockingQueueHandler, SamplingFilter, parse_log_levels, \
+    create_log_handler
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord("app.test", logging.DEBUG, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampling_filter_keeps_one_in_every_sampled_message():
+    sampling_filter = SamplingFilter(10)
+    kept = [sampling_filter.filter(make_record("Redis key: %s", index, sampled=True)) for index in range(25)]
+
+    assert kept.count(True) == 3
+    assert all(sampling_filter.filter(make_record("Quiz created")) for _ in range(25))
+
+
+def test_json_formatter_renders_message_and_extras():
+    payload = json.loads(JsonFormatter().format(make_record("Passed %s attempts", 3, quiz_id="quiz", sampled=True)))
+
+    assert payload["message"] == "Passed 3 attempts"
+    assert payload["level"] == "DEBUG"
+    assert payload["logger"] == "app.test"
+    assert payload["quiz_id"] == "quiz"
+    assert "sampled" not in payload
+
+
+def test_queue_handler_drops_records_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    record = make_record("Redis key: %s", "key")
+
+    handler.handle(record)
+    handler.handle(make_record("Redis key: %s", "other"))
+
+    assert handler.dropped == 1
+    # formatting is left to the listener thread
+    assert handler.queue.get_nowait() is record
+    assert record.args == ("key",)
+
+
+def test_parse_log_levels():
+    assert parse_log_levels("sqlalchemy.engine=info, app.services = DEBUG,") == {
+        "sqlalchemy.engine": "INFO", "app.services": "DEBUG"}
+    assert parse_log_levels("") == {}
+
+
+def test_logs_go_to_stderr_unless_a_file_is_set(monkeypatch, tmp_path):
+    monkeypatch.setattr(Settings, "LOG_FILE", "")
+    assert type(create_log_handler()) is logging.StreamHandler
+
+    monkeypatch.setattr(Settings, "LOG_FILE", str(tmp_path / "app.log"))
+    handler = create_log_handler()
+
+    try:
+        assert isinstance(handler, logging.FileHandler)
+
+    finally:
+        handler.close()
@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from app.core.metrics import Histogram, MetricsMiddleware, http_requests_total, track_dependency
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware, server_timing_enabled=True)
+
+
+@app.get("/quizzes/{quiz_id}")
+async def get_quiz(quiz_id: str):
+    with track_dependency("db"):
+        pass
+
+    with track_dependency("redis"):
+        pass
+
+    return {"quiz_id": quiz_id}
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe("/quizzes", value=value)
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{route="/quizzes",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/quizzes",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/quizzes",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/quizzes"} 4' in lines
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_route_template_and_server_timing():
+    matched = http_requests_total.values.get(("GET", "/quizzes/{quiz_id}", "200"), 0)
+    unmatched = http_requests_total.values.get(("GET", "unmatched", "404"), 0)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/quizzes/1")
+        await client.get("/missing")
+
+    timings = dict(entry.split(";dur=") for entry in response.headers["server-timing"].split(", "))
+
+    assert set(timings) == {"db", "redis", "total"}
+    assert http_requests_total.values[("GET", "/quizzes/{quiz_id}", "200")] == matched + 1
+    assert http_requests_total.values[("GET", "unmatched", "404")] == unmatched + 1
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import logging
+import pytest
+from redis.asyncio import Redis
+from app.core.config import Settings
+from app.services import notification_stream
+from app.services.notification_stream import NotificationBroker, notification_channel, publish_notifications
+
+
+@pytest.mark.asyncio
+async def test_published_notifications_reach_only_the_recipients_streams(fake_redis):
+    broker = NotificationBroker()
+
+    try:
+        first_tab = await broker.subscribe("user")
+        second_tab = await broker.subscribe("user")
+        other_user = await broker.subscribe("other")
+        await publish_notifications([{"user_id": "user", "notification_text": "new quiz"}])
+
+        for queue in (first_tab, second_tab):
+            data = await asyncio.wait_for(queue.get(), timeout=1)
+            assert json.loads(data)["notification_text"] == "new quiz"
+
+        assert other_user.empty()
+
+    finally:
+        await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_channel_is_released_with_its_last_stream(fake_redis):
+    broker = NotificationBroker()
+
+    try:
+        first_tab = await broker.subscribe("user")
+        second_tab = await broker.subscribe("user")
+        channel = notification_channel("user")
+        await broker.unsubscribe("user", first_tab)
+
+        assert await fake_redis.pubsub_numsub(channel) == [(channel.encode(), 1)]
+
+        await broker.unsubscribe("user", second_tab)
+
+        assert not broker.queues
+        assert await fake_redis.pubsub_numsub(channel) == [(channel.encode(), 0)]
+
+    finally:
+        await broker.close()
+
+
+class PubSubServer:
+    # just enough of the redis protocol for a subscriber, over a real socket so read timeouts apply
+    def __init__(self):
+        self.connections = 0
+        self.writers = []
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def read_command(self, reader: asyncio.StreamReader):
+        arguments = []
+
+        for _ in range(int((await reader.readline())[1:])):
+            length = int((await reader.readline())[1:])
+            arguments.append((await reader.readexactly(length + 2))[:-2])
+
+        return arguments
+
+    @staticmethod
+    def encode(*items) -> bytes:
+        encoded = [b"$%d\r\n%s\r\n" % (len(item), item) if isinstance(item, bytes) else b":%d\r\n" % item
+                   for item in items]
+        return b"*%d\r\n" % len(items) + b"".join(encoded)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.writers.append(writer)
+        subscribed = False
+
+        try:
+            while True:
+                command = await self.read_command(reader)
+
+                if command[0].upper() == b"SUBSCRIBE":
+                    subscribed = True
+                    writer.write(b"".join(self.encode(b"subscribe", channel, 1) for channel in command[1:]))
+
+                elif command[0].upper() == b"PING":
+                    writer.write(self.encode(b"pong", *command[1:2]) if subscribed else b"+PONG\r\n")
+
+                else:
+                    writer.write(b"+OK\r\n")
+
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            writer.close()
+
+    async def publish(self, channel: str, data: str):
+        for writer in self.writers:
+            if not writer.is_closing():
+                writer.write(self.encode(b"message", channel.encode(), data.encode()))
+                await writer.drain()
+
+    async def close(self):
+        for writer in self.writers:
+            writer.close()
+
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_idle_subscription_outlives_the_socket_timeout(monkeypatch, caplog):
+    server = PubSubServer()
+    port = await server.start()
+    redis_client = Redis(host="127.0.0.1", port=port, socket_timeout=0.2, health_check_interval=1)
+
+    async def get_server_redis():
+        return redis_client
+
+    monkeypatch.setattr(notification_stream, "get_redis", get_server_redis)
+    monkeypatch.setattr(Settings, "NOTIFICATION_STREAM_POLL_INTERVAL", 0.05)
+    broker = NotificationBroker()
+
+    try:
+        queue = await broker.subscribe("user")
+
+        with caplog.at_level(logging.ERROR):
+            await asyncio.sleep(0.6)
+            await server.publish(notification_channel("user"), "after a quiet spell")
+            assert await asyncio.wait_for(queue.get(), timeout=1) == "after a quiet spell"
+
+        assert server.connections == 1
+        assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+    finally:
+        await broker.close()
+        await redis_client.close()
+        await server.close()
@@ -0,0 +1,43 @@
+import uuid
+from datetime import datetime
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.db.models import User
+from app.depends.exceptions import InvalidCursor
+from app.utils.pagination import encode_cursor, decode_cursor, paginate, page_response
+
+SORT_KEY = [User.user_created_at, User.user_id]
+
+
+def test_cursor_round_trips_sort_key_values():
+    values = [datetime(2026, 10, 18, 12, 30, 15, 123456), uuid.uuid4()]
+
+    assert decode_cursor(encode_cursor(values), SORT_KEY) == values
+
+
+@pytest.mark.parametrize("cursor", ["garbage", encode_cursor(["2026-10-18T12:30:15"]),
+                                    encode_cursor(["yesterday", str(uuid.uuid4())])])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, SORT_KEY)
+
+
+def test_cursor_page_seeks_past_the_last_key_instead_of_offsetting():
+    cursor = encode_cursor([datetime(2026, 10, 18), uuid.uuid4()])
+    sql = str(paginate(select(User), SORT_KEY, cursor, page=500, items_per_page=10)
+              .compile(dialect=postgresql.dialect()))
+
+    assert "(users.user_created_at, users.user_id) > (" in sql
+    assert "OFFSET" not in sql
+    assert "ORDER BY users.user_created_at, users.user_id" in sql
+
+
+def test_page_response_returns_next_cursor_only_when_more_rows_exist():
+    rows = [(datetime(2026, 10, 18, hour), uuid.uuid4()) for hour in range(4)]
+
+    page = page_response(rows, 3, lambda row: row)
+    assert page["items"] == rows[:3]
+    assert decode_cursor(page["next_cursor"], SORT_KEY) == list(rows[2])
+
+    assert page_response(rows[:3], 3, lambda row: row)["next_cursor"] is None
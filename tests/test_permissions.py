@@ -0,0 +1,89 @@
+import pytest
+from app.depends.exceptions import NotOwnerOrAdmin, NotMember
+from app.services import permissions
+from app.services.permissions import PermissionService, ROLE_ADMIN, ROLE_MEMBER, role_redis_key
+
+
+class MembershipSession:
+    def __init__(self, is_admin, after_read=None):
+        self.info = {}
+        self.is_admin = is_admin
+        self.after_read = after_read
+        self.queries = 0
+
+    async def scalar(self, statement):
+        self.queries += 1
+        is_admin = self.is_admin
+
+        if self.after_read is not None:
+            await self.after_read()
+
+        return is_admin
+
+
+@pytest.mark.asyncio
+async def test_role_is_memoized_per_request_and_cached_across_requests(fake_redis):
+    session = MembershipSession(is_admin=True)
+    service = PermissionService(session)
+
+    assert await service.check_owner_or_admin("user", "company")
+    assert await PermissionService(session).check_member("user", "company")
+    assert session.queries == 1
+    assert await fake_redis.get(role_redis_key("company", "user")) == f"0:{ROLE_ADMIN}".encode()
+
+    next_request = MembershipSession(is_admin=True)
+    assert await PermissionService(next_request).is_owner_or_admin("user", "company")
+    assert next_request.queries == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_memo_and_cached_role(fake_redis):
+    session = MembershipSession(is_admin=True)
+    service = PermissionService(session)
+    await service.check_owner_or_admin("user", "company")
+
+    session.is_admin = False
+    await service.invalidate("company", "user")
+
+    with pytest.raises(NotOwnerOrAdmin):
+        await service.check_owner_or_admin("user", "company")
+
+    assert await fake_redis.get(role_redis_key("company", "user")) == f"1:{ROLE_MEMBER}".encode()
+
+    session.is_admin = None
+    await service.invalidate("company", "user")
+
+    with pytest.raises(NotMember):
+        await service.check_member("user", "company")
+
+    assert await fake_redis.get(role_redis_key("company", "user")) is None
+
+
+@pytest.mark.asyncio
+async def test_role_read_before_an_invalidation_is_not_served_after_it(fake_redis):
+    async def demote():
+        # the membership change commits and invalidates between the stale read and its cache write
+        await PermissionService(MembershipSession(is_admin=False)).invalidate("company", "user")
+
+    stale_request = MembershipSession(is_admin=True, after_read=demote)
+
+    assert await PermissionService(stale_request).is_owner_or_admin("user", "company")
+
+    next_request = MembershipSession(is_admin=False)
+
+    with pytest.raises(NotOwnerOrAdmin):
+        await PermissionService(next_request).check_owner_or_admin("user", "company")
+
+    assert next_request.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_falls_back_to_database(monkeypatch):
+    async def get_broken_redis():
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(permissions, "get_redis", get_broken_redis)
+    session = MembershipSession(is_admin=False)
+
+    assert await PermissionService(session).check_member("user", "company")
+    assert session.queries == 1
@@ -0,0 +1,236 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
+from app.core.config import Settings
+from app.db.db import Base
+from app.db.instrumentation import instrument_engine
+from app.db.models import User, Company, CompanyMembers, Quiz, Question, Result, Notification
+from app.schemas.quiz import NotificationBulkHandle
+from app.services.notifications import NotificationService
+from app.services.results import ResultService
+from app.services.rollups import backfill_result_rollups
+from app.utils.pagination import encode_cursor
+
+INDEXED_TABLES = {"results", "result_rollups", "company_notifications"}
+
+RESULT_QUERIES = {
+    "user_result_company": lambda service, data: service.user_result_company(
+        data["company_id"], data["user_id"], None, data["user_id"]),
+    "user_result_companies": lambda service, data: service.user_result_companies(data["user_id"], None),
+    "company_results": lambda service, data: service.company_results(data["company_id"], None, data["user_id"]),
+    "quiz_results_for_users": lambda service, data: service.quiz_results_for_users(
+        data["quiz_id"], data["user_id"], None),
+    "user_results_quizzes_over_times": lambda service, data: service.user_results_quizzes_over_times(
+        data["user_id"]),
+    "user_completed_quizzes": lambda service, data: service.user_completed_quizzes(data["user_id"], data["user_id"]),
+    "company_average_scores_over_times": lambda service, data: service.company_average_scores_over_times(
+        data["company_id"], data["user_id"]),
+    "company_user_average_scores_over_times": lambda service, data: service.company_average_scores_over_times(
+        data["company_id"], data["user_id"], data["user_id"]),
+    "company_last_attempt_times": lambda service, data: service.company_last_attempt_times(
+        data["company_id"], data["user_id"]),
+}
+
+NOTIFICATION_QUERIES = {
+    "inbox": lambda service, data: service.get_user_notifications(data["user_id"]),
+    "inbox_next_page": lambda service, data: service.get_user_notifications(data["user_id"], cursor=data["cursor"]),
+    "unread_inbox": lambda service, data: service.get_user_notifications(data["user_id"], unread_only=True),
+    "unread_inbox_next_page": lambda service, data: service.get_user_notifications(data["user_id"], True,
+                                                                                   cursor=data["cursor"]),
+    "bulk_handle_ids": lambda service, data: service.handle_notifications_bulk(
+        data["user_id"], NotificationBulkHandle(notification_ids=[uuid.uuid4(), uuid.uuid4()])),
+    "bulk_handle_before": lambda service, data: service.handle_notifications_bulk(
+        data["user_id"], NotificationBulkHandle(before=datetime.utcnow() - timedelta(days=29))),
+}
+
+# statements per call with a cold role cache, a loop over rows shows up here long before it shows up in latency
+QUERY_BUDGETS = {
+    "user_result_company": 1,
+    "user_result_companies": 1,
+    "company_results": 2,
+    "quiz_results_for_users": 3,
+    "user_results_quizzes_over_times": 1,
+    "user_completed_quizzes": 1,
+    "company_average_scores_over_times": 2,
+    "company_user_average_scores_over_times": 2,
+    "company_last_attempt_times": 2,
+    "inbox": 1,
+    "inbox_next_page": 1,
+    "unread_inbox": 1,
+    "unread_inbox_next_page": 1,
+    "bulk_handle_ids": 1,
+    "bulk_handle_before": 1,
+}
+
+EXPORT_CRITERIA = {
+    "export_user_company": lambda data: (Result.result_user_id == data["user_id"],
+                                         Result.result_company_id == data["company_id"]),
+    "export_user": lambda data: (Result.result_user_id == data["user_id"],),
+    "export_company": lambda data: (Result.result_company_id == data["company_id"],),
+    "export_quiz": lambda data: (Result.result_quiz_id == data["quiz_id"],),
+}
+
+
+@pytest_asyncio.fixture
+async def plan_engine():
+    engine = instrument_engine(create_async_engine(Settings.TEST_DB_URL, poolclass=NullPool))
+
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Test database is not available: {e}")
+
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def seeded(plan_engine):
+    async with AsyncSession(plan_engine, expire_on_commit=False) as session:
+        users = [User(user_email=f"{uuid.uuid4()}@example.com") for _ in range(20)]
+        session.add_all(users)
+        await session.flush()
+
+        companies = [Company(company_name=str(uuid.uuid4()), owner_id=users[index].user_id) for index in range(4)]
+        session.add_all(companies)
+        await session.flush()
+
+        session.add_all([CompanyMembers(company_id=company.company_id, user_id=user.user_id,
+                                        is_admin=user.user_id == company.owner_id)
+                         for company in companies for user in users])
+        quizzes = [Quiz(quiz_name=str(uuid.uuid4()), company_id=company.company_id)
+                   for company in companies for _ in range(3)]
+        session.add_all(quizzes)
+        await session.flush()
+
+        session.add_all([Question(question_text=str(uuid.uuid4()), question_answers=["a", "b"],
+                                  question_correct_answer=["a"], quiz_id=quiz.quiz_id,
+                                  question_company_id=quiz.company_id)
+                         for quiz in quizzes for _ in range(2)])
+        started_at = datetime.utcnow() - timedelta(days=30)
+        session.add_all([Result(result_user_id=user.user_id, result_company_id=quiz.company_id,
+                                result_quiz_id=quiz.quiz_id, result_right_count=attempt % 3, result_total_count=2,
+                                result_created_at=started_at + timedelta(hours=attempt))
+                         for user in users for quiz in quizzes for attempt in range(3)])
+        session.add_all([Notification(user_id=user.user_id, company_id=companies[index % 4].company_id,
+                                      notification_text=str(index), notification_status=None if index % 2 else True,
+                                      notification_created_at=started_at + timedelta(hours=index))
+                         for user in users for index in range(20)])
+        await session.commit()
+        await backfill_result_rollups(session)
+
+    async with plan_engine.connect() as connection:
+        await connection.execute(text("ANALYZE"))
+
+    return {"user_id": str(users[0].user_id), "company_id": str(companies[0].company_id),
+            "quiz_id": str(quizzes[0].quiz_id),
+            "cursor": encode_cursor([started_at + timedelta(hours=10), uuid.uuid4()])}
+
+
+async def capture_statements(engine, run, service_class=ResultService):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    try:
+        async with AsyncSession(engine) as session:
+            await run(service_class(session))
+
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return [(statement, parameters) for statement, parameters in statements
+            if any(table in statement for table in INDEXED_TABLES)]
+
+
+async def get_leading_index_columns(connection) -> dict:
+    result = await connection.execute(text(
+        "SELECT index_class.relname, attribute.attname FROM pg_index "
+        "JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid "
+        "JOIN pg_class table_class ON table_class.oid = pg_index.indrelid "
+        "JOIN pg_attribute attribute ON attribute.attrelid = pg_index.indrelid "
+        "AND attribute.attnum = pg_index.indkey[0] "
+        "WHERE table_class.relname = ANY(:tables)"), {"tables": list(INDEXED_TABLES)})
+    return dict(result.all())
+
+
+def find_full_scans(plan: dict, leading_columns: dict) -> list:
+    full_scans = []
+
+    if plan["Node Type"] == "Seq Scan" and plan.get("Relation Name") in INDEXED_TABLES:
+        full_scans.append(f"Seq Scan on {plan['Relation Name']}")
+
+    # an index whose leading column is not constrained is walked end to end, just like a seq scan
+    elif plan.get("Index Name") in leading_columns \
+            and leading_columns[plan["Index Name"]] not in plan.get("Index Cond", ""):
+        full_scans.append(f"full {plan['Node Type']} using {plan['Index Name']}")
+
+    for child in plan.get("Plans", []):
+        full_scans.extend(find_full_scans(child, leading_columns))
+
+    return full_scans
+
+
+async def assert_no_full_scans(engine, statements):
+    assert statements
+
+    async with engine.connect() as connection:
+        leading_columns = await get_leading_index_columns(connection)
+        # keep the planner from preferring seq scans on the small seeded tables
+        await connection.execute(text("SET enable_seqscan = off"))
+
+        for statement, parameters in statements:
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            full_scans = find_full_scans(plan[0]["Plan"], leading_columns)
+            assert not full_scans, f"{', '.join(full_scans)} in plan for:\n{statement}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", RESULT_QUERIES)
+async def test_result_queries_use_indexes(plan_engine, seeded, fake_redis, name):
+    statements = await capture_statements(plan_engine, lambda service: RESULT_QUERIES[name](service, seeded))
+    await assert_no_full_scans(plan_engine, statements)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", EXPORT_CRITERIA)
+async def test_export_queries_use_indexes(plan_engine, seeded, fake_redis, name):
+    async def export(service):
+        async for _ in service.stream_answer_records(*EXPORT_CRITERIA[name](seeded)):
+            pass
+
+    statements = await capture_statements(plan_engine, export)
+    await assert_no_full_scans(plan_engine, statements)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", NOTIFICATION_QUERIES)
+async def test_notification_inbox_queries_use_indexes(plan_engine, seeded, name):
+    statements = await capture_statements(plan_engine, lambda service: NOTIFICATION_QUERIES[name](service, seeded),
+                                          NotificationService)
+    await assert_no_full_scans(plan_engine, statements)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", QUERY_BUDGETS)
+async def test_queries_stay_within_budget(plan_engine, seeded, fake_redis, query_budget, name):
+    run, service_class = (RESULT_QUERIES[name], ResultService) if name in RESULT_QUERIES \
+        else (NOTIFICATION_QUERIES[name], NotificationService)
+
+    with query_budget(QUERY_BUDGETS[name], max_repeats=1):
+        async with AsyncSession(plan_engine) as session:
+            await run(service_class(session), seeded)
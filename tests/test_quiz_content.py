@@ -0,0 +1,93 @@
+import json
+from typing import Optional
+from types import SimpleNamespace
+import pytest
+from starlette.requests import Request
+from app.core.config import Settings
+from app.depends.exceptions import ErrorRetrievingQuestion, QuizNotFound
+from app.services import quiz_content
+from app.services.questions import QuestionService
+from app.services.quiz_content import get_quiz_content
+from app.services.quiz_versions import VersionedCache
+from app.utils.http_cache import etag_matches, cached_json_response
+
+QUIZ_ID = "quiz"
+
+
+class ContentSession:
+    def __init__(self, question_texts, version: Optional[int] = 0):
+        self.question_texts = question_texts
+        self.version = version
+        self.queries = 0
+        self.info = {}
+
+    async def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(first=lambda: ("company", self.version) if self.version is not None else None)
+
+    async def scalars(self, statement):
+        self.queries += 1
+        questions = [SimpleNamespace(question_text=text, question_answers=["a", "b"]) for text in self.question_texts]
+        return SimpleNamespace(all=lambda: questions)
+
+
+@pytest.fixture(autouse=True)
+def empty_quiz_content_cache(monkeypatch):
+    monkeypatch.setattr(quiz_content, "quiz_content_cache", new_cache())
+
+
+def new_cache():
+    return VersionedCache(Settings.QUIZ_CONTENT_CACHE_SIZE, Settings.QUIZ_CONTENT_CACHE_TTL)
+
+
+def request_with(headers: dict) -> Request:
+    return Request({"type": "http", "headers": [(name.encode(), value.encode()) for name, value in headers.items()]})
+
+
+@pytest.mark.asyncio
+async def test_content_is_served_from_cache_until_questions_change(fake_redis, monkeypatch):
+    session = ContentSession(["first", "second"])
+    content = await get_quiz_content(session, QUIZ_ID)
+
+    assert json.loads(content["body"]) == [{"question_text": "first", "question_answers": ["a", "b"]},
+                                           {"question_text": "second", "question_answers": ["a", "b"]}]
+    assert await get_quiz_content(session, QUIZ_ID) is content
+    # the version lookup on every call, the questions only once
+    assert session.queries == 3
+
+    # another worker finds the serialized content in redis
+    monkeypatch.setattr(quiz_content, "quiz_content_cache", new_cache())
+    assert await get_quiz_content(ContentSession([]), QUIZ_ID) == content
+
+    changed = await get_quiz_content(ContentSession(["first"], version=1), QUIZ_ID)
+
+    assert changed["question_count"] == 1
+    assert changed["etag"] != content["etag"]
+
+
+
+@pytest.mark.asyncio
+async def test_missing_quiz_is_not_found_rather_than_forbidden(fake_redis):
+    with pytest.raises(ErrorRetrievingQuestion) as error:
+        await QuestionService(ContentSession([], version=None)).quiz_questions(QUIZ_ID, "user")
+
+    assert isinstance(error.value.__context__, QuizNotFound)
+
+def test_etag_matching():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_matching_etag_gets_not_modified_without_body():
+    response = cached_json_response(request_with({"if-none-match": '"tag"'}), b"[]", '"tag"')
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == '"tag"'
+
+    response = cached_json_response(request_with({}), b"[]", '"tag"')
+
+    assert response.status_code == 200
+    assert response.body == b"[]"
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.services.answer_keys import build_answer_key
+from app.services.quizzes import grade_answers, answer_feedback, attempt_time
+
+
+def test_grading_matches_any_comma_separated_answer_case_insensitively():
+    answer_key = build_answer_key([
+        SimpleNamespace(question_id=1, question_correct_answer=["Yes"]),
+        SimpleNamespace(question_id=2, question_correct_answer=["a", "B"]),
+        SimpleNamespace(question_id=3, question_correct_answer=["no"]),
+    ])
+
+    correctness = grade_answers(answer_key, ["YES", "c,b", "yes"])
+
+    assert correctness == [True, True, False]
+    assert answer_feedback(answer_key, correctness) == [
+        "Question 1: Correct!",
+        "Question 2: Correct!",
+        "Question 3: Incorrect. Correct answer(s) is/are 'no'",
+    ]
+
+
+def test_attempt_time_is_naive_utc_and_never_in_the_future():
+    received_at = datetime(2023, 11, 20, 12, 0)
+
+    assert attempt_time(None, received_at) == received_at
+    assert attempt_time(received_at + timedelta(hours=1), received_at) == received_at
+    assert attempt_time(datetime(2023, 11, 20, 11, 0, tzinfo=timezone(timedelta(hours=2))),
+                        received_at) == datetime(2023, 11, 20, 9, 0)
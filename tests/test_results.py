@@ -0,0 +1,51 @@
+import json
+import uuid
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import User, Company, CompanyMembers, Quiz, Result, ResultRollup
+from app.services import results
+from app.services.quizzes import QuizService, answer_redis_key
+from app.services.rollups import backfill_result_rollups
+
+
+@pytest.mark.asyncio
+async def test_get_redis_data_bulk_reports_missing_keys(fake_redis):
+    keys = [("quiz", "user", f"question_{index}") for index in range(7)]
+
+    for quiz_id, user_id, question_id in keys[:5]:
+        await fake_redis.set(answer_redis_key(quiz_id, user_id, question_id),
+                             json.dumps({"question_id": question_id}))
+
+    redis_data, missing_keys = await results.get_redis_data_bulk(keys, chunk_size=2)
+
+    assert [redis_data[key]["question_id"] for key in keys[:5]] == [key[2] for key in keys[:5]]
+    assert missing_keys == keys[5:]
+
+
+@pytest.mark.asyncio
+async def test_quiz_with_results_can_be_deleted(db_engine, fake_redis):
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        user = User(user_email=f"{uuid.uuid4()}@example.com")
+        session.add(user)
+        await session.flush()
+        company = Company(company_name=str(uuid.uuid4()), owner_id=user.user_id)
+        session.add(company)
+        await session.flush()
+        quiz = Quiz(quiz_name=str(uuid.uuid4()), company_id=company.company_id)
+        session.add_all([CompanyMembers(company_id=company.company_id, user_id=user.user_id, is_admin=True), quiz])
+        await session.flush()
+        session.add(Result(result_user_id=user.user_id, result_company_id=company.company_id,
+                           result_quiz_id=quiz.quiz_id, result_created_at=datetime.utcnow(),
+                           result_right_count=1, result_total_count=2))
+        await session.commit()
+        await backfill_result_rollups(session)
+
+    async with AsyncSession(db_engine) as session:
+        await QuizService(session).delete(str(quiz.quiz_id), str(user.user_id))
+
+    # the rollups go with the quiz, the results stay with the quiz id cleared as before
+    async with AsyncSession(db_engine) as session:
+        assert await session.scalar(select(func.count()).select_from(ResultRollup)) == 0
+        assert await session.scalar(select(Result.result_quiz_id)) is None
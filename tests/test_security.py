@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+import pytest
+from passlib.context import CryptContext
+from app.core.metrics import request_timings
+from app.services.auth import AuthService
+from app.services.users import UserService
+from app.utils import security
+from app.utils.security import TokenCache, Hasher, create_access_token, decode_and_verify_access_token
+
+
+@pytest.fixture
+def counted_decode(monkeypatch):
+    calls = []
+    decode = security.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(security, "token_cache", TokenCache(max_size=8))
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_repeat_token_skips_signature_verification(counted_decode):
+    token = await create_access_token({"sub": "user@example.com", "user_id": "user"})
+
+    claims = await decode_and_verify_access_token(token)
+    verified_calls = len(counted_decode)
+
+    assert await decode_and_verify_access_token(token) == claims
+    assert len(counted_decode) == verified_calls
+
+
+@pytest.mark.asyncio
+async def test_forged_token_is_not_served_from_cache(counted_decode):
+    token = await create_access_token({"sub": "user@example.com", "user_id": "user"})
+    await decode_and_verify_access_token(token)
+
+    assert await decode_and_verify_access_token(token[:-2] + "xx") is None
+
+
+@pytest.mark.asyncio
+async def test_auth_timing_excludes_the_user_lookup(counted_decode, monkeypatch):
+    async def slow_get_by_email(self, email):
+        started = time.perf_counter()
+        await asyncio.sleep(0.05)
+        timings["db"] = timings.get("db", 0) + time.perf_counter() - started
+        return email
+
+    monkeypatch.setattr(UserService, "get_by_email", slow_get_by_email)
+    token = await create_access_token({"sub": "user@example.com", "user_id": "user"})
+    timings = {}
+    reset_token = request_timings.set(timings)
+
+    try:
+        assert await AuthService.get_current_user(token, None) == "user@example.com"
+    finally:
+        request_timings.reset(reset_token)
+
+    assert timings["db"] >= 0.05
+    assert timings["auth"] < 0.05
+
+
+def test_cache_drops_expired_and_least_recently_used_tokens():
+    cache = TokenCache(max_size=2)
+    cache.set("expired", {"sub": "expired", "exp": time.time() - 1})
+    cache.set("first", {"sub": "first", "exp": time.time() + 60})
+    cache.set("second", {"sub": "second", "exp": time.time() + 60})
+
+    assert cache.get("expired") is None
+    assert cache.get("first")["sub"] == "first"
+
+    cache.set("third", {"sub": "third", "exp": time.time() + 60})
+
+    assert cache.get("second") is None
+    assert [cache.get(token)["sub"] for token in ("first", "third")] == ["first", "third"]
+
+
+def test_tokens_without_expiry_are_not_cached():
+    cache = TokenCache(max_size=2)
+    cache.set("token", {"sub": "user"})
+
+    assert cache.get("token") is None
+
+
+@pytest.fixture
+def cheap_password_context(monkeypatch):
+    password_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+    monkeypatch.setattr(security, "password_context", password_context)
+    return password_context
+
+
+@pytest.mark.asyncio
+async def test_hashing_runs_off_the_event_loop(cheap_password_context, monkeypatch):
+    threads = []
+    verify = cheap_password_context.verify
+
+    def recording_verify(*args):
+        threads.append(threading.current_thread())
+        return verify(*args)
+
+    monkeypatch.setattr(cheap_password_context, "verify", recording_verify)
+    hashed_password = await Hasher.get_password_hash("PassWord123")
+
+    assert await Hasher.verify_password("PassWord123", hashed_password)
+    assert not await Hasher.verify_password("wrong", hashed_password)
+    assert threading.main_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_verify_and_update_rehashes_when_cost_changes(cheap_password_context):
+    legacy_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("PassWord123")
+
+    is_valid, new_hash = await Hasher.verify_and_update("PassWord123", legacy_hash)
+    assert is_valid and new_hash.startswith("$2b$05$")
+
+    assert await Hasher.verify_and_update("PassWord123", new_hash) == (True, None)
+    assert await Hasher.verify_and_update("wrong", legacy_hash) == (False, None)
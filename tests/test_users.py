@@ -1,4 +1,9 @@
 import uuid
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import User, NotificationCounter
+from app.services.users import UserService
 
 user_id = str(uuid.uuid4())
 
@@ -88,3 +93,19 @@ async def test_get_user_not_found(client):
     assert response.json() == {
         "detail": "No User with id: `16303002-876a-4f39-ad16-e715f151bab3` found"
     }
+
+
+@pytest.mark.asyncio
+async def test_user_with_notification_counter_can_be_deleted(db_engine):
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        user = User(user_email=f"{uuid.uuid4()}@example.com")
+        session.add(user)
+        await session.flush()
+        session.add(NotificationCounter(user_id=user.user_id, unread_count=3))
+        await session.commit()
+
+    async with AsyncSession(db_engine) as session:
+        await UserService(session).delete(str(user.user_id))
+
+    async with AsyncSession(db_engine) as session:
+        assert await session.scalar(select(func.count()).select_from(NotificationCounter)) == 0